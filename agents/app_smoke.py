@@ -0,0 +1,151 @@
+# agents/app_smoke.py
+"""
+Headless smoke run of the generated Streamlit app.
+
+`validate_app` only reads app.py; mistakes such as a session_state key that is
+never initialised or a module function called with the wrong arguments only
+show up when the script runs. `smoke_app` runs app.py through
+`streamlit.testing.v1.AppTest` once, then clicks every keyed button it
+rendered, each click in a fresh app session in its own process. Clicks run
+concurrently (Settings.APP_SMOKE_WORKERS processes, forked from the same
+preloaded forkserver as the test workers).
+
+The run is bounded: each script run has Settings.APP_SMOKE_RUN_TIMEOUT seconds
+and the whole app Settings.APP_SMOKE_BUDGET; processes still running when the
+budget is spent are killed and reported.
+
+Issues use the utils.app_rules shape, so fix_app gets them with line numbers:
+{"rule": "smoke", "file": "app.py", "line": 11, "message": "Clicking button 'add' raised KeyError: ..."}
+"""
+import logging
+import multiprocessing.connection
+import os
+import re
+import sys
+import time
+
+from config.settings import Settings
+from agents.pytest_worker import worker_context
+
+logger = logging.getLogger(__name__)
+
+_FRAME_RE = re.compile(r'File "([^"]+)", line (\d+)')
+
+
+def _scenario(conn, app_path: str, key: str | None, timeout: float):
+    """Child process: run the app (and click button `key`), send back exceptions and button keys."""
+    root = os.path.dirname(app_path)
+    os.chdir(root)
+    sys.path.insert(0, root)
+    # Streamlit logs every uncaught app exception; the parent reports them instead
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 2)
+    result = {"exceptions": [], "buttons": []}
+    try:
+        from streamlit.testing.v1 import AppTest
+
+        app = AppTest.from_file(app_path, default_timeout=timeout)
+        app.run()
+        if key is None:
+            result["buttons"] = [button.key for button in app.button if button.key]
+        elif not app.exception:
+            app.button(key=key).click().run()
+        result["exceptions"] = [
+            {"type": element.proto.type, "message": element.proto.message, "stack": list(element.stack_trace)}
+            for element in app.exception if not element.proto.is_warning
+        ]
+    except Exception as e:  # Timeouts and harness errors are reported like app exceptions
+        result["exceptions"] = [{"type": type(e).__name__, "message": str(e), "stack": []}]
+    conn.send(result)
+    conn.close()
+
+
+def _location(stack: list, root: str) -> tuple:
+    """(relative file, line) of the innermost frame in project code, or ("app.py", None)."""
+    location = ("app.py", None)
+    for frame in stack:
+        for filename, line in _FRAME_RE.findall(frame):
+            path = os.path.abspath(filename)
+            if path.startswith(root + os.sep) and "site-packages" not in path:
+                location = (os.path.relpath(path, root), int(line))
+    return location
+
+
+def _issues(result: dict, root: str, action: str) -> list:
+    issues = []
+    for exc in result["exceptions"]:
+        file, line = _location(exc["stack"], root)
+        issues.append({"rule": "smoke", "file": file, "line": line,
+                       "message": f"{action} raised {exc['type']}: {exc['message']}"})
+    return issues
+
+
+def _action(key: str | None) -> str:
+    return "Running the app" if key is None else f"Clicking button '{key}'"
+
+
+def smoke_app(app_path: str, budget: float | None = None, workers: int | None = None,
+              run_timeout: float | None = None) -> list:
+    """
+    Runs app.py headlessly and clicks each keyed button, reporting every exception raised.
+
+    Args:
+        app_path (str): The generated app.py.
+        budget (float, optional): Seconds for the whole smoke run. Defaults to Settings.APP_SMOKE_BUDGET.
+        workers (int, optional): Concurrent click processes. Defaults to Settings.APP_SMOKE_WORKERS (0 = CPUs).
+        run_timeout (float, optional): Seconds per script run. Defaults to Settings.APP_SMOKE_RUN_TIMEOUT.
+
+    Returns:
+        list: Issues ({"rule", "file", "line", "message"}); empty when nothing raised.
+    """
+    app_path = os.path.abspath(app_path)
+    root = os.path.dirname(app_path)
+    budget = budget or Settings.APP_SMOKE_BUDGET
+    deadline = time.monotonic() + budget
+    workers = workers or Settings.APP_SMOKE_WORKERS or os.cpu_count() or 1
+    run_timeout = run_timeout or Settings.APP_SMOKE_RUN_TIMEOUT
+    context = worker_context()
+
+    pending, running, issues = [None], {}, []
+    buttons_listed = False
+    while pending or running:
+        while pending and len(running) < workers:
+            key = pending.pop(0)
+            parent_conn, child_conn = context.Pipe(duplex=False)
+            process = context.Process(target=_scenario, args=(child_conn, app_path, key, run_timeout), daemon=True)
+            process.start()
+            child_conn.close()
+            running[parent_conn] = (key, process)
+
+        remaining = deadline - time.monotonic()
+        ready = multiprocessing.connection.wait(list(running), timeout=max(remaining, 0)) if remaining > 0 else []
+        if not ready:
+            break
+        for conn in ready:
+            key, process = running.pop(conn)
+            try:
+                result = conn.recv()
+            except EOFError:
+                result = {"exceptions": [{"type": "Crash", "stack": [],
+                                          "message": f"smoke process exited with code {process.exitcode}"}]}
+            conn.close()
+            process.join(timeout=1)
+            issues.extend(_issues(result, root, _action(key)))
+            if key is None and not buttons_listed:
+                buttons_listed = True
+                pending.extend(result.get("buttons", []))
+
+    for conn, (key, process) in running.items():
+        process.kill()
+        process.join(timeout=1)
+        conn.close()
+        issues.append({"rule": "smoke", "file": "app.py", "line": None,
+                       "message": f"{_action(key)} did not finish within the {budget:g}s smoke budget"})
+    if pending:
+        logger.warning(f"Smoke budget spent; {len(pending)} buttons were not clicked: {pending}")
+
+    # A broken helper hit from several buttons is one problem for fix_app
+    unique = {}
+    for issue in issues:
+        unique.setdefault((issue["file"], issue["line"], issue["message"].split(" raised ", 1)[-1]), issue)
+    return sorted(unique.values(), key=lambda i: (i["file"] != "app.py", i["file"], i["line"] or 0))
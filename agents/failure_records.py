@@ -0,0 +1,302 @@
+# agents/failure_records.py
+"""
+Compact, structured descriptions of failing tests.
+
+Raw `-v` pytest output is long, repeats passing tests and buries the one line
+that matters. `build_records` turns a run result (see tester_agent.run_pytest)
+into one record per failing test: node id, outcome, exception type, message,
+assertion operands, and the failing source line with a few lines of context.
+`format_records` renders them as a short block for fix_analyzer prompts, and
+`summary_counts` reads exact counts from pytest's final summary line when no
+per-test results are available.
+
+When the run recorded function coverage (Settings.TEST_FUNCTION_COVERAGE),
+records also list the project functions each failing test executed, and
+`focused_source` trims a module or test file down to just those functions.
+
+`fingerprint` reduces a record to a stable id (test, exception type and the
+message with volatile details such as numbers and addresses masked), so the
+fix loop can recognise a failure it has already tried to fix.
+"""
+import ast
+import hashlib
+import os
+import re
+
+# Lines of source shown above and below the failing line
+CONTEXT_LINES = 2
+# Message lines kept per record (assertion diffs can run long)
+MAX_MESSAGE_LINES = 6
+# Records rendered into a prompt before the rest are summarized as a count
+MAX_RECORDS = 20
+
+# "generated_tests/test_calc.py:3: AssertionError" (the exception type is blank on intermediate frames)
+_LOCATION_RE = re.compile(r"^(?P<file>[^\s:][^:]*?\.py):(?P<line>\d+):(?: (?P<exc>[\w.]+))?\s*$")
+# "E       ZeroDivisionError: division by zero"
+_ERROR_LINE_RE = re.compile(r"^E\s{1,}(?P<text>.*)$")
+_EXC_PREFIX_RE = re.compile(r"^(?P<exc>[A-Za-z_][\w.]*(?:Error|Exception|Exit|Interrupt|Timeout|Exceeded|Warning)):\s?(?P<msg>.*)$")
+_ASSERT_OPERATORS = (" not in ", " is not ", " == ", " != ", " <= ", " >= ", " < ", " > ", " in ", " is ")
+# "==== 1 failed, 3 passed, 1 error in 0.12s ===="
+_SUMMARY_RE = re.compile(r"^=+ (?P<body>.*\d+ \w+.*) in [\d.]+s.*=+$")
+_COUNT_RE = re.compile(r"(\d+) (passed|failed|errors?|skipped|xfailed|xpassed)")
+# Parts of a message that change between otherwise identical failures
+_VOLATILE_RE = (
+    (re.compile(r"0x[0-9a-fA-F]+"), "ADDR"),
+    (re.compile(r"(/[^\s'\":]+)+/"), "PATH/"),
+    (re.compile(r"\d+(\.\d+)?"), "N"),
+    (re.compile(r"\s+"), " "),
+)
+
+
+def _split_assertion(expr: str) -> tuple[str | None, str | None, str | None]:
+    """Splits `assert <left> <op> <right>` into its operands; (None, None, None) for other expressions."""
+    expr = expr.strip()
+    if not expr.startswith("assert "):
+        return None, None, None
+    expr = expr[len("assert "):]
+    for op in _ASSERT_OPERATORS:
+        if op in expr:
+            left, right = expr.split(op, 1)
+            return left.strip(), op.strip(), right.strip()
+    return None, None, None
+
+
+def parse_longrepr(longrepr: str) -> dict:
+    """
+    Extracts the failure details from a pytest long representation.
+
+    Returns:
+        dict: exc_type, message, file, line, and (for comparisons) left, op, right.
+              Missing fields are None.
+    """
+    info = {"exc_type": None, "message": None, "file": None, "line": None, "left": None, "op": None, "right": None}
+    lines = (longrepr or "").splitlines()
+
+    for text in reversed(lines):
+        match = _LOCATION_RE.match(text.strip())
+        if match:
+            info["file"] = match.group("file")
+            info["line"] = int(match.group("line"))
+            info["exc_type"] = match.group("exc")
+            break
+
+    error_lines = [m.group("text").rstrip() for m in map(_ERROR_LINE_RE.match, lines) if m]
+    message_lines = []
+    for text in error_lines:
+        stripped = text.strip()
+        if stripped.startswith("Full diff:"):
+            # The left/right operands already carry what the full diff would show
+            break
+        prefix = _EXC_PREFIX_RE.match(stripped)
+        if prefix and not message_lines:
+            info["exc_type"] = info["exc_type"] or prefix.group("exc")
+            if prefix.group("msg"):
+                stripped = prefix.group("msg")
+            else:
+                continue
+        if info["left"] is None and stripped.startswith("assert "):
+            info["left"], info["op"], info["right"] = _split_assertion(stripped)
+        if stripped:
+            message_lines.append(stripped)
+
+    if not message_lines and lines:
+        # No "E" lines (engine errors, plain messages): the first non-empty line is the message
+        message_lines = [next((line.strip() for line in lines if line.strip()), "")]
+    if message_lines:
+        info["message"] = "\n".join(message_lines[:MAX_MESSAGE_LINES])
+    return info
+
+
+def source_context(path: str, line: int, rootdir: str = "", context: int = CONTEXT_LINES) -> str:
+    """The failing line (marked with '>') and `context` lines around it, or "" if the file is unreadable."""
+    if not path or not line:
+        return ""
+    full_path = path if os.path.isabs(path) else os.path.join(rootdir or os.getcwd(), path)
+    try:
+        with open(full_path, "r", encoding="utf-8") as fh:
+            source = fh.read().splitlines()
+    except (OSError, UnicodeDecodeError):
+        return ""
+    start, end = max(1, line - context), min(len(source), line + context)
+    width = len(str(end))
+    return "\n".join(
+        f"{'>' if n == line else ' '} {n:>{width}} | {source[n - 1]}" for n in range(start, end + 1)
+    )
+
+
+def build_records(result: dict, context: int = CONTEXT_LINES) -> list:
+    """
+    One record per failing or erroring test in a run_pytest result.
+
+    Args:
+        result (dict): A run_pytest result with per-test entries under "tests".
+        context (int): Source lines shown around the failing line.
+
+    Returns:
+        list: Records with nodeid, outcome, when, exc_type, message, left/op/right,
+              file, line, context, (for limit violations) reason and, when coverage
+              was recorded, functions (keys relative to rootdir) and rootdir.
+    """
+    rootdir = result.get("rootdir") or ""
+    records = []
+    for test in result.get("tests", []):
+        if test.get("outcome") not in ("failed", "error"):
+            continue
+        info = parse_longrepr(test.get("longrepr", ""))
+        record = {
+            "nodeid": test.get("nodeid", ""),
+            "outcome": test.get("outcome"),
+            "when": test.get("when", "call"),
+            **info,
+            "context": source_context(info["file"], info["line"], rootdir, context),
+        }
+        if test.get("reason"):
+            record["reason"] = test["reason"]
+        if "functions" in test:
+            record["functions"] = test["functions"]
+            record["rootdir"] = rootdir
+        records.append(record)
+    return records
+
+
+def normalize_message(message: str | None) -> str:
+    """First line of a failure message with addresses, paths and numbers masked."""
+    text = (message or "").strip().split("\n", 1)[0]
+    for pattern, replacement in _VOLATILE_RE:
+        text = pattern.sub(replacement, text)
+    return text.strip()
+
+
+def fingerprint(record: dict) -> str:
+    """Stable id of a failure: test id + exception type + normalized message."""
+    key = f"{record.get('nodeid', '')}|{record.get('exc_type') or ''}|{normalize_message(record.get('message'))}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+
+
+def format_records(records: list, limit: int = MAX_RECORDS) -> str:
+    """Renders failure records as a compact text block for LLM prompts."""
+    if not records:
+        return "No failing tests."
+    blocks = []
+    for record in records[:limit]:
+        label = record["outcome"].upper()
+        if record.get("when") not in (None, "call"):
+            label += f" during {record['when']}"
+        header = f"{label} {record['nodeid']}"
+        if record.get("exc_type"):
+            header += f" ({record['exc_type']})"
+        if record.get("reason"):
+            header += f" [{record['reason']}]"
+        lines = [header]
+        if record.get("file") and record.get("line"):
+            lines.append(f"  at {record['file']}:{record['line']}")
+        if record.get("message"):
+            lines.extend(f"  {line}" for line in record["message"].splitlines())
+        if record.get("left") is not None:
+            lines.append(f"  left:  {record['left']}")
+            lines.append(f"  right: {record['right']}")
+        if record.get("context"):
+            lines.extend(f"    {line}" for line in record["context"].splitlines())
+        blocks.append("\n".join(lines))
+    if len(records) > limit:
+        blocks.append(f"... and {len(records) - limit} more failing tests")
+    return "\n\n".join(blocks)
+
+
+def summary_counts(output: str) -> dict | None:
+    """
+    Reads pytest's final summary line ("=== 1 failed, 3 passed in 0.12s ===").
+
+    Returns:
+        dict: passed, failed (failures plus errors), errors and collected, or None if no summary line exists.
+    """
+    for text in reversed((output or "").splitlines()):
+        match = _SUMMARY_RE.match(text.strip())
+        if not match:
+            continue
+        counts = {}
+        for number, kind in _COUNT_RE.findall(match.group("body")):
+            kind = "errors" if kind.startswith("error") else kind
+            counts[kind] = counts.get(kind, 0) + int(number)
+        passed, failed, errors = counts.get("passed", 0), counts.get("failed", 0), counts.get("errors", 0)
+        collected = sum(counts.get(k, 0) for k in ("passed", "failed", "skipped", "xfailed", "xpassed"))
+        return {"passed": passed, "failed": failed + errors, "errors": errors, "collected": collected}
+    return None
+
+
+def hit_functions(records: list, path: str, rootdir: str = "") -> set | None:
+    """
+    Qualified names of functions in `path` executed by any failing test.
+
+    Returns:
+        set: e.g. {"add", "Calculator.divide"}, or None when the records carry no coverage data.
+    """
+    if not any("functions" in record for record in records):
+        return None
+    target = os.path.abspath(path)
+    names = set()
+    for record in records:
+        for key in record.get("functions", []):
+            relative, _, qualname = key.partition("::")
+            base = rootdir or record.get("rootdir") or os.getcwd()
+            if os.path.abspath(os.path.join(base, relative)) == target:
+                names.add(qualname)
+    return names
+
+
+def _drop_ranges(body: list, keep: set, prefix: str = "") -> list:
+    """(start, end, name) line ranges of functions in `body` that are not in `keep`; recurses into kept classes."""
+    ranges = []
+    for node in body:
+        start = min([node.lineno, *(d.lineno for d in getattr(node, "decorator_list", []))])
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            if f"{prefix}{node.name}" not in keep:
+                ranges.append((start, node.end_lineno, f"{prefix}{node.name}"))
+        elif isinstance(node, ast.ClassDef):
+            qualname = f"{prefix}{node.name}"
+            if any(name.startswith(qualname + ".") for name in keep):
+                # Keep the class and its constructor; drop methods the failing tests never reached
+                class_keep = keep | {f"{qualname}.__init__"}
+                ranges.extend(_drop_ranges(node.body, class_keep, qualname + "."))
+            else:
+                ranges.append((start, node.end_lineno, qualname))
+    return ranges
+
+
+def focus_source(source: str, keep: set) -> str:
+    """
+    Removes top-level functions, classes and methods whose qualified name is not in `keep`.
+
+    Imports, constants and other module-level statements stay. Each removed run of
+    definitions is replaced by a one-line comment naming what was left out.
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return source
+    ranges = _drop_ranges(tree.body, keep)
+    if not ranges:
+        return source
+    lines = source.splitlines()
+    for start, end, name in sorted(ranges, reverse=True):
+        indent = lines[start - 1][:len(lines[start - 1]) - len(lines[start - 1].lstrip())]
+        lines[start - 1:end] = [f"{indent}# ... {name} omitted (not executed by failing tests)"]
+    return "\n".join(lines) + "\n"
+
+
+def focused_source(path: str, records: list, rootdir: str = "") -> str:
+    """
+    The contents of `path`, reduced to the functions executed by failing tests.
+
+    Falls back to the whole file when there is no coverage data or no failing test
+    reached the file (e.g. an import error), so the prompt never loses the evidence.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            source = fh.read()
+    except (OSError, UnicodeDecodeError):
+        return ""
+    keep = hit_functions(records, path, rootdir)
+    if not keep:
+        return source
+    return focus_source(source, keep)
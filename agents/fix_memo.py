@@ -0,0 +1,81 @@
+# agents/fix_memo.py
+"""
+Memo of fix attempts, keyed by the set of failures they were made against.
+
+fix_analyzer used to call the loop stuck only when the per-module failure
+counts matched the previous lap exactly. That misses oscillation (A fails,
+then B, then A again) and pays for laps that repeat an earlier attempt.
+
+Each lap, a module's failing tests are reduced to a failure set key (the
+sorted failure fingerprints, see agents.failure_records.fingerprint). The
+memo, kept in graph state, records per module the sequence of keys seen and,
+per key, the strategies already tried and what they recommended:
+
+    {module: {"history": [key, ...],
+              "attempts": {key: [{"strategy": "analyze", "recommendation": "..."}]}}}
+
+`next_step` decides what to do with a failure set:
+- a new set is analyzed normally;
+- a set seen before (unchanged after a fix, or back again after a cycle) gets
+  the next untried strategy, which shows the analyzer what was already tried;
+- once every strategy was tried against it, the module is given up on without
+  another LLM call.
+"""
+import hashlib
+import logging
+
+from agents.failure_records import fingerprint
+
+logger = logging.getLogger(__name__)
+
+# Tried in order against the same failure set
+STRATEGIES = ("analyze", "alternate")
+
+
+def failure_set_key(records: list, fallback: str = "") -> str:
+    """Order-independent id of a set of failures; `fallback` (e.g. raw output) is used when there are no records."""
+    fingerprints = sorted({fingerprint(record) for record in records}) or [fingerprint({"message": fallback})]
+    return hashlib.sha1(",".join(fingerprints).encode("utf-8")).hexdigest()[:12]
+
+
+def next_step(memo: dict, module: str, key: str) -> dict:
+    """
+    Chooses how to handle `module`'s current failure set.
+
+    Returns:
+        dict: {"strategy": a name from STRATEGIES or "stop", "cycle": True when the set came back
+               after a different one, "previous": recommendations already tried against it}
+    """
+    entry = memo.get(module, {})
+    history = entry.get("history", [])
+    attempts = entry.get("attempts", {}).get(key, [])
+    tried = {attempt["strategy"] for attempt in attempts}
+    strategy = next((s for s in STRATEGIES if s not in tried), "stop")
+    return {
+        "strategy": strategy,
+        "cycle": key in history and history[-1] != key,
+        "previous": [attempt["recommendation"] for attempt in attempts],
+    }
+
+
+def record_attempt(memo: dict, module: str, key: str, strategy: str, recommendation: str = "") -> dict:
+    """Returns a copy of `memo` with this lap's failure set and attempt recorded."""
+    memo = {name: {"history": list(entry["history"]),
+                   "attempts": {k: list(v) for k, v in entry["attempts"].items()}}
+            for name, entry in memo.items()}
+    entry = memo.setdefault(module, {"history": [], "attempts": {}})
+    entry["history"].append(key)
+    if strategy != "stop":
+        entry["attempts"].setdefault(key, []).append({"strategy": strategy, "recommendation": recommendation})
+    return memo
+
+
+def previous_attempts_note(previous: list) -> str:
+    """Prompt section telling the analyzer which recommendations did not fix this exact set of failures."""
+    tried = "\n\n".join(f"Attempt {i}:\n{text.strip()}" for i, text in enumerate(previous, 1))
+    return (
+        "\n\n--- PREVIOUS ATTEMPTS (did NOT fix these exact failures) ---\n"
+        f"{tried}\n\n"
+        "Do not repeat these. Propose a different fix; if they changed the code, consider whether the tests "
+        "are wrong instead (and vice versa)."
+    )
@@ -2,6 +2,8 @@ from typing import Dict, Any, List
 import os
 import json
 
+from utils.tracing import span
+
 
 def _to_text(content: Any) -> str:
     if isinstance(content, str):
@@ -22,17 +24,21 @@ def _to_text(content: Any) -> str:
 def write_files(files: List[Dict[str, Any]]) -> Dict[str, Any]:
     """Write a list of files to disk. Each item: {"path": str, "content": str}."""
     written = []
-    for f in files:
-        path = f.get("path")
-        content = _to_text(f.get("content", ""))
-        if not path:
-            continue
-        directory = os.path.dirname(path)
-        if directory and not os.path.exists(directory):
-            os.makedirs(directory, exist_ok=True)
-        with open(path, "w", encoding="utf-8") as fh:
-            fh.write(content)
-        written.append(path)
+    with span("files.write") as write_span:
+        size = 0
+        for f in files:
+            path = f.get("path")
+            content = _to_text(f.get("content", ""))
+            if not path:
+                continue
+            directory = os.path.dirname(path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as fh:
+                fh.write(content)
+            written.append(path)
+            size += len(content)
+        write_span.set(files=len(written), chars=size, paths=",".join(written))
     return {"written": written}
 
 
@@ -5,6 +5,7 @@ from requests.auth import HTTPBasicAuth
 from typing import Dict, Any, List, Optional
 
 from config.settings import Settings
+from utils.tracing import span
 
 logger = logging.getLogger(__name__)
 
@@ -25,7 +26,10 @@ class JiraClient:
         url = f"{self.base_url}{endpoint}"
         for attempt in range(max_retries):
             try:
-                return self.session.request(method, url, timeout=20, **kwargs)
+                with span("jira.request", method=method, endpoint=endpoint, attempt=attempt + 1) as request_span:
+                    response = self.session.request(method, url, timeout=20, **kwargs)
+                    request_span.set(status=response.status_code, bytes=len(response.content or b""))
+                return response
             except requests.exceptions.Timeout:
                 if attempt == max_retries - 1:
                     raise
@@ -49,8 +53,8 @@ class JiraClient:
             }
 
     def read_issue(self, issue_key: str) -> Dict[str, Any]:
-        """Fetch Jira issue fields needed for generation (summary, description, and issuetype)."""
-        params = {"fields": "summary,description,issuetype"}
+        """Fetch Jira issue fields needed for generation (summary, description, issuetype and updated)."""
+        params = {"fields": "summary,description,issuetype,updated"}
         try:
             response = self._request("GET", f"/rest/api/3/issue/{issue_key}", params=params)
             response.raise_for_status()
@@ -64,6 +68,7 @@ class JiraClient:
                 "summary": summary,
                 "description": description,
                 "issuetype": issuetype,
+                "updated": fields.get("updated") or "",
             }
         except requests.RequestException as e:
             details = e.response.text if e.response else str(e)
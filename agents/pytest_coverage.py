@@ -0,0 +1,171 @@
+# agents/pytest_coverage.py
+"""
+Pytest plugin recording which project functions each test executes.
+
+Enabled with `--function-coverage` (Settings.TEST_FUNCTION_COVERAGE) and loaded by
+both test engines. During each test's setup and call phases it records every
+function entered whose code lives under the run's rootdir (library code and the
+test harness itself are ignored), and attaches the sorted list to the report as
+the "functions" user property, e.g. ["modules/calc.py::add", "generated_tests/test_calc.py::test_add"].
+
+Only function entry is observed, never individual lines, so the overhead stays low:
+on Python 3.12+ it uses sys.monitoring PY_START events (each code object fires at
+most once per test), elsewhere a call-only sys.settrace hook with no local tracing.
+"""
+import os
+import sys
+import sysconfig
+import threading
+
+import pytest
+
+# The test harness (this plugin, pytest_limits, pytest_sharding, pytest_worker) is never reported
+_HARNESS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _library_roots() -> list:
+    paths = sysconfig.get_paths()
+    return [os.path.abspath(p) for p in {paths.get(k) for k in ("stdlib", "platstdlib", "purelib", "platlib")} if p]
+
+
+class FunctionTracer:
+    """Collects "relpath::qualname" keys for project functions entered while started."""
+
+    def __init__(self, rootdir: str):
+        self.rootdir = os.path.abspath(rootdir)
+        self.hits = set()
+        self._library_roots = _library_roots()
+        self._files = {}  # co_filename -> path relative to rootdir, or None when ignored
+        self._keys = {}  # code object -> key, or None when ignored
+        self._monitoring = getattr(sys, "monitoring", None)
+        self._tool_id = None
+        self._previous_trace = None
+        if self._monitoring is not None:
+            try:
+                self._monitoring.use_tool_id(self._monitoring.COVERAGE_ID, "function-coverage")
+                self._tool_id = self._monitoring.COVERAGE_ID
+                self._monitoring.register_callback(self._tool_id, self._monitoring.events.PY_START, self._on_start)
+            except ValueError:  # Tool id taken (e.g. coverage.py is running): use settrace instead
+                self._tool_id = None
+
+    def _relative(self, filename: str):
+        if filename not in self._files:
+            path = os.path.abspath(filename)
+            ignored = (
+                filename.startswith("<")  # <frozen os>, <string>, ...
+                or not path.startswith(self.rootdir + os.sep)
+                or any(path.startswith(root + os.sep) for root in self._library_roots)
+                or (os.path.dirname(path) == _HARNESS_DIR and os.path.basename(path).startswith("pytest_"))
+            )
+            self._files[filename] = None if ignored else os.path.relpath(path, self.rootdir).replace(os.sep, "/")
+        return self._files[filename]
+
+    def _key(self, code):
+        if code not in self._keys:
+            key = None
+            name = getattr(code, "co_qualname", code.co_name)
+            if not code.co_name.startswith("<"):
+                relative = self._relative(code.co_filename)
+                if relative:
+                    # Nested functions are reported as their enclosing top-level function or method
+                    key = f"{relative}::{name.split('.<locals>', 1)[0]}"
+            self._keys[code] = key
+        return self._keys[code]
+
+    def _on_start(self, code, offset):
+        key = self._key(code)
+        if key:
+            self.hits.add(key)
+        return self._monitoring.DISABLE
+
+    def _trace(self, frame, event, arg):
+        if event == "call":
+            key = self._key(frame.f_code)
+            if key:
+                self.hits.add(key)
+        return None
+
+    def start(self):
+        if self._tool_id is not None:
+            # Re-arm locations disabled after their first hit in the previous test
+            self._monitoring.restart_events()
+            self._monitoring.set_events(self._tool_id, self._monitoring.events.PY_START)
+        else:
+            self._previous_trace = sys.gettrace()
+            sys.settrace(self._trace)
+            threading.settrace(self._trace)
+
+    def stop(self):
+        if self._tool_id is not None:
+            self._monitoring.set_events(self._tool_id, 0)
+        else:
+            sys.settrace(self._previous_trace)
+            threading.settrace(None)
+
+    def close(self):
+        if self._tool_id is not None:
+            self._monitoring.register_callback(self._tool_id, self._monitoring.events.PY_START, None)
+            self._monitoring.free_tool_id(self._tool_id)
+            self._tool_id = None
+
+
+_tracer = None
+
+
+def pytest_addoption(parser):
+    parser.addoption("--function-coverage", action="store_true", default=False,
+                     help="Record the project functions each test executes (report user property 'functions')")
+
+
+def pytest_configure(config):
+    global _tracer
+    if config.getoption("function_coverage"):
+        _tracer = FunctionTracer(str(config.rootpath))
+
+
+def pytest_unconfigure(config):
+    global _tracer
+    if _tracer is not None:
+        _tracer.close()
+        _tracer = None
+
+
+def _traced(item):
+    if _tracer is None:
+        return None
+    if not hasattr(item, "_function_hits"):
+        item._function_hits = set()
+    _tracer.hits = item._function_hits
+    _tracer.start()
+    return _tracer
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_setup(item):
+    tracer = _traced(item)
+    try:
+        yield
+    finally:
+        if tracer:
+            tracer.stop()
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    tracer = _traced(item)
+    try:
+        yield
+    finally:
+        if tracer:
+            tracer.stop()
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    outcome = yield
+    if _tracer is None or call.when == "teardown":
+        return
+    report = outcome.get_result()
+    functions = sorted(getattr(item, "_function_hits", ()))
+    for properties in {id(p): p for p in (item.user_properties, report.user_properties)}.values():
+        properties[:] = [(k, v) for k, v in properties if k != "functions"] + [("functions", functions)]
@@ -0,0 +1,192 @@
+# agents/pytest_limits.py
+"""
+Pytest plugin and helpers that keep generated code from stalling a run.
+
+Loaded by both test engines (in-process via `plugins=`, subprocess via `-p`).
+It arms a wall-clock alarm around each test's setup and call phases
+(`--test-timeout`), and tags failures caused by timeouts, memory exhaustion or
+CPU limits so they reach fix_analyzer as structured failures rather than a
+hung graph. `apply_resource_limits` caps the test process with RLIMIT_AS and
+RLIMIT_CPU on POSIX systems; `limited_pytest_command` starts a fresh pytest
+process under the same limits.
+"""
+import contextlib
+import os
+import signal
+import sys
+import threading
+
+import pytest
+
+try:
+    import resource
+except ImportError:  # Windows: no rlimits, timeouts still apply in the parent
+    resource = None
+
+# failure_reason values attached to test reports
+REASON_TIMEOUT = "timeout"
+REASON_MEMORY = "memory"
+REASON_CPU = "cpu_limit"
+REASON_SUITE_TIMEOUT = "suite_timeout"
+REASON_CRASH = "crash"
+
+
+class PerTestTimeout(Exception):
+    """Raised inside a test that ran longer than --test-timeout seconds."""
+
+
+class CpuLimitExceeded(Exception):
+    """Raised when the test process passes its RLIMIT_CPU soft limit."""
+
+
+def failure_reason(exc_or_text) -> str | None:
+    """Classifies an exception (or its rendered traceback) as timeout, memory or CPU limit."""
+    if isinstance(exc_or_text, BaseException):
+        if isinstance(exc_or_text, PerTestTimeout):
+            return REASON_TIMEOUT
+        if isinstance(exc_or_text, MemoryError):
+            return REASON_MEMORY
+        if isinstance(exc_or_text, CpuLimitExceeded):
+            return REASON_CPU
+        return None
+    text = str(exc_or_text or "")
+    for marker, reason in (("PerTestTimeout", REASON_TIMEOUT), ("MemoryError", REASON_MEMORY),
+                           ("CpuLimitExceeded", REASON_CPU)):
+        if marker in text:
+            return reason
+    return None
+
+
+def _can_use_alarm() -> bool:
+    return hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+
+
+@contextlib.contextmanager
+def _alarm(seconds: float, label: str):
+    if not seconds or not _can_use_alarm():
+        yield
+        return
+
+    def _on_alarm(signum, frame):
+        raise PerTestTimeout(f"{label} exceeded the per-test timeout of {seconds:g}s")
+
+    previous = signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def pytest_addoption(parser):
+    parser.addoption("--test-timeout", type=float, default=0.0,
+                     help="Fail any single test whose setup or call takes longer than this many seconds")
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_setup(item):
+    with _alarm(item.config.getoption("test_timeout"), item.nodeid):
+        yield
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    with _alarm(item.config.getoption("test_timeout"), item.nodeid):
+        yield
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    outcome = yield
+    report = outcome.get_result()
+    if call.excinfo is not None:
+        reason = failure_reason(call.excinfo.value)
+        if reason:
+            report.user_properties.append(("failure_reason", reason))
+
+
+def _current_vm_bytes() -> int:
+    """Virtual memory already mapped by this process (Linux); 0 where unknown."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def apply_resource_limits(memory_mb: int = 0, cpu_seconds: int = 0):
+    """
+    Caps this process's address space and CPU time for the next test run.
+
+    Limits are relative to current usage, so a long-lived worker that already
+    imported pytest and friends gets `memory_mb` of headroom and `cpu_seconds`
+    of CPU for this run. Only soft limits are changed.
+
+    Returns:
+        Callable that restores the previous soft limits.
+    """
+    if resource is None:
+        return lambda: None
+
+    saved = []
+
+    def _set(kind, soft):
+        old_soft, hard = resource.getrlimit(kind)
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+        try:
+            resource.setrlimit(kind, (soft, hard))
+            saved.append((kind, old_soft, hard))
+        except (ValueError, OSError):
+            pass
+
+    if memory_mb:
+        _set(resource.RLIMIT_AS, _current_vm_bytes() + memory_mb * 1024 * 1024)
+    if cpu_seconds:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        _set(resource.RLIMIT_CPU, int(usage.ru_utime + usage.ru_stime) + cpu_seconds)
+
+        def _on_xcpu(signum, frame):
+            raise CpuLimitExceeded(f"Test process exceeded its CPU limit of {cpu_seconds}s")
+
+        if _can_use_alarm() and hasattr(signal, "SIGXCPU"):
+            previous_handler = signal.signal(signal.SIGXCPU, _on_xcpu)
+            saved.append(("handler", previous_handler, None))
+
+    def restore():
+        for kind, old_soft, hard in reversed(saved):
+            if kind == "handler":
+                signal.signal(signal.SIGXCPU, old_soft)
+                continue
+            with contextlib.suppress(ValueError, OSError):
+                resource.setrlimit(kind, (old_soft, hard))
+
+    return restore
+
+
+# Run by the subprocess engine instead of `python -m pytest`: applies the limits in the child itself,
+# since a preexec_fn can deadlock a child forked while other threads run
+_BOOTSTRAP = "import sys; from agents.pytest_limits import run_limited; sys.exit(run_limited(sys.argv[1:]))"
+
+
+def limited_pytest_command(pytest_args: list, memory_mb: int = 0, cpu_seconds: int = 0) -> list:
+    """
+    The command line running pytest with `pytest_args` in a fresh process capped at absolute limits.
+
+    The child must be able to import `agents` (the repo root on its PYTHONPATH).
+    """
+    if resource is None or not (memory_mb or cpu_seconds):
+        return [sys.executable, "-m", "pytest", *pytest_args]
+    return [sys.executable, "-c", _BOOTSTRAP, str(memory_mb), str(cpu_seconds), *pytest_args]
+
+
+def run_limited(argv: list) -> int:
+    """Entry point of the bootstrap: `argv` is [memory_mb, cpu_seconds, *pytest args]."""
+    memory_mb, cpu_seconds, *pytest_args = argv
+    memory_mb, cpu_seconds = int(memory_mb), int(cpu_seconds)
+    if memory_mb:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_mb * 1024 * 1024, resource.RLIM_INFINITY))
+    if cpu_seconds:
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, resource.RLIM_INFINITY))
+    return int(pytest.main(pytest_args))
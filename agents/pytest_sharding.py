@@ -0,0 +1,43 @@
+# agents/pytest_sharding.py
+"""
+Pytest plugin that restricts a run to one shard of a suite.
+
+Loaded by both test engines alongside agents.pytest_limits. Every shard
+collects the whole file and then deselects the tests assigned to other
+shards, so no separate collection pass or long node-id argument lists are
+needed. The assignment comes from a JSON plan written by
+tester_agent.run_pytest_sharded: {"shards": N, "assignments": {nodeid: index}}.
+Tests missing from the plan (added since durations were last recorded) are
+placed by a stable hash of their node id.
+"""
+import json
+import zlib
+
+
+def shard_for(nodeid: str, shards: int, assignments: dict) -> int:
+    """The shard a test belongs to under a plan."""
+    if nodeid in assignments:
+        return assignments[nodeid]
+    return zlib.crc32(nodeid.encode()) % shards
+
+
+def pytest_addoption(parser):
+    parser.addoption("--shard-plan", default="", help="JSON file assigning test node ids to shards")
+    parser.addoption("--shard-index", type=int, default=0, help="Which shard of --shard-plan to run")
+
+
+def pytest_collection_modifyitems(config, items):
+    plan_path = config.getoption("shard_plan")
+    if not plan_path:
+        return
+    with open(plan_path, "r", encoding="utf-8") as fh:
+        plan = json.load(fh)
+    shards, assignments = max(1, plan.get("shards", 1)), plan.get("assignments", {})
+    index = config.getoption("shard_index")
+
+    selected, deselected = [], []
+    for item in items:
+        (selected if shard_for(item.nodeid, shards, assignments) == index else deselected).append(item)
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
@@ -0,0 +1,387 @@
+# agents/pytest_worker.py
+"""
+In-process pytest execution engine.
+
+Tests run through `pytest.main` inside a long-lived worker process instead of a
+fresh `python -m pytest` per call, so interpreter startup, plugin loading and
+pytest's own imports are paid once. A collector plugin returns per-test
+outcomes directly (no `.report.json` round trip), and modules imported from
+the project are purged from `sys.modules` after every run so the next run
+sees freshly written code.
+
+Workers are forked from a forkserver that has already imported pytest and the
+common dependencies of generated code (Settings.TEST_WORKER_PRELOAD), so a new
+worker costs a fork rather than a cold interpreter. The pool is pre-forked at
+creation and each worker is recycled after Settings.TEST_WORKER_MAX_RUNS runs
+to bound memory growth.
+
+Runs are bounded: each test gets a wall-clock timeout, the worker's address
+space and CPU time are capped per job, and the parent kills a worker whose
+whole suite overruns. Those outcomes come back as structured failures tagged
+with a `reason` (see agents.pytest_limits) instead of stalling the graph.
+"""
+import atexit
+import contextlib
+import io
+import logging
+import multiprocessing
+import os
+import queue
+import sys
+import sysconfig
+import signal
+import threading
+
+from config.settings import Settings
+from agents import pytest_limits, pytest_sharding, pytest_coverage
+
+logger = logging.getLogger(__name__)
+
+PYTEST_ARGS = ["-p", "no:cacheprovider", "-v"]
+
+
+class ResultCollector:
+    """Pytest plugin that records the outcome of every test as plain dicts."""
+
+    def __init__(self):
+        self.tests = {}
+        self.collected = 0
+        self.collection_errors = []
+        self.rootdir = ""
+
+    def pytest_configure(self, config):
+        self.rootdir = str(config.rootpath)
+
+    def pytest_collection_finish(self, session):
+        self.collected = len(session.items)
+
+    def pytest_collectreport(self, report):
+        if report.failed:
+            self.collection_errors.append({
+                "nodeid": report.nodeid,
+                "outcome": "error",
+                "when": "collect",
+                "duration": 0.0,
+                "longrepr": str(report.longrepr),
+            })
+
+    def pytest_runtest_logreport(self, report):
+        entry = self.tests.setdefault(report.nodeid, {
+            "nodeid": report.nodeid, "outcome": "passed", "when": "call", "duration": 0.0, "longrepr": "",
+        })
+        entry["duration"] += report.duration
+        properties = dict(report.user_properties)
+        if properties.get("failure_reason"):
+            entry["reason"] = properties["failure_reason"]
+        if "functions" in properties:
+            entry["functions"] = properties["functions"]
+        if report.when == "call":
+            entry["outcome"] = report.outcome
+            entry["when"] = "call"
+            if report.failed:
+                entry["longrepr"] = str(report.longrepr)
+        elif report.failed:
+            # Setup/teardown failures are errors regardless of the call outcome
+            entry["outcome"] = "error"
+            entry["when"] = report.when
+            entry["longrepr"] = str(report.longrepr)
+        elif report.skipped and report.when == "setup":
+            entry["outcome"] = "skipped"
+            entry["when"] = "setup"
+
+    def results(self) -> dict:
+        tests = list(self.tests.values()) + self.collection_errors
+        passed = sum(1 for t in tests if t["outcome"] == "passed")
+        failed = sum(1 for t in tests if t["outcome"] == "failed")
+        errors = sum(1 for t in tests if t["outcome"] == "error")
+        return {
+            "passed": passed,
+            "failed": failed + errors,
+            "errors": errors,
+            "collected": self.collected,
+            "tests": tests,
+            "rootdir": self.rootdir,
+        }
+
+
+def _library_roots() -> list:
+    """Directories holding the stdlib and installed packages (never purged)."""
+    paths = sysconfig.get_paths()
+    roots = {paths.get(k) for k in ("stdlib", "platstdlib", "purelib", "platlib")}
+    return [os.path.abspath(r) for r in roots if r]
+
+
+def _is_under(path: str, roots: list) -> bool:
+    path = os.path.abspath(path)
+    return any(path == r or path.startswith(r + os.sep) for r in roots)
+
+
+def _purge_project_modules(baseline: set, project_roots: list):
+    """Drops modules imported from the project since `baseline` so the next run re-imports them."""
+    library_roots = _library_roots()
+    for name in list(sys.modules):
+        if name in baseline:
+            continue
+        module = sys.modules.get(name)
+        locations = []
+        if getattr(module, "__file__", None):
+            locations.append(module.__file__)
+        locations.extend(getattr(module, "__path__", None) or [])
+        if any(_is_under(loc, project_roots) and not _is_under(loc, library_roots) for loc in locations):
+            del sys.modules[name]
+
+
+def failed_run(test_path: str, reason: str, message: str) -> dict:
+    """A run result describing a suite that could not finish (timeout, crash, resource limit)."""
+    return {
+        "passed": 0, "failed": 1, "errors": 1, "collected": 0, "output": message, "engine_error": True,
+        "tests": [{"nodeid": test_path, "outcome": "error", "when": "call", "duration": 0.0,
+                   "longrepr": message, "reason": reason}],
+    }
+
+
+def execute(test_path: str, extra_paths: list | None = None, cwd: str | None = None,
+            args: list | None = None, baseline: set | None = None, node_ids: list | None = None,
+            test_timeout: float = 0) -> dict:
+    """
+    Runs pytest on `test_path` inside the current process.
+
+    Args:
+        test_path (str): Test file (or node ids' file) to run.
+        extra_paths (list, optional): Directories prepended to sys.path for the run.
+        cwd (str, optional): Directory to run from. Defaults to the current directory.
+        args (list, optional): Extra pytest arguments.
+        baseline (set, optional): Module names to keep when purging after the run.
+        node_ids (list, optional): Run only these test ids instead of the whole file.
+        test_timeout (float): Per-test wall-clock limit in seconds (0 disables).
+
+    Returns:
+        dict: passed, failed, errors, collected, tests (per-test outcomes) and output.
+    """
+    import pytest
+
+    cwd = os.path.abspath(cwd or os.getcwd())
+    extra_paths = [os.path.abspath(p) for p in (extra_paths or [])]
+    baseline = set(sys.modules) if baseline is None else baseline
+    original_path = sys.path[:]
+    original_cwd = os.getcwd()
+    collector = ResultCollector()
+    buffer = io.StringIO()
+
+    # Project directories go first even if already present further down, so generated
+    # packages (e.g. modules/) shadow same-named packages elsewhere on the path
+    project_paths = list(dict.fromkeys([cwd, *extra_paths]))
+    sys.path[:] = project_paths + [p for p in sys.path if os.path.abspath(p or ".") not in project_paths]
+    try:
+        os.chdir(cwd)
+        with contextlib.redirect_stdout(buffer), contextlib.redirect_stderr(buffer):
+            exit_code = pytest.main(
+                [*(node_ids or [test_path]), *PYTEST_ARGS, f"--test-timeout={test_timeout or 0}", *(args or [])],
+                plugins=[collector, pytest_limits, pytest_sharding, pytest_coverage],
+            )
+    finally:
+        os.chdir(original_cwd)
+        sys.path[:] = original_path
+        _purge_project_modules(baseline, [cwd, *extra_paths])
+
+    result = collector.results()
+    result["output"] = buffer.getvalue()
+    result["exit_code"] = int(exit_code)
+    return result
+
+
+def _worker_main(conn):
+    """Worker loop: import pytest once, then execute jobs until told to stop."""
+    import pytest  # noqa: F401 - warm the import before the first job
+
+    baseline = set(sys.modules)
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        restore_limits = pytest_limits.apply_resource_limits(job.pop("memory_mb", 0), job.pop("cpu_seconds", 0))
+        try:
+            result = execute(baseline=baseline, **job)
+        except (MemoryError, pytest_limits.CpuLimitExceeded) as e:
+            result = failed_run(job["test_path"], pytest_limits.failure_reason(e), f"Test run hit a resource limit: {e!r}")
+        except Exception as e:  # Report engine failures as a failed run rather than killing the worker
+            result = failed_run(job["test_path"], pytest_limits.REASON_CRASH, f"Test engine error: {e!r}")
+        finally:
+            restore_limits()
+        conn.send(result)
+    conn.close()
+
+
+def worker_context():
+    """
+    Multiprocessing context for test workers.
+
+    Uses a forkserver preloaded with this module, pytest and Settings.TEST_WORKER_PRELOAD
+    where available (POSIX); modules that fail to import are skipped by the forkserver.
+    Falls back to the platform default elsewhere.
+    """
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context()
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload([__name__, "pytest", *Settings.TEST_WORKER_PRELOAD])
+    return context
+
+
+def describe_exit(exitcode, test_path: str) -> tuple:
+    """Maps a dead worker's exit code to a (reason, message) pair."""
+    if hasattr(signal, "SIGKILL") and exitcode == -signal.SIGKILL:
+        return pytest_limits.REASON_MEMORY, f"Test process for {test_path} was killed (likely out of memory)"
+    if hasattr(signal, "SIGXCPU") and exitcode == -signal.SIGXCPU:
+        return pytest_limits.REASON_CPU, f"Test process for {test_path} exceeded its CPU time limit"
+    return pytest_limits.REASON_CRASH, f"Test worker exited unexpectedly (code {exitcode}) while running {test_path}"
+
+
+class PytestWorker:
+    """A reusable child process that runs pytest jobs sent over a pipe."""
+
+    def __init__(self, context=None, max_runs: int = 0):
+        self._context = context or multiprocessing.get_context()
+        self._process = None
+        self._conn = None
+        self.runs = 0
+        # Restart the process after this many runs (0 = never)
+        self.max_runs = max_runs
+
+    def start(self):
+        """Forks the worker process ahead of its first job."""
+        if not self.is_alive():
+            self._start()
+
+    def _start(self):
+        parent_conn, child_conn = self._context.Pipe()
+        self._process = self._context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self._process.start()
+        child_conn.close()
+        self._conn = parent_conn
+        self.runs = 0
+
+    def is_alive(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    def run(self, timeout: float | None = None, **job) -> dict:
+        """
+        Sends one job to the worker (starting or recycling it if needed) and waits for the result.
+
+        Args:
+            timeout (float, optional): Wall-clock budget for the whole suite; the worker is killed
+                and a "suite_timeout" failure returned when it is exceeded.
+            **job: Arguments for `execute` plus optional memory_mb / cpu_seconds limits.
+        """
+        test_path = job["test_path"]
+        if self.max_runs and self.runs >= self.max_runs:
+            logger.debug(f"Recycling test worker after {self.runs} runs")
+            self.stop()
+        if not self.is_alive():
+            self._start()
+        self._conn.send(job)
+        if timeout and not self._conn.poll(timeout):
+            self.kill()
+            return failed_run(test_path, pytest_limits.REASON_SUITE_TIMEOUT,
+                              f"Test suite {test_path} exceeded the suite timeout of {timeout:g}s and was killed")
+        try:
+            result = self._conn.recv()
+        except EOFError:
+            exitcode = self._process.exitcode if self._process is not None else None
+            self.kill()
+            return failed_run(test_path, *describe_exit(exitcode, test_path))
+        self.runs += 1
+        return result
+
+    def kill(self):
+        """Terminates the worker immediately (used when a job overruns or crashes)."""
+        if self._process is not None and self._process.is_alive():
+            self._process.kill()
+        self.stop()
+
+    def stop(self):
+        if self._conn is not None:
+            with contextlib.suppress(OSError, BrokenPipeError):
+                self._conn.send(None)
+            self._conn.close()
+        if self._process is not None:
+            self._process.join(timeout=5)
+            if self._process.is_alive():
+                self._process.kill()
+        self._process = None
+        self._conn = None
+
+
+class WorkerPool:
+    """A fixed-size set of pre-forked PytestWorkers; each job borrows an idle worker."""
+
+    def __init__(self, size: int, context=None, max_runs: int = 0, prefork: bool = True):
+        self.size = max(1, size)
+        self._idle = queue.Queue()
+        for _ in range(self.size):
+            worker = PytestWorker(context, max_runs=max_runs)
+            if prefork:
+                worker.start()
+            self._idle.put(worker)
+
+    def run(self, timeout: float | None = None, **job) -> dict:
+        worker = self._idle.get()
+        try:
+            return worker.run(timeout=timeout, **job)
+        finally:
+            self._idle.put(worker)
+
+    def stop(self):
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            worker.stop()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> WorkerPool:
+    """Returns the shared worker pool, sized by Settings.TEST_WORKERS (defaults to the CPU count)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = WorkerPool(
+                Settings.TEST_WORKERS or os.cpu_count() or 1,
+                context=worker_context(),
+                max_runs=Settings.TEST_WORKER_MAX_RUNS,
+            )
+        return _pool
+
+
+def run_in_worker(test_path: str, extra_paths: list | None = None, cwd: str | None = None,
+                  args: list | None = None, node_ids: list | None = None) -> dict:
+    """
+    Runs a pytest job on an idle worker from the shared pool. Safe to call from several threads.
+
+    The run is bounded by Settings.TEST_TIMEOUT per test, Settings.TEST_SUITE_TIMEOUT for the
+    whole job, and Settings.TEST_MEMORY_LIMIT_MB / TEST_CPU_LIMIT for the worker process.
+    """
+    return get_pool().run(
+        timeout=Settings.TEST_SUITE_TIMEOUT,
+        test_path=test_path, extra_paths=extra_paths, cwd=cwd or os.getcwd(), args=args, node_ids=node_ids,
+        test_timeout=Settings.TEST_TIMEOUT, memory_mb=Settings.TEST_MEMORY_LIMIT_MB,
+        cpu_seconds=Settings.TEST_CPU_LIMIT,
+    )
+
+
+def shutdown():
+    """Stops all pooled worker processes."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.stop()
+            _pool = None
+
+
+atexit.register(shutdown)
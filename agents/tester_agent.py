@@ -3,65 +3,467 @@ import subprocess
 import json
 import sys
 import os
+import tempfile
+import threading
+import hashlib
+import logging
+import heapq
+import statistics
+from concurrent.futures import ThreadPoolExecutor
 
-def run_pytest(test_path: str, extra_paths: list | None = None) -> dict:
+from config.settings import Settings
+from agents import pytest_worker, pytest_limits, failure_records
+from utils import symbol_index
+from utils.file_utils import update_json_file
+from utils.tracing import span
+
+logger = logging.getLogger(__name__)
+
+
+# Results of previous runs keyed by suite_fingerprint(); a suite whose inputs are unchanged is not rerun
+_result_cache = {}
+# Node ids that failed in the last run of each test file, rerun first on the next lap
+_last_failed = {}
+_cache_lock = threading.Lock()
+# Smoothed per-test durations, {suite path: {nodeid: seconds}}, persisted to Settings.TEST_DURATIONS_PATH
+_durations = None
+_durations_lock = threading.Lock()
+# Weight of the newest measurement in the smoothed duration
+DURATION_SMOOTHING = 0.5
+
+
+def _resolve_module(dotted: str, roots: list) -> list:
+    """Maps a dotted module name to the local files that define it (package __init__ files included)."""
+    files = []
+    for root in roots:
+        base = os.path.join(root, *dotted.split("."))
+        parts = dotted.split(".")
+        for i in range(1, len(parts)):
+            init = os.path.join(root, *parts[:i], "__init__.py")
+            if os.path.isfile(init):
+                files.append(init)
+        for candidate in (base + ".py", os.path.join(base, "__init__.py")):
+            if os.path.isfile(candidate):
+                files.append(candidate)
+                return files
+    return files
+
+
+def _local_imports(path: str, roots: list) -> list:
+    """Local files imported by the Python file at `path`."""
+    index = symbol_index.index_module(path)
+    package_dir = os.path.dirname(path)
+    files = []
+    for entry in index["imports"]:
+        if entry["kind"] == "import":
+            files.extend(_resolve_module(entry["module"], roots))
+            continue
+        search_roots = roots
+        if entry["level"]:
+            # Relative import: resolve against the importing file's package
+            base = package_dir
+            for _ in range(entry["level"] - 1):
+                base = os.path.dirname(base)
+            search_roots = [base]
+        if entry["module"]:
+            files.extend(_resolve_module(entry["module"], search_roots))
+        for name, _alias in entry["names"]:
+            # `from pkg import submodule` imports a module, not just a name
+            dotted = f"{entry['module']}.{name}" if entry["module"] else name
+            files.extend(_resolve_module(dotted, search_roots))
+    return files
+
+
+def suite_fingerprint(test_path: str, extra_paths: list | None = None, engine: str = "") -> str:
+    """
+    Hashes everything a test run depends on: the test file, the conftest.py files above it,
+    every local module it imports (transitively), the Python version and the engine.
+    """
+    test_path = os.path.abspath(test_path)
+    cwd = os.getcwd()
+    roots = [os.path.dirname(test_path), cwd, *[os.path.abspath(p) for p in (extra_paths or [])]]
+
+    pending = [test_path]
+    directory = os.path.dirname(test_path)
+    while directory.startswith(cwd):
+        pending.append(os.path.join(directory, "conftest.py"))
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            break
+        directory = parent
+
+    seen = set()
+    while pending:
+        path = os.path.abspath(pending.pop())
+        if path in seen or not os.path.isfile(path):
+            continue
+        seen.add(path)
+        pending.extend(_local_imports(path, roots))
+
+    digest = hashlib.sha256(f"{sys.version}|{engine}".encode())
+    for path in sorted(seen):
+        digest.update(path.encode())
+        with open(path, "rb") as fh:
+            digest.update(hashlib.sha256(fh.read()).digest())
+    return digest.hexdigest()
+
+
+def clear_result_cache():
+    """Forgets all memoized test results and remembered failures."""
+    with _cache_lock:
+        _result_cache.clear()
+        _last_failed.clear()
+
+
+def run_pytest(test_path: str, extra_paths: list | None = None, engine: str | None = None,
+               use_cache: bool | None = None, failing_first: bool | None = None) -> dict:
     """
     Runs pytest on a given test file, with the ability to add temporary paths to sys.path.
 
     Args:
         test_path (str): The path to the test file to run.
         extra_paths (list, optional): A list of extra directories to add to the Python path. Defaults to None.
+        engine (str, optional): "inprocess" runs pytest.main in a reusable worker process,
+            "subprocess" launches `python -m pytest`. Defaults to Settings.PYTEST_ENGINE.
+        use_cache (bool, optional): Reuse the previous result when the test file and every module it
+            imports are unchanged. Defaults to Settings.TEST_RESULT_CACHE.
+        failing_first (bool, optional): If the previous run of this file had failures, rerun only those
+            tests first and return early while any still fail; the full suite runs once they pass.
+            Defaults to Settings.TEST_FAILING_FIRST.
 
     Returns:
-        dict: A dictionary containing the test results (passed, failed, collected, output).
+        dict: A dictionary containing the test results (passed, failed, collected, output)
+            and per-test outcomes under "tests", plus one compact record per failing test under
+            "failures" (see agents.failure_records). Memoized results carry "cached": True and
+            failing-only reruns carry "partial": True.
     """
     if not os.path.exists(test_path):
-        return {"passed": 0, "failed": 1, "collected": 0, "output": f"Test file not found: {test_path}"}
-
-    # This is the critical logic from the old workflow.
-    # It temporarily adds directories to the path so that tests can find the generated modules.
-    original_path = sys.path[:]
-    if extra_paths:
-        for path in extra_paths:
-            if path not in sys.path:
-                sys.path.insert(0, path)
-    
+        return {"passed": 0, "failed": 1, "collected": 0, "output": f"Test file not found: {test_path}",
+                "failures": [{"nodeid": test_path, "outcome": "error", "when": "collect",
+                              "message": f"Test file not found: {test_path}"}]}
+
+    engine = engine or Settings.PYTEST_ENGINE
+    use_cache = Settings.TEST_RESULT_CACHE if use_cache is None else use_cache
+    failing_first = Settings.TEST_FAILING_FIRST if failing_first is None else failing_first
+    # Results recorded with and without function coverage differ in content, so they are cached apart
+    coverage_tag = "+coverage" if Settings.TEST_FUNCTION_COVERAGE else ""
+    key = suite_fingerprint(test_path, extra_paths, engine + coverage_tag) if use_cache else None
+    if key:
+        with _cache_lock:
+            cached = _result_cache.get(key)
+        if cached is not None:
+            logger.info(f"Reusing cached result for {test_path} (inputs unchanged)")
+            return {**cached, "cached": True}
+
+    suite_id = os.path.abspath(test_path)
+    with _cache_lock:
+        previous_failures = _last_failed.get(suite_id, []) if failing_first else []
+
+    res = None
+    if previous_failures:
+        res = _execute(test_path, extra_paths, engine, node_ids=previous_failures)
+        if res.get("failed", 0) > 0 or res.get("engine_error"):
+            res["partial"] = True
+            logger.info(f"{test_path}: {res.get('failed', 0)}/{len(previous_failures)} previously failing "
+                        f"tests still fail; skipping the full suite")
+        else:
+            res = None
+    if res is None:
+        res = _run_full(test_path, extra_paths, engine)
+    res["failures"] = failure_records.build_records(res)
+    record_durations(suite_id, res)
+
+    with _cache_lock:
+        _last_failed[suite_id] = _failing_node_ids(res)
+        if key and not res.get("engine_error"):
+            _result_cache[key] = res
+    return res
+
+
+def _execute(test_path: str, extra_paths: list | None, engine: str, node_ids: list | None = None,
+             args: list | None = None) -> dict:
+    if Settings.TEST_FUNCTION_COVERAGE:
+        args = [*(args or []), "--function-coverage"]
+    with span("pytest", engine=engine, test_path=test_path, selected=len(node_ids) if node_ids else None) as run_span:
+        if engine == "inprocess":
+            # Run from project root so pytest can find modules/ directory
+            res = pytest_worker.run_in_worker(test_path, extra_paths=extra_paths, cwd=os.getcwd(), node_ids=node_ids,
+                                              args=args)
+        else:
+            res = _run_pytest_subprocess(test_path, extra_paths, node_ids=node_ids, args=args)
+        run_span.set(collected=res.get("collected"), passed=res.get("passed"), failed=res.get("failed"),
+                     reason=res.get("reason"))
+    return res
+
+
+def _run_full(test_path: str, extra_paths: list | None, engine: str) -> dict:
+    """Runs the whole suite, sharded when it is known to hold at least Settings.TEST_SHARD_MIN_TESTS tests."""
+    shards = _shard_count()
+    known_tests = len(_load_durations().get(os.path.abspath(test_path), {}))
+    if shards > 1 and Settings.TEST_SHARD_MIN_TESTS and known_tests >= Settings.TEST_SHARD_MIN_TESTS:
+        return run_pytest_sharded(test_path, extra_paths, shards=shards, engine=engine)
+    return _execute(test_path, extra_paths, engine)
+
+
+def _shard_count() -> int:
+    return Settings.TEST_SHARDS or Settings.TEST_WORKERS or os.cpu_count() or 1
+
+
+def _load_durations() -> dict:
+    global _durations
+    with _durations_lock:
+        if _durations is None:
+            try:
+                with open(Settings.TEST_DURATIONS_PATH, "r", encoding="utf-8") as fh:
+                    _durations = json.load(fh)
+            except FileNotFoundError:
+                _durations = {}
+            except json.JSONDecodeError as e:
+                logger.warning(f"Ignoring unreadable test durations {Settings.TEST_DURATIONS_PATH}: {e}")
+                _durations = {}
+        return _durations
+
+
+def record_durations(suite_id: str, res: dict):
+    """Folds the per-test durations of a finished run into the persisted history used for sharding."""
+    global _durations
+    timings = {t["nodeid"]: t.get("duration", 0.0) for t in res.get("tests", []) if t.get("when") != "collect"}
+    if not timings or res.get("engine_error"):
+        return
+
+    def fold(history):
+        suite = history.setdefault(suite_id, {})
+        for nodeid, duration in timings.items():
+            previous = suite.get(nodeid)
+            suite[nodeid] = duration if previous is None else (
+                DURATION_SMOOTHING * duration + (1 - DURATION_SMOOTHING) * previous)
+
+    history = _load_durations()
+    with _durations_lock:
+        try:
+            # Folded into the file as it is now: shards and concurrent jobs record into the same history
+            _durations = update_json_file(Settings.TEST_DURATIONS_PATH, fold)
+        except OSError as e:
+            logger.warning(f"Could not persist test durations: {e}")
+            fold(history)
+
+
+def plan_shards(node_ids: list, durations: dict, shards: int) -> list:
+    """
+    Splits test ids into at most `shards` groups with roughly equal total duration.
+
+    Longest tests are placed first, each on the currently lightest shard. Tests without
+    history count as the median known duration. Each shard keeps collection order.
+
+    Returns:
+        list: Non-empty lists of node ids.
+    """
+    known = [durations[n] for n in node_ids if n in durations]
+    default = statistics.median(known) if known else 1.0
+    order = {nodeid: i for i, nodeid in enumerate(node_ids)}
+    heap = [(0.0, i) for i in range(max(1, shards))]
+    buckets = [[] for _ in heap]
+    for nodeid in sorted(node_ids, key=lambda n: durations.get(n, default), reverse=True):
+        load, i = heapq.heappop(heap)
+        buckets[i].append(nodeid)
+        heapq.heappush(heap, (load + durations.get(nodeid, default), i))
+    return [sorted(bucket, key=order.get) for bucket in buckets if bucket]
+
+
+def merge_results(results: list) -> dict:
+    """Combines the results of several runs of one suite (e.g. its shards) into a single result."""
+    tests, seen_collect_errors, duplicates = [], set(), 0
+    for r in results:
+        for t in r.get("tests", []):
+            if t.get("when") == "collect":
+                # Every shard collects the whole file, so a collection error is reported once per shard
+                if t["nodeid"] in seen_collect_errors:
+                    duplicates += 1
+                    continue
+                seen_collect_errors.add(t["nodeid"])
+            tests.append(t)
+    merged = {
+        "passed": sum(r.get("passed", 0) for r in results),
+        "failed": sum(r.get("failed", 0) for r in results) - duplicates,
+        "errors": sum(r.get("errors", 0) for r in results) - duplicates,
+        "collected": sum(r.get("collected") or 0 for r in results),
+        "tests": tests,
+        "output": "\n".join(r.get("output", "") for r in results),
+        "rootdir": next((r["rootdir"] for r in results if r.get("rootdir")), ""),
+    }
+    if any(r.get("engine_error") for r in results):
+        merged["engine_error"] = True
+    return merged
+
+
+def run_pytest_sharded(test_path: str, extra_paths: list | None = None, shards: int | None = None,
+                       engine: str | None = None) -> dict:
+    """
+    Runs one suite as several concurrent pytest runs over disjoint subsets of its tests.
+
+    Tests with recorded durations are balanced across shards (see plan_shards); tests
+    without history are spread by a hash of their node id. Each shard collects the file
+    and keeps only its own tests (agents.pytest_sharding), and the shards run in parallel
+    on the worker pool (or as parallel subprocesses).
+
+    Args:
+        test_path (str): The test file to run.
+        extra_paths (list, optional): Extra directories for the Python path.
+        shards (int, optional): Number of shards. Defaults to Settings.TEST_SHARDS or the worker count.
+        engine (str, optional): "inprocess" or "subprocess". Defaults to Settings.PYTEST_ENGINE.
+
+    Returns:
+        dict: The merged result, in the same shape as a run_pytest result, with "shards" set.
+    """
+    engine = engine or Settings.PYTEST_ENGINE
+    shards = shards or _shard_count()
+    if shards <= 1:
+        return _execute(test_path, extra_paths, engine)
+
+    durations = _load_durations().get(os.path.abspath(test_path), {})
+    plan = plan_shards(list(durations), durations, shards)
+    assignments = {nodeid: index for index, shard in enumerate(plan) for nodeid in shard}
+    plan_fd, plan_path = tempfile.mkstemp(prefix="pytest_shards_", suffix=".json")
+    with os.fdopen(plan_fd, "w", encoding="utf-8") as fh:
+        json.dump({"shards": shards, "assignments": assignments}, fh)
+
+    logger.info(f"{test_path}: running in {shards} shards ({len(assignments)} tests placed by duration)")
+    try:
+        with ThreadPoolExecutor(max_workers=shards) as executor:
+            futures = [
+                executor.submit(_execute, test_path, extra_paths, engine,
+                                args=[f"--shard-plan={plan_path}", f"--shard-index={index}"])
+                for index in range(shards)
+            ]
+            results = [future.result() for future in futures]
+    finally:
+        os.remove(plan_path)
+    merged = merge_results(results)
+    merged["shards"] = shards
+    return merged
+
+
+def _failing_node_ids(res: dict) -> list:
+    """Absolute node ids of failed tests; collection errors are excluded since only a full run can clear them."""
+    rootdir = res.get("rootdir") or os.getcwd()
+    return [
+        os.path.join(rootdir, t["nodeid"])
+        for t in res.get("tests", [])
+        if t.get("outcome") in ("failed", "error") and t.get("when") != "collect"
+    ]
+
+
+def run_pytest_many(test_files: dict, extra_paths: list | None = None, max_workers: int | None = None) -> dict:
+    """
+    Runs several test files concurrently and returns their results keyed like `test_files`.
+
+    Args:
+        test_files (dict): {name: test_path}, e.g. one suite per generated module.
+        extra_paths (list, optional): Extra directories for every run's Python path.
+        max_workers (int, optional): Parallel runs. Defaults to Settings.TEST_WORKERS or the CPU count.
+
+    Returns:
+        dict: {name: run_pytest result}, in the same order as `test_files`.
+    """
+    if not test_files:
+        return {}
+    max_workers = max_workers or Settings.TEST_WORKERS or os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(test_files))) as executor:
+        futures = {name: executor.submit(run_pytest, path, extra_paths) for name, path in test_files.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+
+def _tests_from_json_report(report: dict) -> list:
+    """Converts a pytest-json-report document into the per-test entries the in-process engine returns."""
+    tests = []
+    for test in report.get("tests", []):
+        stages = {when: test.get(when) for when in ("setup", "call", "teardown") if isinstance(test.get(when), dict)}
+        failed_when = next((when for when, stage in stages.items() if stage.get("outcome") == "failed"), "call")
+        longrepr = stages.get(failed_when, {}).get("longrepr", "")
+        entry = {
+            "nodeid": test.get("nodeid", ""),
+            "outcome": test.get("outcome", ""),
+            "when": failed_when,
+            "duration": sum(stage.get("duration", 0.0) for stage in stages.values()),
+            "longrepr": longrepr,
+        }
+        reason = pytest_limits.failure_reason(longrepr) if entry["outcome"] in ("failed", "error") else None
+        if reason:
+            entry["reason"] = reason
+        properties = {k: v for prop in test.get("user_properties", []) for k, v in prop.items()}
+        if "functions" in properties:
+            entry["functions"] = properties["functions"]
+        tests.append(entry)
+    for collector in report.get("collectors", []):
+        if collector.get("outcome") == "failed":
+            tests.append({"nodeid": collector.get("nodeid", ""), "outcome": "error", "when": "collect",
+                          "duration": 0.0, "longrepr": collector.get("longrepr", "")})
+    return tests
+
+
+def _run_pytest_subprocess(test_path: str, extra_paths: list | None = None, node_ids: list | None = None,
+                           args: list | None = None) -> dict:
+    """Runs pytest in a fresh `python -m pytest` subprocess and reads its JSON report."""
+    # Extra paths must reach the child through PYTHONPATH; mutating our own sys.path has no effect on it.
+    # The repo root is added too so the child can load the agents.pytest_* plugins.
+    env = os.environ.copy()
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env["PYTHONPATH"] = os.pathsep.join([*(extra_paths or []), repo_root, env.get("PYTHONPATH", "")]).rstrip(os.pathsep)
+
+    # Each invocation writes its own JSON report so concurrent runs never read each other's results
+    report_fd, report_path = tempfile.mkstemp(prefix="pytest_report_", suffix=".json")
+    os.close(report_fd)
+
+    # Use the -p no:cacheprovider flag to prevent pytest from using stale cache
+    command = pytest_limits.limited_pytest_command(
+        [*(node_ids or [test_path]), "--json-report", f"--json-report-file={report_path}", "-p", "no:cacheprovider",
+         "-v", "-p", "agents.pytest_limits", f"--test-timeout={Settings.TEST_TIMEOUT or 0}",
+         "-p", "agents.pytest_sharding", "-p", "agents.pytest_coverage", *(args or [])],
+        Settings.TEST_MEMORY_LIMIT_MB, Settings.TEST_CPU_LIMIT,
+    )
+
+    # Run from project root so pytest can find modules/ directory
+    project_root = os.getcwd()
+
+    output = ""
     try:
-        # Use the -p no:cacheprovider flag to prevent pytest from using stale cache
-        command = [sys.executable, "-m", "pytest", test_path, "--json-report", "-p", "no:cacheprovider", "-v"]
-        
-        # Run from project root so pytest can find modules/ directory
-        project_root = os.getcwd()
-        
         result = subprocess.run(
             command,
             capture_output=True,
             text=True,
             check=False,
-            cwd=project_root
+            cwd=project_root,
+            env=env,
+            timeout=Settings.TEST_SUITE_TIMEOUT or None,
         )
-    finally:
-        # Restore the original path to avoid side effects
-        sys.path[:] = original_path
+        output = result.stdout + "\n" + result.stderr
+        if result.returncode < 0:
+            reason, message = pytest_worker.describe_exit(result.returncode, test_path)
+            return pytest_worker.failed_run(test_path, reason, f"{message}\n{output}")
 
-    output = result.stdout + "\n" + result.stderr
-    
-    try:
-        # The .report.json file is created by pytest-json-report in project root
-        report_path = os.path.join(os.getcwd(), ".report.json")
         with open(report_path) as f:
             report = json.load(f)
-        
+
         summary = report.get("summary", {})
         passed = summary.get("passed", 0)
-        failed = summary.get("failed", 0)
+        errors = summary.get("error", 0)
+        failed = summary.get("failed", 0) + errors
         collected = summary.get("total", 0)
-        
-        return {"passed": passed, "failed": failed, "collected": collected, "output": output}
-    except (FileNotFoundError, json.JSONDecodeError):
-        # Fallback if json report fails
-        passed = output.count(" PASSED")
-        failed = output.count(" FAILED")
-        collected = passed + failed
-        return {"passed": passed, "failed": failed, "collected": collected, "output": output}
 
+        return {"passed": passed, "failed": failed, "errors": errors, "collected": collected, "output": output,
+                "tests": _tests_from_json_report(report), "rootdir": report.get("root", project_root)}
+    except subprocess.TimeoutExpired:
+        return pytest_worker.failed_run(
+            test_path, pytest_limits.REASON_SUITE_TIMEOUT,
+            f"Test suite {test_path} exceeded the suite timeout of {Settings.TEST_SUITE_TIMEOUT:g}s and was killed",
+        )
+    except (FileNotFoundError, json.JSONDecodeError):
+        # Fallback if json report fails: read the counts from pytest's own summary line
+        counts = failure_records.summary_counts(output)
+        if counts is None:
+            return pytest_worker.failed_run(test_path, pytest_limits.REASON_CRASH,
+                                            f"pytest produced no report or summary for {test_path}\n{output}")
+        return {**counts, "output": output}
+    finally:
+        if os.path.exists(report_path):
+            os.remove(report_path)
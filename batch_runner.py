@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Batch runs: many projects and ticket sets from one job file, run concurrently.
+
+Usage: python main.py batch jobs.json [--workers 4] [--summary summary.json]
+
+Job file (JSON; a bare list of jobs is accepted too):
+
+    {"jobs": [
+        {"name": "calc", "mode": "unified", "project": "CAL", "tickets": ["CAL-1", "CAL-2"]},
+        {"name": "calc-all", "mode": "unified", "project": "CAL"},
+        {"mode": "tdd", "tickets": ["CAL-3", "CAL-4"]},
+        {"mode": "incremental", "tickets": ["CAL-31"], "workspace": "apps/calc"}
+    ]}
+
+The graphs write modules/, generated_tests/, app.py and logs/ relative to the
+working directory, so two jobs cannot share one. Each job runs `python main.py
+<mode> ...` as its own process inside its workspace (by default
+<Settings.BATCH_DIR>/<batch_id>/<name>), with its console output in
+<workspace>/job.log. Up to `workers` jobs run at once. Incremental jobs must
+name the workspace of the app they extend, and load_jobs rejects two jobs
+with the same workspace.
+
+The summary is JSON: one entry per job with its status, exit code, duration,
+log path and checkpoint run id (for `main.py --resume`), written to
+<Settings.BATCH_DIR>/<batch_id>/summary.json unless another path is given.
+"""
+import json
+import logging
+import os
+import re
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+MODES = ("unified", "tdd", "incremental")
+MAIN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+_RUN_ID_RE = re.compile(r"Run (\S+) \(resume with")
+
+
+def normalize_job(entry, index: int = 1) -> dict:
+    """
+    Checks one job entry (from a job file or the job queue) and fills in defaults.
+
+    Returns:
+        dict: {"job": {"name", "mode", "project", "tickets", "workspace"} or None, "errors": [str]}
+    """
+    if not isinstance(entry, dict):
+        return {"job": None, "errors": [f"job {index}: expected an object"]}
+    errors = []
+    mode = entry.get("mode", "")
+    project = (entry.get("project") or "").strip().upper()
+    tickets = entry.get("tickets") or []
+    if isinstance(tickets, str):
+        tickets = tickets.split(",")
+    tickets = [t.strip().upper() for t in tickets if t.strip()]
+    name = entry.get("name") or f"{index:02d}-{mode}-{(project or (tickets or ['job'])[0]).lower()}"
+
+    if mode not in MODES:
+        errors.append(f"job {index} ({name}): mode must be one of {', '.join(MODES)}")
+    elif mode == "unified" and not project:
+        errors.append(f"job {index} ({name}): unified jobs need a project")
+    elif mode != "unified" and not tickets:
+        errors.append(f"job {index} ({name}): {mode} jobs need tickets")
+    elif mode == "incremental" and not entry.get("workspace"):
+        # A new, empty workspace has no app to add the tickets to
+        errors.append(f"job {index} ({name}): incremental jobs need the workspace of an existing app")
+    if not re.fullmatch(r"[\w.-]+", name):
+        errors.append(f"job {index}: name {name!r} must be usable as a directory name")
+    return {"job": {"name": name, "mode": mode, "project": project, "tickets": tickets,
+                    "workspace": entry.get("workspace")}, "errors": errors}
+
+
+def load_jobs(path: str) -> dict:
+    """
+    Reads and checks a job file.
+
+    Args:
+        path (str): JSON job file.
+
+    Returns:
+        dict: {"jobs": [{"name", "mode", "project", "tickets", "workspace"}], "errors": [str]};
+              the jobs are only usable when "errors" is empty.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        return {"jobs": [], "errors": [f"{path}: {e}"]}
+
+    entries = data.get("jobs", []) if isinstance(data, dict) else data
+    if not isinstance(entries, list) or not entries:
+        return {"jobs": [], "errors": [f"{path}: expected a non-empty list of jobs"]}
+
+    jobs, errors, names, workspaces = [], [], set(), set()
+    for index, entry in enumerate(entries, 1):
+        checked = normalize_job(entry, index)
+        errors.extend(checked["errors"])
+        job = checked["job"]
+        if job is None:
+            continue
+        if job["name"] in names:
+            errors.append(f"job {index}: name {job['name']!r} is used by an earlier job")
+        names.add(job["name"])
+        if job["workspace"]:
+            # Two runs in one directory would overwrite each other's modules/ and app.py
+            workspace = os.path.realpath(job["workspace"])
+            if workspace in workspaces:
+                errors.append(f"job {index} ({job['name']}): workspace {job['workspace']!r} is used by an earlier job")
+            workspaces.add(workspace)
+        jobs.append(job)
+    return {"jobs": jobs, "errors": errors}
+
+
+def find_run_ids(log_path: str) -> list:
+    """Checkpoint run ids a job printed to its log, in order."""
+    try:
+        with open(log_path, "r", encoding="utf-8", errors="replace") as log:
+            return _RUN_ID_RE.findall(log.read())
+    except OSError:
+        return []
+
+
+def job_command(job: dict) -> list:
+    """The main.py command line that runs `job`."""
+    command = [sys.executable, MAIN_PATH, job["mode"]]
+    if job["project"]:
+        command += ["--project", job["project"]]
+    if job["tickets"]:
+        command += ["--tickets", ",".join(job["tickets"])]
+    return command
+
+
+def run_job(job: dict) -> dict:
+    """Runs one job to completion in its workspace; returns its summary entry."""
+    workspace = os.path.abspath(job["workspace"])
+    os.makedirs(workspace, exist_ok=True)
+    log_path = os.path.join(workspace, "job.log")
+    result = {**job, "workspace": workspace, "log": log_path}
+    print(f"▶️  {job['name']}: {job['mode']} {job['project'] or ''} {','.join(job['tickets'])}".rstrip())
+
+    start = time.time()
+    try:
+        with open(log_path, "w", encoding="utf-8") as log:
+            proc = subprocess.run(job_command(job), cwd=workspace, stdout=log, stderr=subprocess.STDOUT,
+                                  stdin=subprocess.DEVNULL, env={**os.environ, "PYTHONUNBUFFERED": "1"})
+        result.update(status="succeeded" if proc.returncode == 0 else "failed", exit_code=proc.returncode)
+    except OSError as e:
+        result.update(status="failed", exit_code=None, error=str(e))
+    result["duration_s"] = round(time.time() - start, 2)
+
+    run_ids = find_run_ids(log_path)
+    result["run_id"] = run_ids[0] if run_ids else None
+
+    icon = "✅" if result["status"] == "succeeded" else "❌"
+    print(f"{icon} {job['name']}: {result['status']} in {result['duration_s']}s (log: {log_path})")
+    return result
+
+
+def run_batch(jobs: list, workers: int | None = None, summary_path: str | None = None,
+              batch_id: str | None = None) -> dict:
+    """
+    Runs jobs concurrently, each in its own workspace, and writes the summary.
+
+    Args:
+        jobs (list): Jobs from load_jobs.
+        workers (int, optional): Jobs run at once. Defaults to Settings.BATCH_WORKERS.
+        summary_path (str, optional): Where to write the JSON summary.
+        batch_id (str, optional): Directory name for this batch under Settings.BATCH_DIR.
+
+    Returns:
+        dict: The summary: batch_id, timestamps, workers, succeeded/failed counts and per-job entries.
+    """
+    batch_id = batch_id or f"batch-{time.strftime('%Y%m%d-%H%M%S')}"
+    batch_dir = os.path.join(Settings.BATCH_DIR, batch_id)
+    workers = max(1, workers or Settings.BATCH_WORKERS)
+    jobs = [{**job, "workspace": job.get("workspace") or os.path.join(batch_dir, job["name"])} for job in jobs]
+
+    summary = {"batch_id": batch_id, "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "workers": workers}
+    print(f"\n📦 Batch {batch_id}: {len(jobs)} jobs, {workers} at a time")
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(run_job, jobs))
+    summary.update(
+        finished_at=time.strftime("%Y-%m-%dT%H:%M:%S"),
+        succeeded=sum(r["status"] == "succeeded" for r in results),
+        failed=sum(r["status"] != "succeeded" for r in results),
+        jobs=results,
+    )
+
+    summary_path = summary_path or os.path.join(batch_dir, "summary.json")
+    if os.path.dirname(summary_path):
+        os.makedirs(os.path.dirname(summary_path), exist_ok=True)
+    with open(summary_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    os.replace(summary_path + ".tmp", summary_path)
+    logger.info(f"Batch {batch_id}: {summary['succeeded']} succeeded, {summary['failed']} failed")
+    print(f"📊 {summary['succeeded']} succeeded, {summary['failed']} failed. Summary: {summary_path}")
+    summary["summary_path"] = summary_path
+    return summary
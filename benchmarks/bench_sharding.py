@@ -0,0 +1,96 @@
+# benchmarks/bench_sharding.py
+"""
+Benchmark: sharded vs. single-process execution of a large generated suite.
+
+Builds a synthetic project with one test file of N tests (default 1000) whose
+durations are skewed the way generated suites are (most tests are instant, a
+few wait on I/O-like sleeps), then times:
+
+  1. the whole suite in one worker run,
+  2. the suite split into shards by node-id hash (no duration history yet),
+  3. the suite split into shards balanced by recorded per-test durations.
+
+The synthetic tests sleep rather than spin, so the speedup reflects waiting
+tests; for CPU-bound suites it is bounded by the number of cores.
+
+Usage:
+    python benchmarks/bench_sharding.py --tests 1000 --shards 4
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import Settings  # noqa: E402
+
+
+def write_suite(root: str, tests: int, seed: int) -> str:
+    """Writes modules/synthetic.py and generated_tests/test_synthetic.py under `root`."""
+    rng = random.Random(seed)
+    os.makedirs(os.path.join(root, "modules"), exist_ok=True)
+    os.makedirs(os.path.join(root, "generated_tests"), exist_ok=True)
+    with open(os.path.join(root, "modules", "__init__.py"), "w") as fh:
+        fh.write("")
+    with open(os.path.join(root, "modules", "synthetic.py"), "w") as fh:
+        fh.write("import time\n\n\ndef work(seconds):\n    time.sleep(seconds)\n    return seconds\n")
+
+    lines = ["from modules.synthetic import work\n"]
+    for i in range(tests):
+        # ~90% instant tests, ~10% slow ones, and the slow ones cluster at the end of the file
+        seconds = rng.uniform(0.02, 0.08) if i > tests * 0.9 or rng.random() < 0.03 else 0.0005
+        lines.append(f"\ndef test_case_{i}():\n    assert work({seconds:.4f}) == {seconds:.4f}\n")
+    test_path = os.path.join("generated_tests", "test_synthetic.py")
+    with open(os.path.join(root, test_path), "w") as fh:
+        fh.write("".join(lines))
+    return test_path
+
+
+def timed(label: str, fn):
+    start = time.perf_counter()
+    res = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {elapsed:7.2f}s   passed={res['passed']} failed={res['failed']} shards={res.get('shards', 1)}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tests", type=int, default=1000)
+    parser.add_argument("--shards", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_sharding_") as root:
+        os.chdir(root)
+        Settings.TEST_WORKERS = args.shards
+        Settings.TEST_DURATIONS_PATH = os.path.join(root, ".cache", "test_durations.json")
+        Settings.TEST_SUITE_TIMEOUT = 0
+
+        from agents import tester_agent, pytest_worker
+
+        test_path = write_suite(root, args.tests, args.seed)
+        pytest_worker.get_pool()  # pre-fork the workers outside the timings
+
+        baseline = timed("single run", lambda: tester_agent.run_pytest(
+            test_path, extra_paths=[root], use_cache=False, failing_first=False))
+
+        # Hash-placed shards: what sharding does before any durations are recorded
+        real_durations = tester_agent._load_durations()[os.path.abspath(test_path)]
+        tester_agent._load_durations()[os.path.abspath(test_path)] = {}
+        by_count = timed(f"{args.shards} shards, by node-id hash", lambda: tester_agent.run_pytest_sharded(
+            test_path, extra_paths=[root], shards=args.shards))
+        tester_agent._load_durations()[os.path.abspath(test_path)] = real_durations
+
+        by_duration = timed(f"{args.shards} shards, by duration", lambda: tester_agent.run_pytest_sharded(
+            test_path, extra_paths=[root], shards=args.shards))
+
+        print(f"\nspeedup vs single run: by hash {baseline / by_count:.2f}x, by duration {baseline / by_duration:.2f}x")
+        pytest_worker.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Bulk TDD: run_poc_graph for many tickets at once, tracked in a manifest.
+
+Usage: python main.py tdd --tickets CAL-1,CAL-2 | --tickets-file tickets.txt | --project CAL
+                          [--workers 4] [--force]
+
+Each ticket runs in its own process (a fresh one per ticket, so a crash or a
+leak in one run cannot take the others down), up to `workers` at a time. TDD
+output goes to workspace/tdd_modules/<ticket>/, so tickets do not collide.
+
+The manifest (Settings.TDD_MANIFEST, generation_manifest.json by default) is a
+JSON list with one entry per ticket:
+
+    {"key": "CAL-1", "status": "✅ success", "updated": "<Jira updated>",
+     "run_id": "tdd-...", "passed": 4, "failed": 0, "finished_at": "..."}
+
+It is rewritten atomically (temp file + os.replace) when a ticket starts and
+when it finishes, so it is never half-written and always shows what is done.
+On the next run:
+
+- a ticket marked success whose Jira `updated` has not changed is skipped;
+- a ticket whose run was interrupted or raised (it never reached the end of
+  the graph) continues that checkpointed run (`run_id`) from the last
+  completed node, if the ticket has not changed;
+- anything else starts a new run: new or changed tickets, `force`, and runs
+  that finished with failing tests (resuming those would run nothing).
+
+Entries of the old format ({"key", "status"} only) have no `updated`, so they
+run once more and are then tracked.
+"""
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+SUCCESS = "✅ success"
+RUNNING = "⏳ running"
+# Parallel Jira reads when looking up `updated` for the tickets
+JIRA_READERS = 8
+
+
+def load_manifest(path: str) -> dict:
+    """{ticket key: entry} from the manifest, in file order; empty if it does not exist yet."""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"Could not read manifest {path}: {e}; starting a new one")
+        return {}
+    return {entry["key"]: entry for entry in entries if isinstance(entry, dict) and entry.get("key")}
+
+
+def save_manifest(path: str, entries: dict):
+    """Writes the manifest atomically: readers see the old file or the new one, never a partial one."""
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(list(entries.values()), f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def fetch_updated(ticket_keys: list) -> dict:
+    """
+    Reads each ticket's Jira `updated` timestamp, several at a time.
+
+    Returns:
+        dict: {key: {"updated": str} or {"error": str}}
+    """
+    from agents.jira_agent import jira_client
+
+    def read(key):
+        data = jira_client.read_issue(key)
+        if data.get("error"):
+            return key, {"error": f"{data['error']}: {data.get('details', '')}"[:300]}
+        return key, {"updated": data.get("updated") or ""}
+
+    with ThreadPoolExecutor(max_workers=min(JIRA_READERS, max(1, len(ticket_keys)))) as pool:
+        return dict(pool.map(read, ticket_keys))
+
+
+def plan_ticket(entry: dict | None, updated: str, force: bool = False) -> str:
+    """
+    What to do with one ticket given its manifest entry and current Jira `updated`.
+
+    Returns:
+        str: "skip", "resume" (continue entry["run_id"], which stopped before the end) or "run" (start over).
+    """
+    if force or not entry or not updated or entry.get("updated") != updated:
+        return "run"
+    if entry.get("status") == SUCCESS:
+        return "skip"
+    if entry.get("run_id") and Settings.CHECKPOINTS:
+        from graph.checkpointing import load_run_info
+
+        info = load_run_info(entry["run_id"])
+        if info is not None and not info["finished"]:
+            return "resume"
+    return "run"
+
+
+def run_ticket(ticket_key: str, run_id: str, resume: bool = False) -> dict:
+    """
+    Runs the TDD graph for one ticket; called in a worker process.
+
+    Returns:
+        dict: {"status", "passed", "failed"}
+    """
+    from graph.tdd_code import run_poc_graph
+
+    print(f"\n--- Processing {ticket_key} with TDD workflow ---")
+    try:
+        try:
+            result = run_poc_graph(ticket_key, run_id=run_id, resume=resume)
+        except ValueError as e:
+            # Interrupted before its first checkpoint: nothing to continue, so start the same run afresh
+            if not resume:
+                raise
+            logger.warning(f"{ticket_key}: cannot resume {run_id} ({e}); starting it again")
+            result = run_poc_graph(ticket_key, run_id=run_id)
+    except Exception as e:
+        print(f"⚠️ Error processing {ticket_key}: {e}")
+        return {"status": f"❌ error: {e}", "passed": 0, "failed": 0}
+
+    passed, failed = result.get("passed", 0), result.get("failed", 0)
+    if failed == 0 and (result.get("collected") or 0) > 0:
+        status = SUCCESS
+    elif str(result.get("description", "")).startswith("ERROR:"):
+        status = f"❌ error: {result['description'][len('ERROR:'):].strip()}"
+    else:
+        status = f"⚠️ {failed} tests failing" if failed else "⚠️ no tests collected"
+    return {"status": status, "passed": passed, "failed": failed}
+
+
+def run_bulk_tdd(ticket_keys: list, workers: int | None = None, manifest_path: str | None = None,
+                 force: bool = False, updated: dict | None = None, runner=run_ticket) -> dict:
+    """
+    Runs the TDD workflow for many tickets across a process pool, updating the manifest as each finishes.
+
+    Args:
+        ticket_keys (list): Ticket keys, in order.
+        workers (int, optional): Tickets run at once. Defaults to Settings.TDD_WORKERS.
+        manifest_path (str, optional): Defaults to Settings.TDD_MANIFEST.
+        force (bool): Run every ticket, even unchanged successes.
+        updated (dict, optional): {key: Jira updated} already known (e.g. from a project listing);
+            the rest are read from Jira.
+        runner: Function run per ticket in the worker process, as run_ticket(key, run_id, resume).
+            Must be importable by the worker (a module-level function).
+
+    Returns:
+        dict: {"succeeded", "failed", "skipped", "tickets": {key: manifest entry}, "manifest_path"}
+    """
+    from graph.checkpointing import new_run_id
+
+    manifest_path = manifest_path or Settings.TDD_MANIFEST
+    workers = max(1, workers or Settings.TDD_WORKERS)
+    ticket_keys = list(dict.fromkeys(ticket_keys))
+    manifest = load_manifest(manifest_path)
+
+    known = {key: {"updated": value} for key, value in (updated or {}).items() if value}
+    lookups = fetch_updated([key for key in ticket_keys if key not in known])
+    lookups.update(known)
+
+    def record(key, **fields):
+        manifest[key] = {**manifest.get(key, {"key": key}), **fields}
+        save_manifest(manifest_path, manifest)
+
+    plans, skipped, failed = [], [], []
+    for key in ticket_keys:
+        lookup = lookups.get(key) or {}
+        if lookup.get("error"):
+            print(f"⚠️ {key}: could not read from Jira ({lookup['error']})")
+            record(key, status=f"❌ error: {lookup['error']}", finished_at=time.strftime("%Y-%m-%dT%H:%M:%S"))
+            failed.append(key)
+            continue
+        action = plan_ticket(manifest.get(key), lookup.get("updated", ""), force=force)
+        if action == "skip":
+            skipped.append(key)
+            continue
+        run_id = manifest[key]["run_id"] if action == "resume" else new_run_id("tdd")
+        plans.append((key, run_id, action == "resume", lookup.get("updated", "")))
+
+    print(f"\n📦 Bulk TDD: {len(plans)} to run ({sum(p[2] for p in plans)} resuming), "
+          f"{len(skipped)} unchanged and skipped, {workers} at a time")
+    if skipped:
+        logger.info(f"Skipped unchanged tickets: {', '.join(skipped)}")
+
+    succeeded = 0
+    if plans:
+        # A fresh process per ticket: graphs, sqlite connections and logging start clean every time
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(workers, len(plans)), mp_context=context,
+                                 max_tasks_per_child=1) as pool:
+            futures = {}
+            for key, run_id, resume, ticket_updated in plans:
+                # Marked running with its run id first, so an interruption from here on can be resumed
+                record(key, status=RUNNING, updated=ticket_updated, run_id=run_id,
+                       started_at=time.strftime("%Y-%m-%dT%H:%M:%S"))
+                futures[pool.submit(runner, key, run_id, resume)] = key
+            try:
+                for future in as_completed(futures):
+                    key = futures[future]
+                    try:
+                        outcome = future.result()
+                    except Exception as e:  # the worker process died
+                        outcome = {"status": f"❌ error: worker failed: {e}", "passed": 0, "failed": 0}
+                    record(key, **outcome, finished_at=time.strftime("%Y-%m-%dT%H:%M:%S"))
+                    if outcome["status"] == SUCCESS:
+                        succeeded += 1
+                    else:
+                        failed.append(key)
+                    print(f"{key}: {outcome['status']}")
+            except KeyboardInterrupt:
+                print("\n⏹️  Interrupted: unfinished tickets stay marked running and resume on the next run")
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+
+    print("\n" + "="*60)
+    print(f"📊 TDD Generation Results ({manifest_path})")
+    print("="*60)
+    for key in ticket_keys:
+        print(f"{key}: {'⏭️  unchanged, skipped' if key in skipped else manifest[key]['status']}")
+    print("="*60)
+    logger.info(f"Bulk TDD: {succeeded} succeeded, {len(failed)} failed, {len(skipped)} skipped")
+    return {
+        "succeeded": succeeded,
+        "failed": len(failed),
+        "skipped": len(skipped),
+        "tickets": {key: manifest[key] for key in ticket_keys},
+        "manifest_path": manifest_path,
+    }
@@ -34,6 +34,101 @@ class Settings:
     ENV = os.getenv("ENV", "development")
     DEBUG = os.getenv("DEBUG", "false").lower() == "true"
 
+    # === Runs ===
+    # Each run checkpoints its graph state and generated files under RUNS_DIR/<run_id>, so it can be resumed
+    RUNS_DIR = os.getenv("RUNS_DIR", ".runs")
+    CHECKPOINTS = os.getenv("CHECKPOINTS", "true").lower() == "true"
+
+    # === Artifacts ===
+    # Large graph state strings (plans, specs, test output, reviews) live in the run's content-addressed
+    # blob store; the most recently used are kept in memory up to ARTIFACT_CACHE_MB
+    ARTIFACT_CACHE_MB = float(os.getenv("ARTIFACT_CACHE_MB", "64"))
+
+    # === Batch Runs ===
+    # `main.py batch` runs each job in its own workspace under BATCH_DIR/<batch_id>, BATCH_WORKERS at a time
+    BATCH_DIR = os.getenv("BATCH_DIR", "batches")
+    BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "2"))
+
+    # === Job Queue ===
+    # `main.py jobs ...`: a SQLite queue shared by all processes on the box; workers run JOB_WORKERS jobs at once,
+    # each in its own workspace under JOBS_DIR
+    JOBS_DB = os.getenv("JOBS_DB", ".jobs/queue.sqlite")
+    JOBS_DIR = os.getenv("JOBS_DIR", ".jobs/workspaces")
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+    # A worker renews its lease every JOB_HEARTBEAT_SECONDS; a job whose lease lapses is retried elsewhere,
+    # up to JOB_MAX_ATTEMPTS times
+    JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+    JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", "10"))
+    JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+    JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "2"))
+    # Status API (no authentication, so it listens on localhost by default)
+    JOBS_API_HOST = os.getenv("JOBS_API_HOST", "127.0.0.1")
+    JOBS_API_PORT = int(os.getenv("JOBS_API_PORT", "8765"))
+
+    # === Bulk TDD ===
+    # `main.py tdd` runs TDD_WORKERS tickets at once, each in its own process, and records each ticket's
+    # outcome in TDD_MANIFEST so unchanged successes are skipped and interrupted runs resume
+    TDD_WORKERS = int(os.getenv("TDD_WORKERS", "2"))
+    TDD_MANIFEST = os.getenv("TDD_MANIFEST", "generation_manifest.json")
+
+    # === Module Pipeline ===
+    # Unified graph: run each module's spec -> tests -> code -> test/fix loop as its own concurrent
+    # pipeline, joined before the UI, instead of one graph-wide step per stage
+    MODULE_PIPELINE = os.getenv("MODULE_PIPELINE", "true").lower() == "true"
+
+    # === Reviews ===
+    # Return as soon as the code/app is ready and finish the (parallel) reviews in the background,
+    # writing them to <log>_reviews.md
+    REVIEWS_ASYNC = os.getenv("REVIEWS_ASYNC", "false").lower() == "true"
+
+    # === Tracing ===
+    # Record spans for graph nodes and external calls; written as OTLP JSON and Chrome trace files
+    TRACE = os.getenv("TRACE", "false").lower() == "true"
+    TRACE_DIR = os.getenv("TRACE_DIR", "logs/traces")
+
+    # === LLM Output Budgets ===
+    # Upper bound for adaptive max_tokens, and how many times a truncated response is continued
+    LLM_MAX_OUTPUT_TOKENS = int(os.getenv("LLM_MAX_OUTPUT_TOKENS", "8000"))
+    LLM_MAX_CONTINUATIONS = int(os.getenv("LLM_MAX_CONTINUATIONS", "2"))
+    TOKEN_HISTORY_PATH = os.getenv("TOKEN_HISTORY_PATH", ".cache/token_history.json")
+    # Fixers answer with "patch" edits (full rewrite only when a patch does not apply) or "rewrite" whole files
+    FIX_OUTPUT = os.getenv("FIX_OUTPUT", "patch")
+
+    # === Test Execution ===
+    # "inprocess" runs pytest.main in a reusable worker; "subprocess" spawns python -m pytest per run
+    PYTEST_ENGINE = os.getenv("PYTEST_ENGINE", "inprocess")
+    # Parallel test workers (module suites run concurrently); 0 means one per CPU
+    TEST_WORKERS = int(os.getenv("TEST_WORKERS", "0"))
+    # Workers are forked from a server that has already imported these modules
+    TEST_WORKER_PRELOAD = [m.strip() for m in os.getenv("TEST_WORKER_PRELOAD", "math,streamlit").split(",") if m.strip()]
+    # Each worker process is replaced after this many runs to bound memory (0 = never)
+    TEST_WORKER_MAX_RUNS = int(os.getenv("TEST_WORKER_MAX_RUNS", "50"))
+    # Reuse a suite's previous result when its test file and imported modules are unchanged
+    TEST_RESULT_CACHE = os.getenv("TEST_RESULT_CACHE", "true").lower() == "true"
+    # Rerun last lap's failing tests first and skip the full suite while any still fail
+    TEST_FAILING_FIRST = os.getenv("TEST_FAILING_FIRST", "true").lower() == "true"
+    # Suites with at least TEST_SHARD_MIN_TESTS known tests are split across TEST_SHARDS worker runs,
+    # balanced by each test's recorded duration (0 shards = one per test worker)
+    TEST_SHARDS = int(os.getenv("TEST_SHARDS", "0"))
+    TEST_SHARD_MIN_TESTS = int(os.getenv("TEST_SHARD_MIN_TESTS", "200"))
+    TEST_DURATIONS_PATH = os.getenv("TEST_DURATIONS_PATH", ".cache/test_durations.json")
+    # Record which project functions each test runs, so fix prompts carry only code hit by failing tests
+    TEST_FUNCTION_COVERAGE = os.getenv("TEST_FUNCTION_COVERAGE", "false").lower() == "true"
+    # Limits for generated code under test (0 disables each): wall-clock seconds per test and per suite,
+    # address space in MB and CPU seconds per test process
+    TEST_TIMEOUT = float(os.getenv("TEST_TIMEOUT", "10"))
+    TEST_SUITE_TIMEOUT = float(os.getenv("TEST_SUITE_TIMEOUT", "120"))
+    TEST_MEMORY_LIMIT_MB = int(os.getenv("TEST_MEMORY_LIMIT_MB", "1024"))
+    TEST_CPU_LIMIT = int(os.getenv("TEST_CPU_LIMIT", "60"))
+
+    # === App Smoke Run ===
+    # Run app.py headlessly (streamlit AppTest) and click every keyed button before review
+    APP_SMOKE = os.getenv("APP_SMOKE", "true").lower() == "true"
+    # Concurrent smoke processes (0 = one per CPU); seconds per script run and for the whole app
+    APP_SMOKE_WORKERS = int(os.getenv("APP_SMOKE_WORKERS", "0"))
+    APP_SMOKE_RUN_TIMEOUT = float(os.getenv("APP_SMOKE_RUN_TIMEOUT", "10"))
+    APP_SMOKE_BUDGET = float(os.getenv("APP_SMOKE_BUDGET", "60"))
+
     @classmethod
     def check(cls):
         """Validate required environment variables are loaded."""
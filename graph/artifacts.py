@@ -0,0 +1,128 @@
+# graph/artifacts.py
+"""
+Content-addressed artifact store for the large strings a graph passes around.
+
+LangGraph copies the state into every node and the SqliteSaver serializes all
+of it into every checkpoint, so an architecture plan, a dozen specs, pytest
+output and three reviews held as plain strings are written again after every
+node and held again by every checkpoint read. Nodes instead `put` large text
+here and keep only its reference in the state:
+
+    "artifact:<sha256 of the UTF-8 text>"
+
+A reference is about 80 bytes whatever the size of the text, so the state and
+each checkpoint stay the same size as a project grows; identical text (an
+unchanged spec, a repeated review) is stored once.
+
+Blobs live on disk in one file per digest (for a run, next to the file
+snapshots in <Settings.RUNS_DIR>/<run_id>/blobs, so a resumed run finds them)
+and recently used ones are kept in memory, up to Settings.ARTIFACT_CACHE_MB.
+
+`get` returns anything that is not a reference unchanged, so states
+checkpointed before the store existed still resume.
+"""
+import hashlib
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+REF_PREFIX = "artifact:"
+_REF_RE = re.compile(r"^artifact:([0-9a-f]{64})$")
+
+
+def is_ref(value) -> bool:
+    return isinstance(value, str) and bool(_REF_RE.match(value))
+
+
+def write_blob(directory: str, data: bytes) -> str:
+    """Stores `data` as <directory>/<sha256> (atomically, once); returns the digest."""
+    digest = hashlib.sha256(data).hexdigest()
+    path = os.path.join(directory, digest)
+    if not os.path.exists(path):
+        os.makedirs(directory, exist_ok=True)
+        # Unique temp name: concurrent module pipelines may store the same text at once
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+    return digest
+
+
+class ArtifactStore:
+    """Blobs under `root`, with an in-memory LRU of recently used text (thread-safe)."""
+
+    def __init__(self, root: str, cache_bytes: int | None = None):
+        self.root = root
+        self.cache_bytes = int(Settings.ARTIFACT_CACHE_MB * 1024 * 1024) if cache_bytes is None else cache_bytes
+        self._cache = OrderedDict()  # digest -> text, least recently used first
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _remember(self, digest: str, text: str):
+        size = len(text.encode("utf-8"))
+        if size > self.cache_bytes:
+            return
+        with self._lock:
+            if digest in self._cache:
+                self._cache.move_to_end(digest)
+                return
+            self._cache[digest] = text
+            self._cached_bytes += size
+            while self._cached_bytes > self.cache_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cached_bytes -= len(evicted.encode("utf-8"))
+
+    def put(self, text: str | None) -> str:
+        """Stores `text`; returns its reference ("" for empty text, so `state.get(key, "")` still works)."""
+        if not text:
+            return ""
+        if is_ref(text):
+            return text
+        digest = write_blob(self.root, text.encode("utf-8"))
+        self._remember(digest, text)
+        return REF_PREFIX + digest
+
+    def get(self, ref) -> str:
+        """The text behind `ref`; "" for None/"", and any non-reference value unchanged."""
+        if not ref:
+            return ""
+        if not is_ref(ref):
+            return ref
+        digest = ref[len(REF_PREFIX):]
+        with self._lock:
+            text = self._cache.get(digest)
+            if text is not None:
+                self._cache.move_to_end(digest)
+                self.hits += 1
+                return text
+            self.misses += 1
+        with open(os.path.join(self.root, digest), "rb") as fh:
+            text = fh.read().decode("utf-8")
+        self._remember(digest, text)
+        return text
+
+    def put_map(self, texts: dict) -> dict:
+        """{name: text} -> {name: reference}"""
+        return {name: self.put(text) for name, text in (texts or {}).items()}
+
+    def get_map(self, refs: dict) -> dict:
+        """{name: reference} -> {name: text}"""
+        return {name: self.get(ref) for name, ref in (refs or {}).items()}
+
+    def expand(self, values: dict, keys) -> dict:
+        """A copy of a state with the references under `keys` (single or {name: ref} maps) loaded."""
+        expanded = dict(values)
+        for key in keys:
+            if isinstance(expanded.get(key), dict):
+                expanded[key] = self.get_map(expanded[key])
+            elif key in expanded:
+                expanded[key] = self.get(expanded[key])
+        return expanded
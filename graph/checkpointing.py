@@ -0,0 +1,202 @@
+# graph/checkpointing.py
+"""
+Durable runs: a SQLite checkpoint file per run, plus snapshots of generated files.
+
+A failure late in a run (e.g. a quota error at generate_main_app) used to mean
+starting again from health_check and paying for every architecture, spec and
+test call a second time. Graphs are now compiled with a LangGraph SqliteSaver
+writing to `<Settings.RUNS_DIR>/<run_id>/checkpoints.sqlite`, so state is saved
+after every node.
+
+State only holds paths to the generated files and references to large text in
+the artifact store (graph/artifacts.py), so after each node the files it
+refers to (test_files, code_files, app_path, test_path, code_path) are
+snapshotted too, once per committed checkpoint: contents go to a content-addressed `blobs/` directory and a
+per-checkpoint manifest goes into the same SQLite file. Artifacts share that
+`blobs/` directory, so they are kept with the run as well. `run_graph(...,
+resume=True)` restores the files of the last checkpoint before continuing, so
+the state and the files on disk agree again.
+
+The run's kind and arguments are stored with it, so `python main.py --resume
+<run_id>` needs nothing but the id.
+"""
+import contextlib
+import json
+import logging
+import os
+import sqlite3
+import time
+import uuid
+
+from config.settings import Settings
+from graph.artifacts import ArtifactStore, write_blob
+from utils import tracing
+
+logger = logging.getLogger(__name__)
+
+# State keys holding a single generated file path, and {name: path} maps of them
+_PATH_KEYS = ("app_path", "test_path", "code_path")
+_PATH_MAP_KEYS = ("test_files", "code_files")
+
+
+def new_run_id(kind: str) -> str:
+    """A sortable, unique run id such as "unified-20250101-120000-1a2b3c"."""
+    return f"{kind}-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+def run_dir(run_id: str) -> str:
+    return os.path.join(Settings.RUNS_DIR, run_id)
+
+
+def _connect(run_id: str) -> sqlite3.Connection:
+    os.makedirs(run_dir(run_id), exist_ok=True)
+    conn = sqlite3.connect(os.path.join(run_dir(run_id), "checkpoints.sqlite"), check_same_thread=False)
+    conn.executescript(
+        "CREATE TABLE IF NOT EXISTS run_info (key TEXT PRIMARY KEY, value TEXT);"
+        "CREATE TABLE IF NOT EXISTS file_snapshots ("
+        " checkpoint_id TEXT, path TEXT, digest TEXT, PRIMARY KEY (checkpoint_id, path));"
+    )
+    return conn
+
+
+@contextlib.contextmanager
+def _db(run_id: str):
+    """A short-lived connection that commits on success and is always closed."""
+    conn = _connect(run_id)
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def save_run_info(run_id: str, kind: str, args: dict):
+    """Records which graph the run uses and its arguments, for --resume."""
+    with _db(run_id) as conn:
+        conn.executemany("INSERT OR REPLACE INTO run_info VALUES (?, ?)",
+                         [("kind", kind), ("args", json.dumps(args))])
+
+
+def load_run_info(run_id: str) -> dict | None:
+    """
+    {"kind": ..., "args": {...}, "finished": bool} for an existing run, or None if there is no such run.
+
+    "finished" is True once the graph has reached END: resuming it again would run no nodes.
+    """
+    if not os.path.exists(os.path.join(run_dir(run_id), "checkpoints.sqlite")):
+        return None
+    with _db(run_id) as conn:
+        info = dict(conn.execute("SELECT key, value FROM run_info").fetchall())
+    if "kind" not in info:
+        return None
+    return {"kind": info["kind"], "args": json.loads(info.get("args") or "{}"), "finished": info.get("finished") == "1"}
+
+
+def artifact_store(run_id: str) -> ArtifactStore:
+    """The run's artifact store, in the same blobs/ directory as its file snapshots."""
+    return ArtifactStore(os.path.join(run_dir(run_id), "blobs"))
+
+
+def tracked_paths(values: dict) -> list:
+    """Generated files referenced by a graph state."""
+    paths = [values.get(key) for key in _PATH_KEYS]
+    for key in _PATH_MAP_KEYS:
+        paths.extend((values.get(key) or {}).values())
+    # Modules finished by the per-module pipeline before join_modules merges them into the maps above
+    for result in (values.get("module_results") or {}).values():
+        paths.extend([result.get("test_path"), result.get("code_path")])
+    return sorted({p for p in paths if isinstance(p, str) and p})
+
+
+def snapshot_files(run_id: str, checkpoint_id: str, values: dict):
+    """Stores the current contents of every file the state refers to, under `checkpoint_id`."""
+    blobs = os.path.join(run_dir(run_id), "blobs")
+    rows = []
+    for path in tracked_paths(values):
+        try:
+            with open(path, "rb") as fh:
+                data = fh.read()
+        except OSError:
+            continue
+        rows.append((checkpoint_id, path, write_blob(blobs, data)))
+    with _db(run_id) as conn:
+        conn.executemany("INSERT OR REPLACE INTO file_snapshots VALUES (?, ?, ?)", rows)
+
+
+def restore_files(run_id: str, checkpoint_id: str) -> list:
+    """Writes back the files snapshotted at `checkpoint_id`; returns the restored paths."""
+    with _db(run_id) as conn:
+        rows = conn.execute("SELECT path, digest FROM file_snapshots WHERE checkpoint_id = ?",
+                            (checkpoint_id,)).fetchall()
+    restored = []
+    for path, digest in rows:
+        with open(os.path.join(run_dir(run_id), "blobs", digest), "rb") as fh:
+            data = fh.read()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as fh:
+            fh.write(data)
+        restored.append(path)
+    return restored
+
+
+def open_checkpointer(run_id: str):
+    """A SqliteSaver on the run's checkpoint file."""
+    from langgraph.checkpoint.sqlite import SqliteSaver
+
+    return SqliteSaver(_connect(run_id))
+
+
+def run_graph(builder, initial_state: dict, run_id: str, resume: bool = False, recursion_limit: int | None = None) -> dict:
+    """
+    Compiles `builder` with the run's checkpointer and runs it to the end, snapshotting files at each checkpoint.
+
+    With Settings.TRACE on, node and call spans are exported under Settings.TRACE_DIR as `<run_id>.*.json`.
+
+    Args:
+        builder: The StateGraph builder.
+        initial_state (dict): Input for a new run (ignored when resuming).
+        run_id (str): Run id; also the checkpoint thread id.
+        resume (bool): Continue from the last completed node instead of starting over.
+            With Settings.CHECKPOINTS off, a new run is invoked without a checkpointer.
+        recursion_limit (int, optional): LangGraph recursion limit.
+
+    Returns:
+        dict: The final graph state.
+    """
+    config = {"recursion_limit": recursion_limit} if recursion_limit else {}
+    if Settings.TRACE:
+        tracing.start_trace()
+        config["callbacks"] = [tracing.GraphTracer().handler]
+    if not Settings.CHECKPOINTS and not resume:
+        try:
+            return builder.compile().invoke(initial_state, config)
+        finally:
+            tracing.export_trace(run_id)
+
+    checkpointer = open_checkpointer(run_id)
+    graph = builder.compile(checkpointer=checkpointer)
+    config["configurable"] = {"thread_id": run_id}
+
+    graph_input = initial_state
+    if resume:
+        snapshot = graph.get_state(config)
+        if not snapshot.values:
+            raise ValueError(f"Run {run_id} has no checkpoints to resume from")
+        restored = restore_files(run_id, snapshot.config["configurable"]["checkpoint_id"])
+        logger.info(f"Resuming {run_id} before {list(snapshot.next) or 'END'}; restored {len(restored)} files")
+        graph_input = None
+
+    try:
+        # One event per committed checkpoint, after the whole superstep: parallel nodes (module pipelines,
+        # reviewers) have all written their files by then, so they are filed under the checkpoint that has them
+        for checkpoint in graph.stream(graph_input, config, stream_mode="checkpoints", durability="sync"):
+            snapshot_files(run_id, checkpoint["config"]["configurable"]["checkpoint_id"], checkpoint["values"])
+        snapshot = graph.get_state(config)
+        if not snapshot.next:
+            with _db(run_id) as conn:
+                conn.execute("INSERT OR REPLACE INTO run_info VALUES ('finished', '1')")
+        return snapshot.values
+    finally:
+        checkpointer.conn.close()
+        tracing.export_trace(run_id)
@@ -6,32 +6,59 @@ integrated Streamlit application from a set of Jira tickets. The process involve
 multiple agentic steps, from architecture design to code generation and testing.
 """
 from langgraph.graph import StateGraph, START, END
-from typing_extensions import TypedDict
+from typing_extensions import Annotated, TypedDict
 from pathlib import Path
 from agents.jira_agent import jira_client
 from agents.implementation_agent import write_files
-from agents.tester_agent import run_pytest
+from agents.tester_agent import run_pytest_many
+from agents.failure_records import format_records, focused_source
+from agents.fix_memo import failure_set_key, next_step, record_attempt, previous_attempts_note
+from agents.app_smoke import smoke_app as run_app_smoke
 from openai import OpenAI
 from config.settings import Settings
+from graph.checkpointing import artifact_store, new_run_id, save_run_info, run_graph
+from graph.reviews import add_review_stage, run_reviews_async
+from graph.module_pipeline import MAX_FIX_LAPS, collect_module_results, merge_module_results, module_sends
 from utils.logging_utils import setup_logging
-from utils.file_utils import load_prompt, read_text_safe
+from utils.file_utils import PROJECT_ROOT, load_prompt, read_text_safe
+from utils.llm_utils import chat_completion
+from utils import symbol_index
+from utils.code_merge import describe_module, splice_definitions
+from utils.patching import apply_patch
+from utils.app_rules import check_app, format_issue
+from utils.import_resolver import check_imports
 import ast
 import logging
 import json
 import re
 import os
 
-def run_unified_graph(project_key: str, ticket_keys: list):
+# State keys holding artifact references (a single one, or a {module: ref} map) instead of the text itself
+ARTIFACT_KEYS = ("epic_description", "rejection_reason", "architecture_plan", "specs", "ui_design", "test_output",
+                 "fix_recommendations", "review_report", "senior_dev_review", "architecture_review")
+
+def run_unified_graph(project_key: str, ticket_keys: list, run_id: str | None = None, resume: bool = False):
     """
     Initializes and runs the unified application generation graph.
+
+    Every node is checkpointed under `run_id` (a new id unless given); with
+    `resume`, the run continues from its last completed node.
     """
     logger, log_file = setup_logging("unified", project_key)
     logger.info(f"Starting unified generation for project {project_key} with tickets: {ticket_keys}")
+    run_id = run_id or new_run_id("unified")
+    if Settings.CHECKPOINTS and not resume:
+        save_run_info(run_id, "unified", {"project_key": project_key, "ticket_keys": ticket_keys})
+    if Settings.CHECKPOINTS:
+        print(f"🧷 Run {run_id} (resume with: python main.py --resume {run_id})")
+    # Large text goes to the run's artifact store; the state holds references (see graph/artifacts.py)
+    artifacts = artifact_store(run_id)
 
     class GenState(TypedDict, total=False):
         """Defines the shared state for the graph, passing data between nodes."""
         project_key: str
         ticket_keys: list
+        # Keys in ARTIFACT_KEYS, and ticket descriptions, hold artifact references rather than text
         tickets: list  # [{key, title, description}]
         epic_description: str
         architecture_approved: bool
@@ -43,22 +70,22 @@ def run_unified_graph(project_key: str, ticket_keys: list):
         test_files: dict  # {module_name: path}
         code_files: dict  # {module_name: path}
         app_path: str
-        test_results: dict
+        test_results: dict  # {module_name: pytest result}, "output" stored as an artifact
         ui_design: str
         ui_pattern: str
         test_output: str # For fix_analyzer
+        test_failures: dict  # {module_name: [failure records]}
         passed: int
         failed: int
         collected: int
         needs_fix: bool
         stuck: bool
-        prev_failures: dict
+        fix_memo: dict  # {module_name: {history, attempts}} see agents/fix_memo.py
+        module_results: Annotated[dict, merge_module_results]  # per-module pipeline runs, see graph/module_pipeline.py
         fix_recommendations: str
         fix_type: str
         app_errors: list
         app_fix_iteration: int
-        current_tests: str
-        current_code: str
         health_ok: bool
         review_report: str
         senior_dev_review: str
@@ -93,8 +120,8 @@ def run_unified_graph(project_key: str, ticket_keys: list):
                 if issue_type.upper() == "EPIC":
                     desc = data.get("description", "")
                     if desc:
-                        epic_description = str(desc)
-                        logger.info(f"Found EPIC: {key} with description length: {len(epic_description)}")
+                        logger.info(f"Found EPIC: {key} with description length: {len(str(desc))}")
+                        epic_description = artifacts.put(str(desc))
                         print(f"📋 EPIC: {data.get('summary', '')}")
                     else:
                         logger.warning(f"EPIC {key} has no description")
@@ -102,7 +129,7 @@ def run_unified_graph(project_key: str, ticket_keys: list):
                     tickets.append({
                         "key": key,
                         "title": data.get("summary", ""),
-                        "description": str(data.get("description", ""))
+                        "description": artifacts.put(str(data.get("description", "")))
                     })
         logger.info(f"Loaded {len(tickets)} tickets and EPIC description")
         return {"tickets": tickets, "ticket_keys": keys_to_fetch, "epic_description": epic_description}
@@ -144,14 +171,14 @@ def run_unified_graph(project_key: str, ticket_keys: list):
         _log_phase("system_architect")
         tickets = state.get("tickets", [])
         project_key = state.get("project_key", "")
-        epic_description = state.get("epic_description", "")
+        epic_description = artifacts.get(state.get("epic_description"))
         arch_iteration = state.get("arch_iteration", 0)
-        rejection_reason = state.get("rejection_reason", "")
+        rejection_reason = artifacts.get(state.get("rejection_reason"))
         client = OpenAI(api_key=Settings.OPENAI_API_KEY)
         
         if not tickets:
             logger.error("No tickets loaded. Cannot design architecture.")
-            return {"architecture_plan": "{}", "modules": {}}
+            return {"architecture_plan": artifacts.put("{}"), "modules": {}}
         
         tickets_summary = "\n".join([f"- {t['key']}: {t['title']}" for t in tickets])
         
@@ -163,14 +190,15 @@ def run_unified_graph(project_key: str, ticket_keys: list):
         else:
             prompt_template = load_prompt("unified_app_goal.txt")
             app_goal_prompt = prompt_template.format(tickets_summary=tickets_summary)
-            goal_resp = client.chat.completions.create(
+            app_goal = chat_completion(
+                client,
+                "app_goal",
                 model="gpt-4o-mini",
                 messages=[{"role": "user", "content": app_goal_prompt}],
                 temperature=0.2,
                 top_p=0.95,
-                max_tokens=1000,
-            )
-            app_goal = (goal_resp.choices[0].message.content or "").strip()
+                default_max_tokens=1000,
+            ).strip()
 
         # Add feedback from previous rejection
         if arch_iteration > 0 and rejection_reason:
@@ -180,7 +208,7 @@ def run_unified_graph(project_key: str, ticket_keys: list):
         print(f"🎯 Goal: {app_goal}") # noqa: T201
 
         ticket_details = "\n".join(
-            [f"\n{t['key']}: {t['title']}\n{t['description'][:200]}\n" for t in tickets]
+            [f"\n{t['key']}: {t['title']}\n{artifacts.get(t['description'])[:200]}\n" for t in tickets]
         )
         prompt_template = load_prompt("unified_system_architect.txt")
         prompt = prompt_template.format(
@@ -189,7 +217,9 @@ def run_unified_graph(project_key: str, ticket_keys: list):
             ticket_details=ticket_details
         )
         
-        resp = client.chat.completions.create(
+        arch_plan = chat_completion(
+            client,
+            "system_architect",
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": load_prompt("system_json_only.txt")},
@@ -197,10 +227,8 @@ def run_unified_graph(project_key: str, ticket_keys: list):
             ],
             temperature=0.2,
             top_p=0.95,
-            max_tokens=2000,
-        )
-        
-        arch_plan = (resp.choices[0].message.content or "").strip()
+            default_max_tokens=2000,
+        ).strip()
         # Clean markdown from the response before parsing
         arch_plan = re.sub(r'^```json\s*', '', arch_plan)
         arch_plan = re.sub(r'```\s*$', '', arch_plan)
@@ -223,13 +251,13 @@ def run_unified_graph(project_key: str, ticket_keys: list):
             logger.error(f"Failed to parse architecture: {e}")
             modules = {"main": {"tickets": [t["key"] for t in tickets], "functions": [], "purpose": "Main module"}}
         
-        return {"architecture_plan": arch_plan, "modules": modules, "arch_iteration": arch_iteration}
+        return {"architecture_plan": artifacts.put(arch_plan), "modules": modules, "arch_iteration": arch_iteration}
 
     def requirements_analyzer(state: GenState) -> GenState:
         """Analyze EPIC requirements and ensure architecture stays simple and focused."""
         _log_phase("requirements_analyzer")
-        epic_description = state.get("epic_description", "")
-        architecture_plan = state.get("architecture_plan", "")
+        epic_description = artifacts.get(state.get("epic_description"))
+        architecture_plan = artifacts.get(state.get("architecture_plan"))
         arch_iteration = state.get("arch_iteration", 0)
         client = OpenAI(api_key=Settings.OPENAI_API_KEY)
         
@@ -261,10 +289,8 @@ def run_unified_graph(project_key: str, ticket_keys: list):
             f"PROPOSED ARCHITECTURE:\n{architecture_plan}\n"
         )
         
-        resp = client.chat.completions.create(
-            model="gpt-4o", messages=[{"role": "user", "content": prompt}], max_tokens=500)
-        
-        analysis = resp.choices[0].message.content or ""
+        analysis = chat_completion(
+            client, "requirements_analyzer", model="gpt-4o", messages=[{"role": "user", "content": prompt}], default_max_tokens=500)
         logger.info(f"Requirements analysis:\n{analysis}")
         
         approved = 'APPROVED: YES' in analysis.upper()
@@ -274,7 +300,56 @@ def run_unified_graph(project_key: str, ticket_keys: list):
             return {"architecture_approved": True, "arch_iteration": arch_iteration + 1}
         else:
             print(f"❌ Requirements check: REJECTED (attempt {arch_iteration + 1}/3) - will regenerate simpler architecture")
-            return {"architecture_approved": False, "arch_iteration": arch_iteration + 1, "rejection_reason": analysis}
+            return {"architecture_approved": False, "arch_iteration": arch_iteration + 1, "rejection_reason": artifacts.put(analysis)}
+
+    # Per-module steps, shared by the staged nodes below and the per-module pipeline
+    def _write_spec(client, module_name: str, module_info: dict, tickets: list) -> str:
+        module_tickets = [t for t in tickets if t["key"] in module_info["tickets"]]
+        
+        tickets_text = "\n".join([f"{t['key']}: {t['title']}\n{artifacts.get(t['description'])}" for t in module_tickets])
+        
+        prompt_template = load_prompt("unified_spec_agent.txt")
+        prompt = prompt_template.format(
+            module_name=module_name,
+            purpose=module_info.get('purpose', 'No purpose defined'),
+            tickets_text=tickets_text
+        )
+        
+        spec = chat_completion(
+            client,
+            "spec_agent",
+            model="gpt-4o",
+            messages=[
+                {"role": "system", "content": load_prompt("system_json_only.txt")},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.2,
+            top_p=0.95,
+            spec=json.dumps({"functions": module_info.get("functions", [])}),
+            default_max_tokens=1500,
+        ).strip()
+        try: # noqa: SIM105
+            json.loads(spec)
+        except json.JSONDecodeError:
+            spec = json.dumps({"module": module_name, "functions": [], "edge_cases": [], "acceptance": []})
+        
+        logger.info(f"Spec for {module_name}:\n{spec}")
+        return spec
+
+    def _review_spec(client, module_name: str, spec: str):
+        prompt_template = load_prompt("unified_spec_reviewer.txt")
+        prompt = prompt_template.format(module_name=module_name, spec=spec)
+
+        review = chat_completion(
+            client,
+            "spec_reviewer",
+            model="gpt-4o-mini",
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.1,
+            top_p=0.95,
+            default_max_tokens=500,
+        )
+        logger.info(f"Spec review for {module_name}:\n{review}")
 
     def spec_agent(state: GenState) -> GenState:
         """
@@ -289,36 +364,7 @@ def run_unified_graph(project_key: str, ticket_keys: list):
         
         specs = {}
         for module_name, module_info in modules.items():
-            module_tickets = [t for t in tickets if t["key"] in module_info["tickets"]]
-            
-            tickets_text = "\n".join([f"{t['key']}: {t['title']}\n{t['description']}" for t in module_tickets])
-            
-            prompt_template = load_prompt("unified_spec_agent.txt")
-            prompt = prompt_template.format(
-                module_name=module_name,
-                purpose=module_info.get('purpose', 'No purpose defined'),
-                tickets_text=tickets_text
-            )
-            
-            resp = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": load_prompt("system_json_only.txt")},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.2,
-                top_p=0.95,
-                max_tokens=1500,
-            )
-            
-            spec = (resp.choices[0].message.content or "").strip()
-            try: # noqa: SIM105
-                json.loads(spec)
-            except json.JSONDecodeError:
-                spec = json.dumps({"module": module_name, "functions": [], "edge_cases": [], "acceptance": []})
-            
-            specs[module_name] = spec
-            logger.info(f"Spec for {module_name}:\n{spec}")
+            specs[module_name] = artifacts.put(_write_spec(client, module_name, module_info, tickets))
         
         return {"specs": specs}
 
@@ -332,22 +378,165 @@ def run_unified_graph(project_key: str, ticket_keys: list):
         client = OpenAI(api_key=Settings.OPENAI_API_KEY)
         
         for module_name, spec in specs.items():
-            prompt_template = load_prompt("unified_spec_reviewer.txt")
-            prompt = prompt_template.format(module_name=module_name, spec=spec)
-
-            resp = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.1,
-                top_p=0.95,
-                max_tokens=500,
-            )
-            
-            review = resp.choices[0].message.content
-            logger.info(f"Spec review for {module_name}:\n{review}")
+            _review_spec(client, module_name, artifacts.get(spec))
         
         return {}
 
+    def _write_tests(client, module_name: str, spec: str) -> str:
+        test_dir = "generated_tests"
+        os.makedirs(test_dir, exist_ok=True)
+        test_path = os.path.join(test_dir, f"test_{module_name}.py")
+        
+        prompt_template = load_prompt("unified_generate_tests.txt")
+        prompt = prompt_template.format(module_name=module_name, spec=spec)
+        
+        tests_src = chat_completion(
+            client,
+            "generate_tests",
+            model="gpt-4o",
+            messages=[
+                {"role": "system", "content": load_prompt("system_python_test_code_only.txt")},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.1,
+            top_p=0.95,
+            spec=spec,
+            default_max_tokens=3000,
+        ).strip()
+        tests_src = re.sub(r'^```python\s*', '', tests_src)
+        tests_src = re.sub(r'```\s*$', '', tests_src)
+        
+        # Validate
+        if f"from modules.{module_name}" not in tests_src:
+            tests_src = f"import pytest\nfrom modules.{module_name} import *\n\n" + tests_src
+        
+        try:
+            ast.parse(tests_src)
+        except SyntaxError: # noqa: SIM105
+            tests_src = f"import pytest\nfrom modules.{module_name} import *\n\ndef test_placeholder():\n    assert True\n"
+        
+        write_files([{"path": test_path, "content": tests_src}])
+        logger.info(f"Tests written: {test_path}")
+        return test_path
+
+    def _merge_into_existing(client, module_name: str, spec: str, code_path: str):
+        """Adds the spec's functions that `code_path` does not define yet."""
+        with open(code_path, "r") as f:
+            existing_code = f.read()
+        
+        # Extract existing function names
+        existing_funcs = symbol_index.function_names(code_path)
+        
+        # Extract new functions from spec
+        try:
+            spec_json = json.loads(spec)
+            new_funcs = [f["name"] for f in spec_json.get("functions", [])]
+        except:
+            new_funcs = []
+        
+        # Filter out functions that already exist
+        funcs_to_add = [f for f in new_funcs if f not in existing_funcs]
+        
+        if not funcs_to_add:
+            logger.info(f"{module_name}: All functions already exist, skipping")
+            print(f"✓ {module_name}: Up to date")
+            return
+        
+        logger.info(f"{module_name}: Merging {len(funcs_to_add)} new functions into existing code")
+        print(f"🔄 {module_name}: Adding {funcs_to_add} to existing code")
+        
+        # Create filtered spec with only new functions
+        try:
+            spec_json = json.loads(spec)
+            spec_json["functions"] = [f for f in spec_json.get("functions", []) if f["name"] in funcs_to_add]
+            filtered_spec = json.dumps(spec_json)
+        except:
+            filtered_spec = spec
+        
+        # Ask only for the new definitions; they are spliced into the existing file locally,
+        # so output size depends on what is added rather than on the module's size
+        prompt_template = load_prompt("unified_code_additions.txt")
+        prompt = prompt_template.format(
+            existing_symbols=describe_module(code_path),
+            new_functions_spec=filtered_spec
+        )
+        additions = chat_completion(
+            client,
+            "code_merger",
+            model="gpt-4o",
+            messages=[
+                {"role": "system", "content": load_prompt("system_python_code_only.txt")},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.1,
+            spec=filtered_spec,
+        )
+        merge = splice_definitions(existing_code, additions)
+        for conflict in merge["conflicts"]:
+            logger.warning(f"{module_name}: merge conflict: {conflict}")
+        if merge["error"]:
+            logger.error(f"{module_name}: {merge['error']}. Keeping existing code.")
+        elif merge["added"]:
+            write_files([{"path": code_path, "content": merge["code"]}])
+            logger.info(f"Merged {merge['added']} into {code_path}")
+
+    def _write_code(client, module_name: str, spec: str, test_path: str) -> str:
+        module_dir = "modules"
+        os.makedirs(module_dir, exist_ok=True)
+        code_path = os.path.join(module_dir, f"{module_name}.py")
+        
+        tests_src = ""
+        if test_path and os.path.exists(test_path):
+            with open(test_path, "r") as f:
+                tests_src = f.read()
+        
+        prompt_template = load_prompt("unified_generate_code.txt")
+        prompt = prompt_template.format(spec=spec, tests_src=tests_src)
+
+        code_src = chat_completion(
+            client,
+            "generate_code",
+            model="gpt-4o",
+            messages=[
+                {"role": "system", "content": load_prompt("system_python_code_only.txt")},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.1,
+            top_p=0.95,
+            spec=spec,
+            default_max_tokens=3000,
+        ).strip()
+        code_src = re.sub(r'^```python\s*', '', code_src)
+        code_src = re.sub(r'```\s*$', '', code_src)
+        
+        try:
+            ast.parse(code_src)
+        except SyntaxError:
+            code_src = f'"""Module {module_name}"""\n\ndef placeholder():\n    pass\n'
+        
+        write_files([{"path": code_path, "content": code_src}])
+        logger.info(f"Code written: {code_path}")
+        return code_path
+
+    def _check_functions(module_name: str, spec: str, code_path: str):
+        """Warns about spec functions that `code_path` does not define."""
+        if not os.path.exists(code_path):
+            return
+        
+        # Extract function names from spec
+        try:
+            spec_json = json.loads(spec)
+            expected_funcs = [f["name"] for f in spec_json.get("functions", [])]
+        except Exception:
+            expected_funcs = []
+        
+        # Check if functions exist in code
+        actual_funcs = symbol_index.function_names(code_path)
+        
+        missing = [f for f in expected_funcs if f not in actual_funcs]
+        if missing:
+            logger.warning(f"{module_name}: Missing functions {missing}. Found: {actual_funcs}")
+
     def generate_tests(state: GenState) -> GenState:
         """
         Node: Generates pytest test files for each module based on its spec.
@@ -358,42 +547,8 @@ def run_unified_graph(project_key: str, ticket_keys: list):
         client = OpenAI(api_key=Settings.OPENAI_API_KEY)
         
         test_files = {}
-        test_dir = "generated_tests"
-        os.makedirs(test_dir, exist_ok=True)
-        
         for module_name, spec in specs.items():
-            test_path = os.path.join(test_dir, f"test_{module_name}.py")
-            
-            prompt_template = load_prompt("unified_generate_tests.txt")
-            prompt = prompt_template.format(module_name=module_name, spec=spec)
-            
-            resp = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": load_prompt("system_python_test_code_only.txt")},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1,
-                top_p=0.95,
-                max_tokens=3000,
-            )
-            
-            tests_src = (resp.choices[0].message.content or "").strip()
-            tests_src = re.sub(r'^```python\s*', '', tests_src)
-            tests_src = re.sub(r'```\s*$', '', tests_src)
-            
-            # Validate
-            if f"from modules.{module_name}" not in tests_src:
-                tests_src = f"import pytest\nfrom modules.{module_name} import *\n\n" + tests_src
-            
-            try:
-                ast.parse(tests_src)
-            except SyntaxError: # noqa: SIM105
-                tests_src = f"import pytest\nfrom modules.{module_name} import *\n\ndef test_placeholder():\n    assert True\n"
-            
-            write_files([{"path": test_path, "content": tests_src}])
-            test_files[module_name] = test_path
-            logger.info(f"Tests written: {test_path}")
+            test_files[module_name] = _write_tests(client, module_name, artifacts.get(spec))
         
         return {"test_files": test_files}
 
@@ -409,82 +564,18 @@ def run_unified_graph(project_key: str, ticket_keys: list):
         module_dir = "modules"
         os.makedirs(module_dir, exist_ok=True)
         
-        merged_specs = {}
-        
         for module_name, spec in specs.items():
             code_path = os.path.join(module_dir, f"{module_name}.py")
             
             # Check if module already exists
             if os.path.exists(code_path):
-                with open(code_path, "r") as f:
-                    existing_code = f.read()
-                
-                # Extract existing function names
-                existing_funcs = re.findall(r'^def (\w+)\(', existing_code, re.MULTILINE)
-                
-                # Extract new functions from spec
-                try:
-                    spec_json = json.loads(spec)
-                    new_funcs = [f["name"] for f in spec_json.get("functions", [])]
-                except:
-                    new_funcs = []
-                
-                # Filter out functions that already exist
-                funcs_to_add = [f for f in new_funcs if f not in existing_funcs]
-                
-                if funcs_to_add:
-                    logger.info(f"{module_name}: Merging {len(funcs_to_add)} new functions into existing code")
-                    print(f"🔄 {module_name}: Adding {funcs_to_add} to existing code")
-                    
-                    # Create filtered spec with only new functions
-                    try:
-                        spec_json = json.loads(spec)
-                        spec_json["functions"] = [f for f in spec_json.get("functions", []) if f["name"] in funcs_to_add]
-                        filtered_spec = json.dumps(spec_json)
-                    except:
-                        filtered_spec = spec
-                    
-                    # Use merger prompt
-                    prompt_template = load_prompt("unified_code_merger.txt")
-                    prompt = prompt_template.format(
-                        existing_code=existing_code,
-                        new_functions_spec=filtered_spec
-                    )
-                    
-                    resp = client.chat.completions.create(
-                        model="gpt-4o",
-                        messages=[
-                            {"role": "system", "content": load_prompt("system_python_code_only.txt")},
-                            {"role": "user", "content": prompt}
-                        ],
-                        temperature=0.1,
-                        max_tokens=3000,
-                    )
-                    
-                    merged_code = (resp.choices[0].message.content or "").strip()
-                    merged_code = re.sub(r'^```python\s*', '', merged_code)
-                    merged_code = re.sub(r'```\s*$', '', merged_code)
-                    
-                    # Validate merged code
-                    try:
-                        ast.parse(merged_code)
-                        write_files([{"path": code_path, "content": merged_code}])
-                        logger.info(f"Merged code written: {code_path}")
-                    except SyntaxError as e:
-                        logger.error(f"Merged code has syntax error: {e}. Keeping existing code.")
-                        # Keep existing code if merge fails
-                else:
-                    logger.info(f"{module_name}: All functions already exist, skipping")
-                    print(f"✓ {module_name}: Up to date")
-                
-                # Use original spec for downstream (tests still need to cover all functions)
-                merged_specs[module_name] = spec
+                _merge_into_existing(client, module_name, artifacts.get(spec), code_path)
             else:
                 # New module - use full spec for generation
                 logger.info(f"{module_name}: New module, will generate from scratch")
-                merged_specs[module_name] = spec
         
-        return {"specs": merged_specs}
+        # The original specs go downstream (tests still need to cover all functions)
+        return {"specs": specs}
 
     def generate_code(state: GenState) -> GenState:
         """
@@ -510,39 +601,7 @@ def run_unified_graph(project_key: str, ticket_keys: list):
                 logger.info(f"Using existing module: {code_path}")
                 continue
             
-            test_path = test_files.get(module_name, "")
-            
-            tests_src = ""
-            if test_path and os.path.exists(test_path):
-                with open(test_path, "r") as f:
-                    tests_src = f.read()
-            
-            prompt_template = load_prompt("unified_generate_code.txt")
-            prompt = prompt_template.format(spec=spec, tests_src=tests_src)
-
-            resp = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": load_prompt("system_python_code_only.txt")},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1,
-                top_p=0.95,
-                max_tokens=3000,
-            )
-            
-            code_src = (resp.choices[0].message.content or "").strip()
-            code_src = re.sub(r'^```python\s*', '', code_src)
-            code_src = re.sub(r'```\s*$', '', code_src)
-            
-            try:
-                ast.parse(code_src)
-            except SyntaxError:
-                code_src = f'"""Module {module_name}"""\n\ndef placeholder():\n    pass\n'
-            
-            write_files([{"path": code_path, "content": code_src}])
-            code_files[module_name] = code_path
-            logger.info(f"Code written: {code_path}")
+            code_files[module_name] = _write_code(client, module_name, artifacts.get(spec), test_files.get(module_name, ""))
         
         # Generate __init__.py
         init_path = os.path.join(module_dir, "__init__.py")
@@ -557,26 +616,7 @@ def run_unified_graph(project_key: str, ticket_keys: list):
         specs = state.get("specs", {})
         
         for module_name, code_path in code_files.items():
-            if not os.path.exists(code_path):
-                continue
-            
-            with open(code_path, "r") as f:
-                code_content = f.read()
-            
-            # Extract function names from spec
-            spec = specs.get(module_name, "")
-            try:
-                spec_json = json.loads(spec)
-                expected_funcs = [f["name"] for f in spec_json.get("functions", [])]
-            except Exception:
-                expected_funcs = []
-            
-            # Check if functions exist in code
-            actual_funcs = re.findall(r'^def (\w+)\(', code_content, re.MULTILINE)
-            
-            missing = [f for f in expected_funcs if f not in actual_funcs]
-            if missing:
-                logger.warning(f"{module_name}: Missing functions {missing}. Found: {actual_funcs}")
+            _check_functions(module_name, artifacts.get(specs.get(module_name)), code_path)
         
         return {}
 
@@ -587,9 +627,9 @@ def run_unified_graph(project_key: str, ticket_keys: list):
         using the architecture plan and actual generated functions as a guide.
         """
         _log_phase("generate_main_app")
-        architecture_plan = state.get("architecture_plan", "")
+        architecture_plan = artifacts.get(state.get("architecture_plan"))
         modules = state.get("modules", {})
-        specs = state.get("specs", {})
+        specs = artifacts.get_map(state.get("specs", {}))
         code_files = state.get("code_files", {})
         client = OpenAI(api_key=Settings.OPENAI_API_KEY)
         
@@ -597,9 +637,7 @@ def run_unified_graph(project_key: str, ticket_keys: list):
         actual_functions = {}
         for module_name, code_path in code_files.items():
             if code_path and os.path.exists(code_path):
-                with open(code_path, "r") as f:
-                    code_content = f.read()
-                funcs = re.findall(r'^def (\w+)\(', code_content, re.MULTILINE)
+                funcs = symbol_index.function_names(code_path)
                 actual_functions[module_name] = funcs
                 logger.info(f"{module_name} actual functions: {funcs}")
         
@@ -618,7 +656,7 @@ def run_unified_graph(project_key: str, ticket_keys: list):
         # Load ONLY the relevant reference example for this pattern
         reference_code = ""
         if ui_pattern == "button_grid":
-            ref_path = "reference_examples/streamlit_apps/calculator_with_memory.py"
+            ref_path = os.path.join(PROJECT_ROOT, "reference_examples", "streamlit_apps", "calculator_with_memory.py")
             if os.path.exists(ref_path):
                 with open(ref_path, 'r') as f:
                     reference_code = f.read()
@@ -661,7 +699,16 @@ def run_unified_graph(project_key: str, ticket_keys: list):
             + pattern_guidance
         )
         
-        resp = client.chat.completions.create(
+        # Size the app budget from all module specs combined
+        all_functions = []
+        for spec in specs.values():
+            try:
+                all_functions.extend(json.loads(spec).get("functions", []))
+            except (json.JSONDecodeError, AttributeError):
+                continue
+        app_src = chat_completion(
+            client,
+            "generate_main_app",
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": load_prompt("system_python_code_only.txt")},
@@ -669,10 +716,9 @@ def run_unified_graph(project_key: str, ticket_keys: list):
             ],
             temperature=0.1,
             top_p=0.95,
-            max_tokens=4000,
-        )
-        
-        app_src = (resp.choices[0].message.content or "").strip()
+            spec=json.dumps({"functions": all_functions}),
+            default_max_tokens=4000,
+        ).strip()
         app_src = re.sub(r'^```python\s*', '', app_src)
         app_src = re.sub(r'```\s*$', '', app_src)
         
@@ -687,23 +733,20 @@ def run_unified_graph(project_key: str, ticket_keys: list):
         write_files([{"path": app_path, "content": app_src}])
         logger.info(f"Main app written: {app_path}")
         
-        return {"app_path": app_path}
+        return {"app_path": app_path, "app_fix_iteration": 0}
 
     def ui_designer(state: GenState) -> GenState:
         """Analyze functions and design optimal UI layout."""
         _log_phase("ui_designer")
         code_files = state.get("code_files", {})
-        epic_description = state.get("epic_description", "")
+        epic_description = artifacts.get(state.get("epic_description"))
         client = OpenAI(api_key=Settings.OPENAI_API_KEY)
         
         # Read actual functions
         actual_functions = {}
         for module_name, code_path in code_files.items():
             if os.path.exists(code_path):
-                with open(code_path, "r") as f:
-                    code_content = f.read()
-                funcs = re.findall(r'^def (\w+)\(', code_content, re.MULTILINE)
-                actual_functions[module_name] = funcs
+                actual_functions[module_name] = symbol_index.function_names(code_path)
         
         functions_list = "\n".join([f"{mod}: {', '.join(funcs)}" for mod, funcs in actual_functions.items()])
         
@@ -720,10 +763,8 @@ def run_unified_graph(project_key: str, ticket_keys: list):
             f"AVAILABLE FUNCTIONS:\n{functions_list}\n"
         )
         
-        resp = client.chat.completions.create(
-            model="gpt-4o", messages=[{"role": "user", "content": prompt}], max_tokens=300)
-        
-        ui_design = resp.choices[0].message.content
+        ui_design = chat_completion(
+            client, "ui_designer", model="gpt-4o", messages=[{"role": "user", "content": prompt}], default_max_tokens=300)
         logger.info(f"UI design:\n{ui_design}")
         
         # Extract UI pattern
@@ -741,7 +782,11 @@ def run_unified_graph(project_key: str, ticket_keys: list):
             print("🎨 UI: Sidebar navigation")
         
         # Return the chosen pattern and design guidance for the next step
-        return {"ui_pattern": ui_pattern, "ui_design": ui_design or ""}
+        return {"ui_pattern": ui_pattern, "ui_design": artifacts.put(ui_design)}
+
+    def _slim_result(res: dict) -> dict:
+        """A pytest result for the state: the raw output goes to the artifact store."""
+        return {**res, "output": artifacts.put(res.get("output", ""))}
 
     def run_tests_node(state: GenState) -> GenState:
         """
@@ -752,29 +797,134 @@ def run_unified_graph(project_key: str, ticket_keys: list):
         
         total_passed = 0
         total_failed = 0
-        test_results = {}
         
-        for module_name, test_path in test_files.items():
-            # Add current directory to Python path for module imports
-            extra_paths = [os.path.abspath(".")]
-            
-            res = run_pytest(test_path, extra_paths=extra_paths)
-            test_results[module_name] = res
+        # Add current directory to Python path for module imports
+        extra_paths = [os.path.abspath(".")]
+        # All module suites run in parallel; each run reports through its own result channel
+        test_results = run_pytest_many(test_files, extra_paths=extra_paths)
+        
+        for module_name, res in test_results.items():
             total_passed += res.get("passed", 0)
             total_failed += res.get("failed", 0)
-            logger.info(f"{module_name}: {res.get('passed', 0)} passed, {res.get('failed', 0)} failed")
+            note = " (cached, inputs unchanged)" if res.get("cached") else ""
+            if res.get("partial"):
+                note += " (previous failures only)"
+            logger.info(f"{module_name}: {res.get('passed', 0)} passed, {res.get('failed', 0)} failed{note}")
         
-        # Aggregate test output for the fixer
-        aggregated_output = "\n".join([f"--- {mod} ---\n{res.get('output', '')}" for mod, res in test_results.items()])
+        # Compact per-test failure records replace the raw -v output for the fixer
+        test_failures = {mod: res.get("failures", []) for mod, res in test_results.items() if res.get("failures")}
+        aggregated_output = "\n".join([f"--- {mod} ---\n{format_records(records)}" for mod, records in test_failures.items()])
         
         return {
-            "test_results": test_results,
-            "test_output": aggregated_output,
+            "test_results": {mod: _slim_result(res) for mod, res in test_results.items()},
+            "test_failures": test_failures,
+            "test_output": artifacts.put(aggregated_output),
             "passed": total_passed,
             "failed": total_failed,
             "collected": sum(res.get("collected") or 0 for res in test_results.values())
         }
 
+    def _analyze_failures(client, module_name: str, spec: str, res: dict, records: list,
+                          test_path: str, code_path: str, fix_memo: dict) -> dict:
+        """
+        Asks for a fix for one module's failures, unless the memo shows every strategy was tried.
+
+        Returns:
+            dict: {"recommendations": str or None when giving up, "fix_memo": the updated memo}
+        """
+        logger.info(f"Analyzing failures for {module_name}...")
+        # Without records (e.g. nothing collected) the raw output is the only evidence
+        output = artifacts.get(res.get("output"))
+        pytest_out = format_records(records) if records else output
+
+        # Failure fingerprints seen and fixes tried against them, to catch repeats and cycles
+        failure_key = failure_set_key(records or [], output)
+        step = next_step(fix_memo, module_name, failure_key)
+        if step["cycle"]:
+            logger.warning(f"{module_name}: failures are back to an earlier lap's set; the fix loop is cycling")
+        if step["strategy"] == "stop":
+            logger.error(f"{module_name}: every fix strategy was already tried against these failures; giving up")
+            return {"recommendations": None, "fix_memo": record_attempt(fix_memo, module_name, failure_key, "stop")}
+        
+        # With function coverage, only code executed by the failing tests goes into the prompt
+        rootdir = res.get("rootdir", "")
+        current_tests = focused_source(test_path, records or [], rootdir) if test_path else ""
+        current_code = focused_source(code_path, records or [], rootdir) if code_path else ""
+
+        prompt_template = load_prompt("unified_fix_analyzer.txt")
+        fix_prompt = prompt_template.format(
+            module_name=module_name,
+            spec=spec,
+            pytest_out=pytest_out,
+            current_tests=current_tests,
+            current_code=current_code
+        )
+        if step["strategy"] == "alternate":
+            logger.info(f"{module_name}: same failures as an earlier attempt; asking for a different fix")
+            fix_prompt += previous_attempts_note(step["previous"])
+        recommendations = chat_completion(
+            client, "fix_analyzer", model="gpt-4o", messages=[{"role": "user", "content": fix_prompt}],
+            temperature=0.2, top_p=0.95, default_max_tokens=1000)
+        logger.info(f"Fix recommendations for {module_name}:\n{recommendations}")
+        return {"recommendations": recommendations or "",
+                "fix_memo": record_attempt(fix_memo, module_name, failure_key, step["strategy"], recommendations or "")}
+
+    def _apply_fix(client, module_name: str, fix_block: str, code_path: str, test_path: str):
+        """Applies one module's fix block to its code and test files (as a patch, else full files)."""
+        logger.info(f"Applying fixes for module: {module_name}")
+        current_code = read_text_safe(code_path or "")
+        current_tests = read_text_safe(test_path or "")
+
+        if Settings.FIX_OUTPUT == "patch":
+            files = {path: content for path, content in ((code_path, current_code), (test_path, current_tests)) if path}
+            patch_prompt = load_prompt("unified_fixer_agent_patch.txt").format(
+                module_name=module_name,
+                fix_block=fix_block,
+                code_path=code_path,
+                current_code=current_code,
+                test_path=test_path,
+                current_tests=current_tests,
+                patch_protocol=load_prompt("patch_protocol.txt"),
+            )
+            # Output scales with the edits, so the budget comes from this node's own history
+            patch = chat_completion(
+                client, "fixer_agent_patch", model="gpt-4o", messages=[{"role": "user", "content": patch_prompt}],
+                temperature=0.2, top_p=0.95, default_max_tokens=1500)
+            outcome = apply_patch(patch, files)
+            if outcome["error"] is None:
+                write_files([{"path": path, "content": content} for path, content in outcome["files"].items()])
+                logger.info(f"Patched {module_name}: {', '.join(outcome['files'])}")
+                return
+            logger.warning(f"Patch for {module_name} did not apply ({outcome['error']}); requesting full files")
+
+        prompt_template = load_prompt("unified_fixer_agent.txt")
+        fix_prompt = prompt_template.format(
+            module_name=module_name,
+            fix_block=fix_block,
+            code_path=code_path,
+            current_code=current_code,
+            test_path=test_path,
+            current_tests=current_tests
+        )
+        # The fixer re-emits whole files, so size the budget from what it may rewrite
+        fixed_content = chat_completion(
+            client, "fixer_agent", model="gpt-4o", messages=[{"role": "user", "content": fix_prompt}],
+            temperature=0.2, top_p=0.95, source=current_code + current_tests, default_max_tokens=4000)
+        
+        # Extract and write fixed files
+        file_blocks = re.findall(r"--- START FILE: (.*?) ---\n(.*?)\n--- END FILE: \1 ---", fixed_content or "", re.DOTALL)
+        if not file_blocks:
+            logger.warning(f"Fixer agent for {module_name} did not produce valid file blocks. Skipping fix.")
+            return
+
+        for file_path, content in file_blocks:
+            file_path = file_path.strip()
+            # Clean markdown from content
+            content = re.sub(r'^```(python|py)?\s*', '', content.strip()) # More robust regex
+            content = re.sub(r'```\s*$', '', content)
+            write_files([{"path": file_path, "content": content}])
+            logger.info(f"Applied fix to: {file_path}")
+
     def fix_analyzer(state: GenState) -> GenState:
         """Analyze failures across all modules and provide fix recommendations."""
         _log_phase("fix_analyzer")
@@ -796,66 +946,48 @@ def run_unified_graph(project_key: str, ticket_keys: list):
         test_files = state.get("test_files", {})
         code_files = state.get("code_files", {})
         test_results = state.get("test_results", {})
-        prev_failures = state.get("prev_failures", {})
-        
-        # Check for infinite loop
-        current_failures = {mod: res.get("failed", 0) for mod, res in test_results.items() if res.get("failed", 0) > 0}
-        if prev_failures and prev_failures == current_failures:
-            logger.error("Failures are identical to the previous run. Breaking loop to prevent recursion.")
-            print("⚠️  Stuck on the same test failures. Stopping fix attempts.")
-            return {"needs_fix": False, "stuck": True}
+        fix_memo = state.get("fix_memo", {})
+        stuck_modules = []
 
-        
         all_recommendations = []
         fix_targets = set()
         client = OpenAI(api_key=Settings.OPENAI_API_KEY)
 
         for module_name, res in test_results.items():
             if res.get("failed", 0) > 0 or res.get("collected", 0) == 0:
-                logger.info(f"Analyzing failures for {module_name}...")
-                spec = specs.get(module_name, "")
-                pytest_out = res.get("output", "")
-                test_path = test_files.get(module_name)
-                code_path = code_files.get(module_name)
-                
-                current_tests = read_text_safe(test_path or "")
-                current_code = read_text_safe(code_path or "")
-
-                prompt_template = load_prompt("unified_fix_analyzer.txt")
-                fix_prompt = prompt_template.format(
-                    module_name=module_name,
-                    spec=spec,
-                    pytest_out=pytest_out,
-                    current_tests=current_tests,
-                    current_code=current_code
-                )
-                resp = client.chat.completions.create(
-                    model="gpt-4o", messages=[{"role": "user", "content": fix_prompt}], temperature=0.2, top_p=0.95, max_tokens=1000)
-                
-                recommendations = resp.choices[0].message.content
-                logger.info(f"Fix recommendations for {module_name}:\n{recommendations}")
+                records = state.get("test_failures", {}).get(module_name) or res.get("failures")
+                analysis = _analyze_failures(client, module_name, artifacts.get(specs.get(module_name)), res, records,
+                                             test_files.get(module_name), code_files.get(module_name), fix_memo)
+                fix_memo = analysis["fix_memo"]
+                recommendations = analysis["recommendations"]
+                if recommendations is None:
+                    stuck_modules.append(module_name)
+                    continue
                 all_recommendations.append(f"--- FIX FOR MODULE: {module_name} ---\n{recommendations}")
                 
-                if "FIX_TARGET: TESTS" in (recommendations or "").upper():
+                if "FIX_TARGET: TESTS" in recommendations.upper():
                     fix_targets.add("TESTS")
-                elif "FIX_TARGET: CODE" in (recommendations or "").upper():
+                elif "FIX_TARGET: CODE" in recommendations.upper():
                     fix_targets.add("CODE")
                 else: fix_targets.add("BOTH")
 
         if all_recommendations:
             return {
                 "needs_fix": True,
-                "fix_recommendations": "\n\n".join(all_recommendations),
+                "fix_recommendations": artifacts.put("\n\n".join(all_recommendations)),
                 "fix_type": ",".join(list(fix_targets)),
-                "prev_failures": current_failures, # Save current failures for next iteration
+                "fix_memo": fix_memo,
             }
-        return {"needs_fix": False}
+        if stuck_modules:
+            print(f"⚠️  Stuck on repeated test failures in {', '.join(stuck_modules)}. Stopping fix attempts.")
+            return {"needs_fix": False, "stuck": True, "fix_memo": fix_memo}
+        return {"needs_fix": False, "fix_memo": fix_memo}
 
     def fixer_agent(state: GenState) -> GenState:
         """Apply fixes to multiple modules based on aggregated recommendations."""
         _log_phase("fixer_agent")
         
-        fix_recommendations = state.get("fix_recommendations", "")
+        fix_recommendations = artifacts.get(state.get("fix_recommendations"))
         client = OpenAI(api_key=Settings.OPENAI_API_KEY)
         
         # Split recommendations by module
@@ -867,41 +999,8 @@ def run_unified_graph(project_key: str, ticket_keys: list):
             module_name_match = re.search(r"^(.*?) ---", fix_block.strip())
             if not module_name_match: continue
             module_name = module_name_match.group(1).strip()
-            logger.info(f"Applying fixes for module: {module_name}")
-
-            code_path = state.get("code_files", {}).get(module_name)
-            test_path = state.get("test_files", {}).get(module_name)
-            
-            current_code = read_text_safe(code_path or "")
-            current_tests = read_text_safe(test_path or "")
-
-            prompt_template = load_prompt("unified_fixer_agent.txt")
-            fix_prompt = prompt_template.format(
-                module_name=module_name,
-                fix_block=fix_block,
-                code_path=code_path,
-                current_code=current_code,
-                test_path=test_path,
-                current_tests=current_tests
-            )
-            resp = client.chat.completions.create(
-                model="gpt-4o", messages=[{"role": "user", "content": fix_prompt}], temperature=0.2, top_p=0.95, max_tokens=4000)
-            
-            fixed_content = resp.choices[0].message.content
-            
-            # Extract and write fixed files
-            file_blocks = re.findall(r"--- START FILE: (.*?) ---\n(.*?)\n--- END FILE: \1 ---", fixed_content or "", re.DOTALL)
-            if not file_blocks:
-                logger.warning(f"Fixer agent for {module_name} did not produce valid file blocks. Skipping fix.")
-                continue
-
-            for file_path, content in file_blocks:
-                file_path = file_path.strip()
-                # Clean markdown from content
-                content = re.sub(r'^```(python|py)?\s*', '', content.strip()) # More robust regex
-                content = re.sub(r'```\s*$', '', content)
-                write_files([{"path": file_path, "content": content}])
-                logger.info(f"Applied fix to: {file_path}")
+            _apply_fix(client, module_name, fix_block,
+                       state.get("code_files", {}).get(module_name), state.get("test_files", {}).get(module_name))
 
         return {}
 
@@ -916,74 +1015,41 @@ def run_unified_graph(project_key: str, ticket_keys: list):
         with open(app_path, "r") as f:
             app_code = f.read()
 
-        errors = []
-
-        # Check for syntax errors FIRST - this is critical
-        try:
-            ast.parse(app_code)
-        except SyntaxError as e:
-            errors.append(f"Syntax error at line {e.lineno}: {e.msg}. Check for unterminated strings, missing quotes, or unmatched brackets.")
-            logger.error(f"App syntax error: {e}")
-
-        # Check for common Streamlit button issues
-        if 'on_click=' in app_code and 'st.button' in app_code:
-            errors.append("Buttons use 'on_click' callbacks which cause issues. Use 'if st.button():' pattern with st.rerun() instead.")
-        
-        # Check for missing button keys (causes duplicate ID errors)
-        button_pattern = r'st\.button\([^)]+\)'
-        buttons = re.findall(button_pattern, app_code)
-        for btn in buttons:
-            if 'key=' not in btn:
-                errors.append(f"Button without unique key found: {btn}. ALL buttons must have key parameter to avoid duplicate ID errors.")
-
-        # Check if buttons update session_state but don't call st.rerun()
-        if 'st.session_state' in app_code and 'if st.button(' in app_code:
-            if 'st.rerun()' not in app_code:
-                errors.append("Buttons update session_state but don't call st.rerun(). Add st.rerun() after state updates for immediate display refresh.")
-        
-        # Check for disabled text_input used as display (doesn't update properly)
-        if 'disabled=True' in app_code and 'st.session_state' in app_code:
-            errors.append("Using disabled text_input for display. Use st.markdown() or st.text() instead for proper state updates.")
-        
-        # Check for incorrect markdown formatting (backticks outside f-string)
-        if 'st.markdown(f"`{' in app_code or 'st.markdown(f"\\`{' in app_code:
-            errors.append("Incorrect markdown format. Use: st.markdown(f'### Display: `{st.session_state.display}`') with backticks INSIDE the f-string.")
-
-        # Check imports match available modules and functions
-        code_files = state.get("code_files", {})
-        
-        # Extract all imports: from modules.X import func1, func2
-        import_pattern = r'from modules\.(\w+) import ([\w, ]+)'
-        imports = re.findall(import_pattern, app_code)
-        
-        for module_name, funcs_str in imports:
-            # Check if module exists
-            if module_name not in code_files:
-                errors.append(f"Import error: modules.{module_name} doesn't exist. Available: {list(code_files.keys())}")
-                continue
-            
-            # Check if functions exist in the module
-            module_path = code_files[module_name]
-            if os.path.exists(module_path):
-                with open(module_path, 'r') as f:
-                    module_code = f.read()
-                available_funcs = re.findall(r'^def (\w+)\(', module_code, re.MULTILINE)
-                
-                # Parse imported function names
-                imported_funcs = [f.strip() for f in funcs_str.split(',')]
-                
-                # Check each imported function
-                for func in imported_funcs:
-                    if func not in available_funcs:
-                        errors.append(f"Import error: {func} not found in modules.{module_name}. Available: {available_funcs}")
-
+        # One AST pass runs every registered rule (see utils/app_rules.py)
+        issues = check_app(app_code)
+        if issues and issues[0]["rule"] == "syntax":
+            logger.error(f"App syntax error: {format_issue(issues[0])}")
+        else:
+            # Static import graph of app.py and modules/: every bad name in one pass, nothing executed
+            issues = check_imports(app_path) + issues
+        errors = [format_issue(issue) for issue in issues]
         
         logger.info(f"App validation: {len(errors)} errors found")
         if errors:
             for err in errors:
                 logger.warning(f"  - {err}")
         
-        return {"app_errors": errors, "app_fix_iteration": 0}
+        # The fix counter is reset by generate_main_app only, so validate -> fix laps stay bounded
+        return {"app_errors": errors}
+
+    def smoke_app(state: GenState) -> GenState:
+        """Run app.py headlessly and click every keyed button; exceptions go to fix_app."""
+        _log_phase("smoke_app")
+        app_path = state.get("app_path", "app.py")
+        if not Settings.APP_SMOKE:
+            return {"app_errors": []}
+        try:
+            import streamlit.testing.v1  # noqa: F401
+        except ImportError:
+            logger.warning("streamlit.testing is not available; skipping the app smoke run")
+            return {"app_errors": []}
+
+        issues = run_app_smoke(app_path)
+        errors = [format_issue(issue) for issue in issues]
+        logger.info(f"App smoke run: {len(errors)} runtime errors found")
+        for err in errors:
+            logger.warning(f"  - {err}")
+        return {"app_errors": errors}
 
     def fix_app(state: GenState) -> GenState:
         """Fix Streamlit app based on validation errors."""
@@ -1005,14 +1071,11 @@ def run_unified_graph(project_key: str, ticket_keys: list):
         available_functions = {}
         for mod_name, mod_path in code_files.items():
             if os.path.exists(mod_path):
-                with open(mod_path, 'r') as f:
-                    mod_code = f.read()
-                funcs = re.findall(r'^def (\w+)\(', mod_code, re.MULTILINE)
-                available_functions[mod_name] = funcs
+                available_functions[mod_name] = symbol_index.function_names(mod_path)
         
         funcs_text = "\n".join([f"modules.{mod}: {', '.join(funcs)}" for mod, funcs in available_functions.items()])
         
-        prompt = (
+        rules = (
             "Fix the Streamlit app based on these errors. Follow Streamlit best practices.\n"
             "CRITICAL RULES:\n"
             "1. EVERY st.button() MUST have a unique key parameter: st.button('7', key='7')\n"
@@ -1022,14 +1085,25 @@ def run_unified_graph(project_key: str, ticket_keys: list):
             "5. ONLY import functions that actually exist in the modules\n\n"
             f"AVAILABLE FUNCTIONS:\n{funcs_text}\n\n"
             f"ERRORS TO FIX:\n{errors_text}\n\n"
-            f"CURRENT APP:\n{current_app}\n\n"
-            "OUTPUT: Only the fixed Python code, no markdown."
         )
-        
-        resp = client.chat.completions.create(
-            model="gpt-4o", messages=[{"role": "user", "content": prompt}], temperature=0.2, max_tokens=4000)
-        
-        fixed_app = (resp.choices[0].message.content or "").strip()
+
+        if Settings.FIX_OUTPUT == "patch":
+            patch_prompt = (
+                rules + f"--- CURRENT FILE: {app_path} ---\n{current_app}\n\n" + load_prompt("patch_protocol.txt"))
+            patch = chat_completion(
+                client, "fix_app_patch", model="gpt-4o", messages=[{"role": "user", "content": patch_prompt}],
+                temperature=0.2, default_max_tokens=1500)
+            outcome = apply_patch(patch, {app_path: current_app}, default_path=app_path)
+            if outcome["error"] is None:
+                write_files([{"path": app_path, "content": outcome["files"].get(app_path, current_app)}])
+                return {"app_fix_iteration": iteration + 1}
+            logger.warning(f"App patch did not apply ({outcome['error']}); requesting the full file")
+
+        prompt = rules + f"CURRENT APP:\n{current_app}\n\nOUTPUT: Only the fixed Python code, no markdown."
+
+        fixed_app = chat_completion(
+            client, "fix_app", model="gpt-4o", messages=[{"role": "user", "content": prompt}],
+            temperature=0.2, source=current_app, default_max_tokens=4000).strip()
         fixed_app = re.sub(r'^```python\s*', '', fixed_app)
         fixed_app = re.sub(r'```\s*$', '', fixed_app)
         
@@ -1041,7 +1115,7 @@ def run_unified_graph(project_key: str, ticket_keys: list):
         _log_phase("quality_reviewer")
         
         client = OpenAI(api_key=Settings.OPENAI_API_KEY)
-        specs = state.get("specs", {})
+        specs = artifacts.get_map(state.get("specs", {}))
         passed = state.get("passed", 0)
         failed = state.get("failed", 0)
 
@@ -1054,18 +1128,18 @@ def run_unified_graph(project_key: str, ticket_keys: list):
             specs_text=specs_text,
         )
         
-        resp = client.chat.completions.create(
+        review_report = chat_completion(
+            client,
+            "quality_reviewer",
             model="gpt-4o-mini",
             messages=[{"role": "user", "content": review_prompt}],
             temperature=0.2,
             top_p=0.95,
-            max_tokens=1500,
+            default_max_tokens=1500,
         )
-        
-        review_report = resp.choices[0].message.content
         logger.info(f"Quality Review Report:\n{review_report}")
         
-        return {"review_report": review_report or ""}
+        return {"review_report": artifacts.put(review_report)}
 
     def senior_dev_reviewer(state: GenState) -> GenState:
         """Senior developer reviews if the integrated app will run."""
@@ -1073,7 +1147,7 @@ def run_unified_graph(project_key: str, ticket_keys: list):
         
         app_path = state.get("app_path")
         app_code = read_text_safe(app_path or "")
-        architecture_plan = state.get("architecture_plan", "")
+        architecture_plan = artifacts.get(state.get("architecture_plan"))
         
         client = OpenAI(api_key=Settings.OPENAI_API_KEY)
         
@@ -1083,18 +1157,18 @@ def run_unified_graph(project_key: str, ticket_keys: list):
             app_code=app_code
         )
         
-        resp = client.chat.completions.create(
+        review = chat_completion(
+            client,
+            "senior_dev_reviewer",
             model="gpt-4o-mini",
             messages=[{"role": "user", "content": senior_prompt}],
             temperature=0.1,
             top_p=0.95,
-            max_tokens=1000,
+            default_max_tokens=1000,
         )
-        
-        review = resp.choices[0].message.content
         logger.info(f"Senior Dev Review:\n{review}")
         
-        return {"senior_dev_review": review or ""}
+        return {"senior_dev_review": artifacts.put(review)}
 
     def architecture_reviewer(state: GenState) -> GenState:
         """Architect reviews the final application against the plan."""
@@ -1102,7 +1176,7 @@ def run_unified_graph(project_key: str, ticket_keys: list):
         
         app_path = state.get("app_path")
         app_code = read_text_safe(app_path or "")
-        architecture_plan = state.get("architecture_plan", "")
+        architecture_plan = artifacts.get(state.get("architecture_plan"))
         
         client = OpenAI(api_key=Settings.OPENAI_API_KEY)
         
@@ -1112,18 +1186,150 @@ def run_unified_graph(project_key: str, ticket_keys: list):
             app_code=app_code
         )
         
-        resp = client.chat.completions.create(
+        review = chat_completion(
+            client,
+            "architecture_reviewer",
             model="gpt-4o-mini",
             messages=[{"role": "user", "content": arch_prompt}],
             temperature=0.1,
             top_p=0.95,
-            max_tokens=1000,
+            default_max_tokens=1000,
         )
-        
-        review = resp.choices[0].message.content
         logger.info(f"Architecture Review:\n{review}")
         
-        return {"architecture_review": review or ""}
+        return {"architecture_review": artifacts.put(review)}
+
+    class ModuleState(TypedDict, total=False):
+        """One module's run through the per-module pipeline (Settings.MODULE_PIPELINE)."""
+        module_name: str
+        module_info: dict
+        tickets: list  # this module's tickets only
+        spec: str  # artifact reference, like fix_block
+        test_path: str
+        code_path: str
+        test_result: dict
+        failures: list
+        fix_memo: dict  # agents/fix_memo.py memo holding this module only
+        fix_block: str
+        fix_laps: int
+        stuck: bool
+        module_results: Annotated[dict, merge_module_results]
+
+    class ModuleOutput(TypedDict, total=False):
+        module_results: Annotated[dict, merge_module_results]
+
+    def module_spec(state: ModuleState) -> ModuleState:
+        """Pipeline node: writes and reviews this module's spec."""
+        module_name = state["module_name"]
+        _log_phase(f"spec_agent [{module_name}]")
+        client = OpenAI(api_key=Settings.OPENAI_API_KEY)
+        spec = _write_spec(client, module_name, state["module_info"], state.get("tickets", []))
+        _review_spec(client, module_name, spec)
+        return {"spec": artifacts.put(spec)}
+
+    def module_tests(state: ModuleState) -> ModuleState:
+        """Pipeline node: writes this module's tests from its spec."""
+        module_name = state["module_name"]
+        _log_phase(f"generate_tests [{module_name}]")
+        client = OpenAI(api_key=Settings.OPENAI_API_KEY)
+        return {"test_path": _write_tests(client, module_name, artifacts.get(state["spec"]))}
+
+    def module_code(state: ModuleState) -> ModuleState:
+        """Pipeline node: merges new functions into an existing module, or writes it from scratch."""
+        module_name = state["module_name"]
+        _log_phase(f"generate_code [{module_name}]")
+        client = OpenAI(api_key=Settings.OPENAI_API_KEY)
+        spec = artifacts.get(state["spec"])
+        code_path = os.path.join("modules", f"{module_name}.py")
+        if os.path.exists(code_path):
+            _merge_into_existing(client, module_name, spec, code_path)
+        else:
+            code_path = _write_code(client, module_name, spec, state.get("test_path", ""))
+        write_files([{"path": os.path.join("modules", "__init__.py"), "content": ""}])
+        _check_functions(module_name, spec, code_path)
+        return {"code_path": code_path}
+
+    def module_run_tests(state: ModuleState) -> ModuleState:
+        """Pipeline node: runs this module's test suite."""
+        module_name = state["module_name"]
+        _log_phase(f"run_tests [{module_name}]")
+        res = run_pytest_many({module_name: state["test_path"]}, extra_paths=[os.path.abspath(".")])[module_name]
+        note = " (cached, inputs unchanged)" if res.get("cached") else ""
+        if res.get("partial"):
+            note += " (previous failures only)"
+        logger.info(f"{module_name}: {res.get('passed', 0)} passed, {res.get('failed', 0)} failed{note}")
+        return {"test_result": _slim_result(res), "failures": res.get("failures", [])}
+
+    def module_fix_analyzer(state: ModuleState) -> ModuleState:
+        """Pipeline node: asks for a fix while this module's tests fail; an empty fix_block ends its run."""
+        module_name = state["module_name"]
+        _log_phase(f"fix_analyzer [{module_name}]")
+        res = state.get("test_result", {})
+        if res.get("failed", 0) == 0 and res.get("collected", 0) > 0:
+            logger.info(f"{module_name}: All tests passed.")
+            return {"fix_block": ""}
+        if state.get("fix_laps", 0) >= MAX_FIX_LAPS:
+            logger.error(f"{module_name}: still failing after {MAX_FIX_LAPS} fix laps; giving up")
+            print(f"⚠️  {module_name}: still failing after {MAX_FIX_LAPS} fix laps. Stopping fix attempts.")
+            return {"fix_block": "", "stuck": True}
+        analysis = _analyze_failures(
+            OpenAI(api_key=Settings.OPENAI_API_KEY), module_name, artifacts.get(state["spec"]), res, state.get("failures"),
+            state.get("test_path"), state.get("code_path"), state.get("fix_memo", {}))
+        if analysis["recommendations"] is None:
+            print(f"⚠️  Stuck on repeated test failures in {module_name}. Stopping fix attempts.")
+            return {"fix_block": "", "stuck": True, "fix_memo": analysis["fix_memo"]}
+        # Same block format fixer_agent splits out of the staged graph's fix_recommendations
+        return {"fix_block": artifacts.put(f"{module_name} ---\n{analysis['recommendations']}"),
+                "fix_memo": analysis["fix_memo"]}
+
+    def module_fixer(state: ModuleState) -> ModuleState:
+        """Pipeline node: applies the fix, then the tests run again."""
+        module_name = state["module_name"]
+        _log_phase(f"fixer_agent [{module_name}]")
+        _apply_fix(OpenAI(api_key=Settings.OPENAI_API_KEY), module_name, artifacts.get(state["fix_block"]),
+                   state.get("code_path"), state.get("test_path"))
+        return {"fix_laps": state.get("fix_laps", 0) + 1}
+
+    def module_done(state: ModuleState) -> ModuleState:
+        """Pipeline node: freezes this module's API and reports its result to the parent graph."""
+        module_name = state["module_name"]
+        res = state.get("test_result", {})
+        logger.info(f"{module_name}: API frozen ({res.get('passed', 0)} passed, {res.get('failed', 0)} failed)")
+        return {"module_results": {module_name: {
+            "spec": state.get("spec", ""),
+            "test_path": state.get("test_path"),
+            "code_path": state.get("code_path"),
+            "test_result": res,
+            "failures": state.get("failures", []),
+            "fix_memo": state.get("fix_memo", {}).get(module_name),
+            "stuck": state.get("stuck", False),
+        }}}
+
+    def join_modules(state: GenState) -> GenState:
+        """Node: waits for every module's pipeline and merges their results for the UI stage."""
+        _log_phase("join_modules")
+        update = collect_module_results(state.get("module_results", {}))
+        update["test_output"] = artifacts.put(update["test_output"])
+        logger.info(f"All modules frozen: {update['passed']} passed, {update['failed']} failed")
+        return update
+
+    def build_module_pipeline():
+        """The per-module subgraph: spec -> tests -> code -> run tests -> (fix -> run tests)* -> done."""
+        module_builder = StateGraph(ModuleState, output_schema=ModuleOutput)
+        for node in (module_spec, module_tests, module_code, module_run_tests, module_fix_analyzer, module_fixer,
+                     module_done):
+            module_builder.add_node(node)
+        module_builder.add_edge(START, "module_spec")
+        module_builder.add_edge("module_spec", "module_tests")
+        module_builder.add_edge("module_tests", "module_code")
+        module_builder.add_edge("module_code", "module_run_tests")
+        module_builder.add_edge("module_run_tests", "module_fix_analyzer")
+        module_builder.add_conditional_edges(
+            "module_fix_analyzer", lambda state: "module_fixer" if state.get("fix_block") else "module_done",
+            ["module_fixer", "module_done"])
+        module_builder.add_edge("module_fixer", "module_run_tests")
+        module_builder.add_edge("module_done", END)
+        return module_builder.compile()
 
     # Build graph
     builder = StateGraph(GenState)
@@ -1131,22 +1337,27 @@ def run_unified_graph(project_key: str, ticket_keys: list):
     builder.add_node(jira_reader)
     builder.add_node(system_architect)
     builder.add_node(requirements_analyzer)
-    builder.add_node(spec_agent)
-    builder.add_node(spec_reviewer)
-    builder.add_node(generate_tests)
-    builder.add_node(code_merger)
-    builder.add_node(generate_code)
-    builder.add_node(validate_modules)
+    if Settings.MODULE_PIPELINE:
+        builder.add_node("module_pipeline", build_module_pipeline())
+        builder.add_node(join_modules)
+    else:
+        builder.add_node(spec_agent)
+        builder.add_node(spec_reviewer)
+        builder.add_node(generate_tests)
+        builder.add_node(code_merger)
+        builder.add_node(generate_code)
+        builder.add_node(validate_modules)
+        builder.add_node(run_tests_node)
+        builder.add_node(fix_analyzer)
+        builder.add_node(fixer_agent)
     builder.add_node(ui_designer)
     builder.add_node(generate_main_app)
     builder.add_node(validate_app)
+    builder.add_node(smoke_app)
     builder.add_node(fix_app)
-    builder.add_node(run_tests_node)
-    builder.add_node(fix_analyzer)
-    builder.add_node(fixer_agent)
-    builder.add_node(quality_reviewer)
-    builder.add_node(senior_dev_reviewer)
-    builder.add_node(architecture_reviewer)
+    # The three reviewers are independent: fanned out in parallel from "reviews" and joined before END
+    reviewers = [quality_reviewer, senior_dev_reviewer, architecture_reviewer]
+    review_entry = add_review_stage(builder, reviewers)
     
     # Start with health check
     builder.add_edge(START, "health_check")
@@ -1164,18 +1375,6 @@ def run_unified_graph(project_key: str, ticket_keys: list):
     def should_regenerate_arch(state: GenState) -> str:
         return "regenerate" if not state.get("architecture_approved") else "continue"
 
-    builder.add_conditional_edges("requirements_analyzer", should_regenerate_arch, {
-        "regenerate": "system_architect",
-        "continue": "spec_agent"
-    })
-
-    builder.add_edge("spec_agent", "spec_reviewer")
-    builder.add_edge("spec_reviewer", "generate_tests")
-    builder.add_edge("generate_tests", "code_merger")
-    builder.add_edge("code_merger", "generate_code")
-    builder.add_edge("generate_code", "validate_modules")
-    builder.add_edge("validate_modules", "run_tests_node") # Run tests before UI design
-
     def should_fix_app(state: GenState) -> str:
         app_errors = state.get("app_errors", [])
         iteration = state.get("app_fix_iteration", 0)
@@ -1183,17 +1382,13 @@ def run_unified_graph(project_key: str, ticket_keys: list):
             return "fix_app"
         if app_errors and iteration >= 3:
             logger.warning(f"Max app fix iterations reached with {len(app_errors)} errors remaining")
-        return "quality_reviewer"
-
-    # This was the old, more effective wiring. Let's restore it.
-    # The flow is: test -> fix tests -> design UI -> generate app -> validate app -> fix app -> END
-    builder.add_edge("run_tests_node", "fix_analyzer")
+        return "reviews"
 
     # Conditional: fix if needed, otherwise end.
     def should_fix(state: GenState) -> str:
         if state.get("stuck", False):
             logger.error("Fixing loop is stuck. Proceeding to final review.")
-            return "quality_reviewer"
+            return "reviews"
         if state.get("needs_fix", False) and state.get("failed", 0) > 0:
             logger.info("Failures detected. Routing to fixer_agent.")
             return "fixer_agent"
@@ -1201,38 +1396,73 @@ def run_unified_graph(project_key: str, ticket_keys: list):
         logger.info("All tests passed or no fix needed. Proceeding to UI design.")
         return "ui_designer"
 
-    builder.add_conditional_edges("fix_analyzer", should_fix, {
-        "fixer_agent": "fixer_agent", 
-        "ui_designer": "ui_designer",
-        "quality_reviewer": "quality_reviewer" # Fallback
-    })
-    
-    # After fixing, loop back to run tests again.
-    builder.add_edge("fixer_agent", "run_tests_node")
+    if Settings.MODULE_PIPELINE:
+        # Each module runs its own spec -> tests -> code -> test/fix pipeline concurrently;
+        # the UI starts once every module's API is frozen
+        def start_modules(state: GenState):
+            if should_regenerate_arch(state) == "regenerate":
+                return "system_architect"
+            return module_sends("module_pipeline", state.get("modules", {}), state.get("tickets", [])) or "join_modules"
+
+        builder.add_conditional_edges("requirements_analyzer", start_modules,
+                                      ["system_architect", "module_pipeline", "join_modules"])
+        builder.add_edge("module_pipeline", "join_modules")
+        builder.add_conditional_edges("join_modules", should_fix, {
+            "ui_designer": "ui_designer",
+            "reviews": review_entry
+        })
+    else:
+        builder.add_conditional_edges("requirements_analyzer", should_regenerate_arch, {
+            "regenerate": "system_architect",
+            "continue": "spec_agent"
+        })
+
+        builder.add_edge("spec_agent", "spec_reviewer")
+        builder.add_edge("spec_reviewer", "generate_tests")
+        builder.add_edge("generate_tests", "code_merger")
+        builder.add_edge("code_merger", "generate_code")
+        builder.add_edge("generate_code", "validate_modules")
+        builder.add_edge("validate_modules", "run_tests_node") # Run tests before UI design
+
+        # This was the old, more effective wiring. Let's restore it.
+        # The flow is: test -> fix tests -> design UI -> generate app -> validate app -> smoke app -> fix app -> END
+        builder.add_edge("run_tests_node", "fix_analyzer")
+
+        builder.add_conditional_edges("fix_analyzer", should_fix, {
+            "fixer_agent": "fixer_agent", 
+            "ui_designer": "ui_designer",
+            "reviews": review_entry # Fallback
+        })
+        
+        # After fixing, loop back to run tests again.
+        builder.add_edge("fixer_agent", "run_tests_node")
     
     # After tests pass, design and validate the UI
     builder.add_edge("ui_designer", "generate_main_app") # Correctly wire ui_designer to generate_main_app
     builder.add_edge("generate_main_app", "validate_app")
-    builder.add_conditional_edges("validate_app", should_fix_app, {"fix_app": "fix_app", "quality_reviewer": "quality_reviewer"})
+    # Static errors go straight to fix_app; a statically clean app is smoke-run before review
+    builder.add_conditional_edges("validate_app", should_fix_app, {"fix_app": "fix_app", "reviews": "smoke_app"})
+    builder.add_conditional_edges("smoke_app", should_fix_app, {"fix_app": "fix_app", "reviews": review_entry})
     builder.add_edge("fix_app", "validate_app")
-
-    # Wire the final review chain
-    builder.add_edge("quality_reviewer", "senior_dev_reviewer")
-    builder.add_edge("senior_dev_reviewer", "architecture_reviewer")
-    builder.add_edge("architecture_reviewer", END)
-    
-    graph = builder.compile()
     
     try:
-        result = graph.invoke(
-            {"project_key": project_key, "ticket_keys": ticket_keys},
-            {"recursion_limit": 50}  # Increase from default 25
+        result = run_graph(
+            builder, {"project_key": project_key, "ticket_keys": ticket_keys}, run_id,
+            resume=resume, recursion_limit=50  # Increase from default 25
         )
         
+        # Callers get the text back, not references
+        result = artifacts.expand(result, ARTIFACT_KEYS)
+        logger.info(f"Artifact cache: {artifacts.hits} hits, {artifacts.misses} reads from disk")
+
         print(f"\n✅ Unified app generated")
         print(f"📊 Tests: {result.get('passed', 0)} passed, {result.get('failed', 0)} failed")
         print(f"🚀 streamlit run {result.get('app_path', 'app.py')}")
         print(f"📄 Log: {log_file}\n")
+        if Settings.REVIEWS_ASYNC:
+            # The app is ready now; reviews finish in the background and land next to the log
+            run_reviews_async(reviewers, result, os.path.splitext(log_file)[0] + "_reviews.md", load=artifacts.get)
+            print("📝 Reviews are running in the background...")
         
         logger.info(f"Generation complete for {project_key}")
         return result
@@ -1244,4 +1474,6 @@ def run_unified_graph(project_key: str, ticket_keys: list):
         else:
             print(f"\n❌ Error during generation: {error_msg}")
             logger.error(f"Generation failed: {error_msg}", exc_info=True)
+        if Settings.CHECKPOINTS:
+            print(f"↩️  Continue from the last completed step with: python main.py --resume {run_id}")
         raise
@@ -0,0 +1,75 @@
+# graph/module_pipeline.py
+"""
+Per-module pipelines for the unified graph.
+
+The staged graph runs spec_agent, generate_tests, generate_code, run_tests and
+the fix loop as global barriers: every module's spec must exist before any
+test is written, and one slow or failing module holds the rest at each step.
+
+With Settings.MODULE_PIPELINE each module instead gets its own run of a small
+subgraph (spec -> tests -> code -> run tests -> analyze -> fix -> run tests
+...), fanned out with LangGraph `Send` so the runs proceed concurrently and a
+module that passes early is done early. A module's public API is frozen when
+its run ends; each run writes one entry to the `module_results` channel:
+
+    {module: {"spec", "test_path", "code_path", "test_result", "failures",
+              "fix_memo", "stuck"}}
+
+`join_modules` waits for all of them and `collect_module_results` turns the
+entries back into the state keys the staged graph would have produced, so
+ui_designer and everything after it is unchanged.
+"""
+import logging
+
+from langgraph.types import Send
+
+from agents.failure_records import format_records
+
+logger = logging.getLogger(__name__)
+
+# Run tests -> analyze -> fix laps per module before its API is frozen as is
+MAX_FIX_LAPS = 5
+
+
+def merge_module_results(left: dict | None, right: dict | None) -> dict:
+    """Reducer for `module_results`: concurrent runs each add their own module."""
+    return {**(left or {}), **(right or {})}
+
+
+def module_sends(node: str, modules: dict, tickets: list) -> list:
+    """One `Send` per module to the pipeline `node`, carrying only that module's tickets."""
+    sends = []
+    for module_name, module_info in modules.items():
+        module_tickets = [t for t in tickets if t["key"] in module_info.get("tickets", [])]
+        sends.append(Send(node, {"module_name": module_name, "module_info": module_info,
+                                 "tickets": module_tickets, "fix_laps": 0}))
+    return sends
+
+
+def collect_module_results(results: dict) -> dict:
+    """
+    Merges finished module runs into the graph state keys used after the test/fix loop.
+
+    Args:
+        results (dict): The `module_results` channel, {module: result}.
+
+    Returns:
+        dict: specs, test_files, code_files, test_results, test_failures, test_output,
+              passed/failed/collected totals, fix_memo, and stuck (True if any module gave up).
+    """
+    test_results = {name: r["test_result"] for name, r in results.items() if r.get("test_result")}
+    test_failures = {name: r["failures"] for name, r in results.items() if r.get("failures")}
+    return {
+        "specs": {name: r.get("spec", "") for name, r in results.items()},
+        "test_files": {name: r["test_path"] for name, r in results.items() if r.get("test_path")},
+        "code_files": {name: r["code_path"] for name, r in results.items() if r.get("code_path")},
+        "test_results": test_results,
+        "test_failures": test_failures,
+        "test_output": "\n".join(f"--- {mod} ---\n{format_records(records)}" for mod, records in test_failures.items()),
+        "passed": sum(res.get("passed", 0) for res in test_results.values()),
+        "failed": sum(res.get("failed", 0) for res in test_results.values()),
+        "collected": sum(res.get("collected") or 0 for res in test_results.values()),
+        "fix_memo": {name: r["fix_memo"] for name, r in results.items() if r.get("fix_memo")},
+        "stuck": any(r.get("stuck") for r in results.values()),
+        "needs_fix": False,
+    }
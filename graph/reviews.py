@@ -0,0 +1,101 @@
+# graph/reviews.py
+"""
+The review stage shared by the unified and TDD graphs.
+
+The quality, senior-dev and architecture reviewers all read the same finished
+artifacts and write separate state keys, so they do not depend on each other.
+`add_review_stage` fans them out from a `reviews` node into the same LangGraph
+superstep (run concurrently) and joins them in `join_reviews` before END.
+
+With Settings.REVIEWS_ASYNC the graph ends at `reviews` instead and the caller
+starts `run_reviews_async` on the final state: the app is reported to the user
+straight away and the reviews are logged and written to a report file when
+they finish (the process waits for them before exiting).
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from langgraph.graph import END
+
+from config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+# State keys the reviewers write, in report order
+REVIEW_KEYS = (("review_report", "Quality Review"), ("senior_dev_review", "Senior Dev Review"),
+               ("architecture_review", "Architecture Review"))
+
+
+def _start_reviews(state: dict) -> dict:
+    return {}
+
+
+def _join_reviews(state: dict) -> dict:
+    done = [title for key, title in REVIEW_KEYS if state.get(key)]
+    logger.info(f"Reviews complete: {', '.join(done) or 'none produced output'}")
+    return {}
+
+
+def add_review_stage(builder, reviewers: list) -> str:
+    """
+    Adds the reviewers to `builder` as a parallel stage ending at END.
+
+    Args:
+        builder: The StateGraph builder.
+        reviewers (list): Review node functions (their names become node names).
+
+    Returns:
+        str: The stage's entry node ("reviews"), for edges and routers to point at.
+    """
+    builder.add_node("reviews", _start_reviews)
+    if Settings.REVIEWS_ASYNC:
+        # Reviews run after the graph returns; see run_reviews_async
+        builder.add_edge("reviews", END)
+        return "reviews"
+    names = [reviewer.__name__ for reviewer in reviewers]
+    for reviewer in reviewers:
+        builder.add_node(reviewer)
+        builder.add_edge("reviews", reviewer.__name__)
+    builder.add_node("join_reviews", _join_reviews)
+    builder.add_edge(names, "join_reviews")
+    builder.add_edge("join_reviews", END)
+    return "reviews"
+
+
+def write_review_report(state: dict, report_path: str, load=None) -> str:
+    """Writes the reviews in `state` as a markdown report; returns its path. `load` turns state values into text."""
+    load = load or (lambda value: value)
+    if os.path.dirname(report_path):
+        os.makedirs(os.path.dirname(report_path), exist_ok=True)
+    sections = [f"## {title}\n\n{load(state.get(key)) or '_No output._'}\n" for key, title in REVIEW_KEYS]
+    with open(report_path, "w", encoding="utf-8") as fh:
+        fh.write("# Reviews\n\n" + "\n".join(sections))
+    return report_path
+
+
+def run_reviews_async(reviewers: list, state: dict, report_path: str, load=None) -> threading.Thread:
+    """
+    Runs the reviewers concurrently in a background (non-daemon) thread.
+
+    Their results are merged into a copy of `state`, logged by each reviewer as usual,
+    and written to `report_path` when all have finished. `load` turns the reviews the
+    reviewers return into text (e.g. ArtifactStore.get when they return artifact references).
+    """
+    def work():
+        merged = dict(state)
+        with ThreadPoolExecutor(max_workers=len(reviewers)) as pool:
+            futures = {pool.submit(reviewer, dict(state)): reviewer.__name__ for reviewer in reviewers}
+            for future, name in futures.items():
+                try:
+                    merged.update(future.result() or {})
+                except Exception as e:  # One failed review should not lose the others
+                    logger.error(f"{name} failed: {e}", exc_info=True)
+        write_review_report(merged, report_path, load=load)
+        logger.info(f"Reviews written to {report_path}")
+        print(f"📝 Reviews written to {report_path}")
+
+    thread = threading.Thread(target=work, name="reviews", daemon=False)
+    thread.start()
+    return thread
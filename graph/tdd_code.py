@@ -5,10 +5,14 @@ from pathlib import Path
 from agents.jira_agent import jira_client
 from agents.implementation_agent import write_files
 from agents.tester_agent import run_pytest
+from agents.failure_records import format_records, focused_source
 from openai import OpenAI
 from config.settings import Settings
+from graph.checkpointing import new_run_id, save_run_info, run_graph
+from graph.reviews import add_review_stage, run_reviews_async
 from utils.logging_utils import setup_logging
 from utils.file_utils import load_prompt, read_text_safe
+from utils.llm_utils import chat_completion
 import ast
 import logging
 import json
@@ -19,9 +23,15 @@ import os
 ISSUE_KEY_VAR_NAME = "ISSUE_KEY"
 TEST_FUNCTION_PREFIX = "def test_"
 
-def run_poc_graph(issue_key: str):
+def run_poc_graph(issue_key: str, run_id: str | None = None, resume: bool = False):
     logger, log_file = setup_logging("generation", issue_key)
     logger.info(f"Starting generation for issue: {issue_key}")
+    # Checkpointed per node so a failed run can continue with `main.py --resume <run_id>`
+    run_id = run_id or new_run_id("tdd")
+    if Settings.CHECKPOINTS and not resume:
+        save_run_info(run_id, "tdd", {"issue_key": issue_key})
+    if Settings.CHECKPOINTS:
+        print(f"🧷 Run {run_id} (resume with: python main.py --resume {run_id})")
 
     class GenState(TypedDict, total=False):
         issue_key: str
@@ -30,6 +40,7 @@ def run_poc_graph(issue_key: str):
         test_path: str
         code_path: str
         test_output: str
+        test_failures: list
         passed: int
         failed: int
         collected: int
@@ -73,7 +84,9 @@ def run_poc_graph(issue_key: str):
         prompt_template = load_prompt("tdd_spec_agent.txt")
         prompt = prompt_template.format(title=title, description=description)
 
-        resp = client.chat.completions.create(
+        spec = chat_completion(
+            client,
+            "tdd_spec_agent",
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": load_prompt("system_json_only.txt")},
@@ -81,9 +94,8 @@ def run_poc_graph(issue_key: str):
             ],
             temperature=0.2,
             top_p=0.95,
-            max_tokens=1500,
+            default_max_tokens=1500,
         )
-        spec = resp.choices[0].message.content
         try: # noqa: SIM105
             json.loads(spec or "{}")
         except json.JSONDecodeError:
@@ -103,15 +115,15 @@ def run_poc_graph(issue_key: str):
         prompt_template = load_prompt("tdd_spec_reviewer.txt")
         review_prompt = prompt_template.format(title=title, description=description, spec=spec)
         
-        resp = client.chat.completions.create(
+        review = chat_completion(
+            client,
+            "tdd_spec_reviewer",
             model="gpt-4o-mini",
             messages=[{"role": "user", "content": review_prompt}],
             temperature=0.1,
             top_p=0.95,
-            max_tokens=800,
+            default_max_tokens=800,
         )
-        
-        review = resp.choices[0].message.content
         logger.info(f"Spec review:\n{review}")
         
         return {"spec_review": review or ""}
@@ -138,17 +150,19 @@ def run_poc_graph(issue_key: str):
             spec=spec
         )
 
-        test_resp = client.chat.completions.create(
+        tests_src = chat_completion(
+            client,
+            "generate_tests",
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": load_prompt("system_python_test_code_only.txt")},
                 {"role": "user", "content": test_prompt},
             ],
-            max_tokens=3000,
+            spec=spec,
+            default_max_tokens=3000,
             temperature=0.3,
             top_p=0.9,
-        )
-        tests_src = (test_resp.choices[0].message.content or "").strip()
+        ).strip()
         
         # Clean markdown
         tests_src = re.sub(r'^```python\s*', '', tests_src)
@@ -217,17 +231,19 @@ def run_poc_graph(issue_key: str):
             tests_src=tests_src
         )
 
-        code_resp = client.chat.completions.create(
+        code_src = chat_completion(
+            client,
+            "generate_code",
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": load_prompt("system_python_code_only.txt")},
                 {"role": "user", "content": code_prompt},
             ],
-            max_tokens=3000,
+            spec=spec,
+            default_max_tokens=3000,
             temperature=0.3,
             top_p=0.9,
-        )
-        code_src = (code_resp.choices[0].message.content or "").strip()
+        ).strip()
         
         # Clean markdown
         code_src = re.sub(r'^```python\s*', '', code_src)
@@ -267,7 +283,11 @@ def run_poc_graph(issue_key: str):
         # Log full output to file and print a summary to console
         logger.info(f"PyTest output:\n{out}")
         print(out)
-        return {"test_output": out, "passed": res.get("passed", 0), "failed": res.get("failed", 0), "collected": res.get("collected")}
+        # Downstream prompts get compact failure records rather than the raw -v output
+        failures = res.get("failures", [])
+        summary = format_records(failures) if failures else out
+        return {"test_output": summary, "test_failures": failures, "passed": res.get("passed", 0),
+                "failed": res.get("failed", 0), "collected": res.get("collected")}
 
     def fix_analyzer(state: GenState) -> GenState:
         """Analyze failures and provide specific fix recommendations."""
@@ -285,23 +305,26 @@ def run_poc_graph(issue_key: str):
         spec = state.get("spec", "")
         pytest_out = state.get("test_output", "")
         
+        # With function coverage, only code executed by the failing tests goes into the prompt
+        failures = state.get("test_failures", [])
         prompt_template = load_prompt("unified_fix_analyzer.txt")
         fix_prompt = prompt_template.format(
+            module_name=os.path.basename(code_path or ""),
             spec=spec,
             pytest_out=pytest_out,
-            current_tests=current_tests,
-            current_code=current_code
+            current_tests=focused_source(test_path, failures) if test_path else current_tests,
+            current_code=focused_source(code_path, failures) if code_path else current_code
         )
         
-        resp = client.chat.completions.create(
+        recommendations = chat_completion(
+            client,
+            "tdd_fix_analyzer",
             model="gpt-4o-mini",
             messages=[{"role": "user", "content": fix_prompt}],
             temperature=0.2,
             top_p=0.95,
-            max_tokens=1000,
+            default_max_tokens=1000,
         )
-        
-        recommendations = resp.choices[0].message.content
         logger.info(f"Fix recommendations:\n{recommendations}")
         
         # Determine fix target
@@ -341,16 +364,16 @@ def run_poc_graph(issue_key: str):
         prompt_template = load_prompt("unified_quality_reviewer.txt")
         review_prompt = prompt_template.format(spec=spec, passed=passed, failed=failed, collected=collected, pytest_out=pytest_out, current_tests=current_tests, current_code=current_code)
         
-        resp = client.chat.completions.create(
+        review_report = chat_completion(
+            client,
+            "tdd_quality_reviewer",
             model="gpt-4o-mini",
             messages=[{"role": "user", "content": review_prompt}],
             temperature=0.2,
             top_p=0.95,
-            max_tokens=1500,
+            default_max_tokens=1500,
         )
         
-        review_report = resp.choices[0].message.content
-        
         # Extract issues
         test_issues = []
         code_issues = []
@@ -386,15 +409,15 @@ def run_poc_graph(issue_key: str):
             current_code=current_code
         )
         
-        resp = client.chat.completions.create(
+        review = chat_completion(
+            client,
+            "tdd_senior_dev_reviewer",
             model="gpt-4o-mini",
             messages=[{"role": "user", "content": senior_prompt}],
             temperature=0.1,
             top_p=0.95,
-            max_tokens=800,
+            default_max_tokens=800,
         )
-        
-        review = resp.choices[0].message.content
         logger.info(f"Senior dev review:\n{review}")
         
         will_run = "WILL_RUN: YES" in review
@@ -410,10 +433,6 @@ def run_poc_graph(issue_key: str):
         """Architect reviews code structure and design."""
         log_phase("architecture_reviewer")
         
-        # Only run if code will run
-        if state.get("needs_fix", False):
-            return {"architecture_review": "Skipped - code has critical issues"}
-        
         code_path = state.get("code_path")
         current_code = read_text_safe(code_path)
         
@@ -428,15 +447,15 @@ def run_poc_graph(issue_key: str):
             current_code=current_code
         )
         
-        resp = client.chat.completions.create(
+        review = chat_completion(
+            client,
+            "tdd_architecture_reviewer",
             model="gpt-4o-mini",
             messages=[{"role": "user", "content": arch_prompt}],
             temperature=0.1,
             top_p=0.95,
-            max_tokens=800,
+            default_max_tokens=800,
         )
-        
-        review = resp.choices[0].message.content
         logger.info(f"Architecture review:\n{review}")
         
         return {"architecture_review": review}
@@ -471,14 +490,16 @@ def run_poc_graph(issue_key: str):
                 fix_recommendations=fix_recommendations,
                 current_tests=current_tests
             )
-            test_resp = client.chat.completions.create(
+            tests_src = chat_completion(
+                client,
+                "tdd_fixer_tests",
                 model="gpt-4o-mini",
                 messages=[{"role": "user", "content": test_fix_prompt}],
                 temperature=0.2,
                 top_p=0.95,
-                max_tokens=3000,
-            )
-            tests_src = (test_resp.choices[0].message.content or "").strip()
+                source=current_tests,
+                default_max_tokens=3000,
+            ).strip()
             tests_src = re.sub(r'^```python\s*', '', tests_src)
             tests_src = re.sub(r'```\s*$', '', tests_src)
         else:
@@ -493,14 +514,16 @@ def run_poc_graph(issue_key: str):
                 current_code=current_code,
                 current_tests=tests_src # Use the potentially fixed tests
             )
-            code_resp = client.chat.completions.create(
+            code_src = chat_completion(
+                client,
+                "tdd_fixer_code",
                 model="gpt-4o-mini",
                 messages=[{"role": "user", "content": code_fix_prompt}],
                 temperature=0.2,
                 top_p=0.95,
-                max_tokens=3000,
-            )
-            code_src = code_resp.choices[0].message.content.strip()
+                source=current_code,
+                default_max_tokens=3000,
+            ).strip()
             code_src = re.sub(r'^```python\s*', '', code_src)
             code_src = re.sub(r'```\s*$', '', code_src)
         else:
@@ -548,9 +571,9 @@ def run_poc_graph(issue_key: str):
     builder.add_node(run_tests_node)
     builder.add_node(fix_analyzer)
     builder.add_node(fixer_agent)
-    builder.add_node(quality_reviewer)
-    builder.add_node(senior_dev_reviewer)
-    builder.add_node(architecture_reviewer)
+    # Reviews run in parallel from "reviews" and join before END (see graph/reviews.py)
+    reviewers = [quality_reviewer, senior_dev_reviewer, architecture_reviewer]
+    review_entry = add_review_stage(builder, reviewers)
     
     # Main flow
     builder.add_edge(START, "jira_reader")
@@ -563,24 +586,17 @@ def run_poc_graph(issue_key: str):
     
     # Conditional: fix if needed
     def should_fix(state: GenState) -> str:
-        return "fixer_agent" if state.get("needs_fix") else "quality_reviewer"
+        return "fixer_agent" if state.get("needs_fix") else "reviews"
     
     builder.add_conditional_edges("fix_analyzer", should_fix, {
         "fixer_agent": "fixer_agent",
-        "quality_reviewer": "quality_reviewer"
+        "reviews": review_entry
     })
     
     # After fix, re-run tests
     builder.add_edge("fixer_agent", "run_tests_node")
     
-    # Quality and architecture reviews
-    builder.add_edge("quality_reviewer", "senior_dev_reviewer")
-    builder.add_edge("senior_dev_reviewer", "architecture_reviewer")
-    
-    graph = builder.compile()
-
-    logger.info("LangGraph compiled successfully")
-    result = graph.invoke({"issue_key": issue_key})
+    result = run_graph(builder, {"issue_key": issue_key}, run_id, resume=resume)
     
     # Console: Only critical info
     print(f"\n🧾 {issue_key}: {result.get('title')}") # noqa: T201
@@ -628,4 +644,7 @@ def run_poc_graph(issue_key: str):
 
     logger.info(f"Generation complete for {issue_key}")
     print(f"📄 Log: {log_file}\n")
+    if Settings.REVIEWS_ASYNC:
+        run_reviews_async(reviewers, result, os.path.splitext(log_file)[0] + "_reviews.md")
+        print("📝 Reviews are running in the background...")
     return result
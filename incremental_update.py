@@ -10,6 +10,9 @@ from agents.jira_agent import jira_client
 from agents.implementation_agent import write_files
 from openai import OpenAI
 from config.settings import Settings
+from utils.llm_utils import chat_completion
+from utils import symbol_index
+from utils.code_merge import describe_module, splice_definitions
 import json
 import re
 
@@ -52,17 +55,17 @@ OUTPUT JSON:
 }}
 """
     
-    resp = client.chat.completions.create(
+    analysis = chat_completion(
+        client,
+        "incremental_analysis",
         model="gpt-4o",
         messages=[
             {"role": "system", "content": "You are a code analyzer. Output ONLY valid JSON, no markdown or explanations."},
             {"role": "user", "content": analysis_prompt}
         ],
         temperature=0.2,
-        max_tokens=1000
-    )
-    
-    analysis = resp.choices[0].message.content.strip()
+        default_max_tokens=1000
+    ).strip()
     analysis = re.sub(r'^```json\s*', '', analysis)
     analysis = re.sub(r'```\s*$', '', analysis)
     
@@ -90,7 +93,7 @@ OUTPUT JSON:
         existing_code = f.read()
     
     # Check which functions already exist
-    existing_funcs = re.findall(r'^def (\w+)\(', existing_code, re.MULTILINE)
+    existing_funcs = symbol_index.function_names(calc_path)
     funcs_to_add = [f for f in new_funcs if f['name'] not in existing_funcs]
     
     if not funcs_to_add:
@@ -99,47 +102,45 @@ OUTPUT JSON:
     
     print(f"➕ Adding {len(funcs_to_add)} new functions: {[f['name'] for f in funcs_to_add]}")
     
-    # Generate new functions
+    # Generate only the new functions; they are spliced into the existing module locally
     funcs_spec = json.dumps(funcs_to_add, indent=2)
     
-    merge_prompt = f"""Add these NEW functions to the existing calculator module. Preserve ALL existing code.
+    additions_prompt = f"""Write these NEW functions for an existing calculator module. Output ONLY the new functions and the imports they need; they are inserted into the module automatically.
 
-EXISTING CODE:
-{existing_code}
+EXISTING MODULE (signatures only):
+{describe_module(calc_path)}
 
 NEW FUNCTIONS TO ADD:
 {funcs_spec}
 
 RULES:
-1. Keep ALL existing functions and imports
-2. Add new functions at the end
-3. Add necessary imports (e.g., import math for sqrt)
-4. Include proper error handling
-5. Add docstrings
+1. Do NOT repeat or modify any existing function
+2. Put necessary imports first (e.g., import math for sqrt)
+3. Include proper error handling
+4. Add docstrings
 
-OUTPUT: Complete merged module code.
+OUTPUT: Only the imports and new function definitions.
 """
     
-    resp = client.chat.completions.create(
+    additions = chat_completion(
+        client,
+        "incremental_merge",
         model="gpt-4o",
         messages=[
             {"role": "system", "content": "You are a Python code expert. Output only valid Python code, no markdown."},
-            {"role": "user", "content": merge_prompt}
+            {"role": "user", "content": additions_prompt}
         ],
         temperature=0.1,
-        max_tokens=3000
+        source=funcs_spec,
+        default_max_tokens=3000
     )
-    
-    merged_code = resp.choices[0].message.content.strip()
-    merged_code = re.sub(r'^```python\s*', '', merged_code)
-    merged_code = re.sub(r'```\s*$', '', merged_code)
-    
-    # Validate syntax
-    try:
-        compile(merged_code, calc_path, 'exec')
-    except SyntaxError as e:
-        print(f"❌ Generated code has syntax error: {e}")
+    merge = splice_definitions(existing_code, additions)
+    for conflict in merge["conflicts"]:
+        print(f"⚠️  Merge conflict: {conflict}")
+    if merge["error"]:
+        print(f"❌ {merge['error']}")
         return
+    merged_code = merge["code"]
     
     # Backup existing file
     backup_path = f"{calc_path}.backup"
@@ -152,7 +153,7 @@ OUTPUT: Complete merged module code.
     print(f"✅ Updated {calc_path} (backup: {backup_path})")
     
     # Show what was added
-    new_funcs_in_code = re.findall(r'^def (\w+)\(', merged_code, re.MULTILINE)
+    new_funcs_in_code = symbol_index.function_names(calc_path)
     added = [f for f in new_funcs_in_code if f not in existing_funcs]
     print(f"📝 Added functions: {added}")
     
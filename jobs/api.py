@@ -0,0 +1,121 @@
+# jobs/api.py
+"""
+A small JSON status API over the job queue (standard library HTTP server).
+
+    GET  /health              {"ok": true, "counts": {status: n}}
+    GET  /jobs?status=&limit= {"jobs": [job, ...]} newest first
+    GET  /jobs/<id>           job
+    POST /jobs                body: a batch job entry plus optional "priority"; returns {"id": ...}
+    POST /jobs/<id>/cancel    {"id", "status"}
+
+Errors are {"error": ...} (or {"errors": [...]} for an invalid job) with a 4xx
+status. There is no authentication: the server binds to Settings.JOBS_API_HOST
+(localhost by default), and a job's "workspace" (the directory its run writes
+to) must be inside Settings.JOBS_DIR.
+"""
+import json
+import logging
+import os
+import re
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from batch_runner import normalize_job
+from config.settings import Settings
+from jobs.queue import JobQueue
+
+logger = logging.getLogger(__name__)
+
+_JOB_PATH = re.compile(r"^/jobs/(\d+)$")
+_CANCEL_PATH = re.compile(r"^/jobs/(\d+)/cancel$")
+
+
+def api_workspace(workspace: str) -> dict:
+    """
+    Resolves a workspace from an API request; it must be inside Settings.JOBS_DIR.
+
+    Returns:
+        dict: {"workspace": absolute path} or {"error": ...}
+    """
+    jobs_dir = os.path.realpath(Settings.JOBS_DIR)
+    resolved = os.path.realpath(os.path.join(jobs_dir, workspace))
+    if os.path.commonpath([jobs_dir, resolved]) != jobs_dir or resolved == jobs_dir:
+        return {"error": f"workspace must be a directory inside {Settings.JOBS_DIR}"}
+    return {"workspace": resolved}
+
+
+def make_server(queue: JobQueue | None = None, host: str | None = None, port: int | None = None) -> ThreadingHTTPServer:
+    """An HTTP server for `queue` (not yet serving; call serve_forever). Port 0 picks a free port."""
+    queue = queue or JobQueue()
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, body: dict):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            logger.debug(f"{self.address_string()} {format % args}")
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/health":
+                return self._send(200, {"ok": True, "counts": queue.counts()})
+            if url.path == "/jobs":
+                query = parse_qs(url.query)
+                status = query.get("status", [None])[0]
+                try:
+                    limit = int(query.get("limit", ["100"])[0])
+                except ValueError:
+                    return self._send(400, {"error": "limit must be an integer"})
+                return self._send(200, {"jobs": queue.list(status=status, limit=limit)})
+            match = _JOB_PATH.match(url.path)
+            if match:
+                job = queue.get(int(match.group(1)))
+                return self._send(200, job) if job else self._send(404, {"error": f"no job {match.group(1)}"})
+            return self._send(404, {"error": f"unknown path {url.path}"})
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            match = _CANCEL_PATH.match(url.path)
+            if match:
+                result = queue.cancel(int(match.group(1)))
+                if "error" in result:
+                    return self._send(404 if result["error"].startswith("no job") else 409, result)
+                return self._send(200, result)
+            if url.path != "/jobs":
+                return self._send(404, {"error": f"unknown path {url.path}"})
+            try:
+                entry = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+            except json.JSONDecodeError as e:
+                return self._send(400, {"error": f"invalid JSON: {e}"})
+            checked = normalize_job(entry)
+            if checked["errors"]:
+                return self._send(400, {"errors": checked["errors"]})
+            if checked["job"].get("workspace"):
+                placed = api_workspace(checked["job"]["workspace"])
+                if "error" in placed:
+                    return self._send(400, placed)
+                checked["job"]["workspace"] = placed["workspace"]
+            try:
+                priority = int(entry.get("priority", 0))
+            except (TypeError, ValueError):
+                return self._send(400, {"error": "priority must be an integer"})
+            return self._send(201, {"id": queue.enqueue(checked["job"], priority=priority)})
+
+    return ThreadingHTTPServer((host or Settings.JOBS_API_HOST, Settings.JOBS_API_PORT if port is None else port), Handler)
+
+
+def serve(host: str | None = None, port: int | None = None):
+    """Serves the status API until interrupted."""
+    server = make_server(host=host, port=port)
+    print(f"🌐 Job API on http://{server.server_address[0]}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,102 @@
+# jobs/cli.py
+"""
+`python main.py jobs ...`: queue operations, the worker daemon and the status API.
+
+    jobs add unified --project CAL [--tickets CAL-1,CAL-2] [--priority 5] [--name calc]
+    jobs add tdd --tickets CAL-3,CAL-4
+    jobs add incremental --tickets CAL-31 --workspace apps/calc
+    jobs add --file jobs.json [--priority 5]      every job of a batch job file
+    jobs list [--status running]
+    jobs show ID
+    jobs cancel ID
+    jobs worker [--workers 4]
+    jobs serve [--host 127.0.0.1] [--port 8765]
+"""
+import json
+
+from batch_runner import MODES, load_jobs, normalize_job
+from jobs.queue import STATUSES, JobQueue
+
+
+def add_parser(commands):
+    """Adds the `jobs` subcommand to main.py's subparsers."""
+    jobs = commands.add_parser("jobs", help="queue runs for the worker daemon, and run the worker or status API")
+    actions = jobs.add_subparsers(dest="jobs_command", metavar="ACTION", required=True)
+
+    add = actions.add_parser("add", help="queue a job (or every job in a job file)")
+    add.add_argument("mode", nargs="?", choices=MODES)
+    add.add_argument("--project", default="")
+    add.add_argument("--tickets", default="")
+    add.add_argument("--name", default=None)
+    add.add_argument("--workspace", default=None, help="run in this directory (required for incremental)")
+    add.add_argument("--file", default=None, help="batch job file (see batch_runner.py)")
+    add.add_argument("--priority", type=int, default=0, help="higher runs first (default 0)")
+
+    listing = actions.add_parser("list", help="show recent jobs")
+    listing.add_argument("--status", choices=STATUSES, default=None)
+    listing.add_argument("--limit", type=int, default=50)
+
+    actions.add_parser("show", help="show one job as JSON").add_argument("id", type=int)
+    actions.add_parser("cancel", help="cancel a queued or running job").add_argument("id", type=int)
+
+    worker = actions.add_parser("worker", help="run the worker daemon")
+    worker.add_argument("--workers", type=int, default=None, help="jobs run at once (default: Settings.JOB_WORKERS)")
+
+    serve = actions.add_parser("serve", help="run the JSON status API")
+    serve.add_argument("--host", default=None)
+    serve.add_argument("--port", type=int, default=None)
+
+
+def run(args) -> int:
+    """Runs a parsed `jobs` action; returns the process exit code."""
+    if args.jobs_command == "worker":
+        from jobs.worker import run_worker
+
+        run_worker(workers=args.workers)
+        return 0
+    if args.jobs_command == "serve":
+        from jobs.api import serve
+
+        serve(host=args.host, port=args.port)
+        return 0
+
+    queue = JobQueue()
+    if args.jobs_command == "add":
+        if args.file:
+            loaded = load_jobs(args.file)
+        else:
+            checked = normalize_job({"mode": args.mode or "", "project": args.project, "tickets": args.tickets,
+                                     "name": args.name, "workspace": args.workspace})
+            loaded = {"jobs": [checked["job"]], "errors": checked["errors"]}
+        for error in loaded["errors"]:
+            print(f"⚠️ {error}")
+        if loaded["errors"]:
+            return 2
+        for job in loaded["jobs"]:
+            job_id = queue.enqueue(job, priority=args.priority)
+            print(f"📥 Job {job_id}: {job['name']} ({job['mode']}, priority {args.priority})")
+        return 0
+    if args.jobs_command == "list":
+        print(f"{'ID':>5}  {'STATUS':<10} {'PRI':>3}  {'TRY':>3}  {'NAME':<24} RUN")
+        for job in queue.list(status=args.status, limit=args.limit):
+            cancel = " (cancelling)" if job["cancel_requested"] and job["status"] == "running" else ""
+            print(f"{job['id']:>5}  {job['status']:<10} {job['priority']:>3}  {job['attempts']:>3}  "
+                  f"{job['name']:<24} {job['run_id'] or ''}{cancel}")
+        counts = queue.counts()
+        print(", ".join(f"{count} {status}" for status, count in counts.items() if count) or "No jobs.")
+        return 0
+    if args.jobs_command == "show":
+        job = queue.get(args.id)
+        if job is None:
+            print(f"⚠️ No job {args.id}")
+            return 1
+        print(json.dumps(job, indent=2))
+        return 0
+    if args.jobs_command == "cancel":
+        result = queue.cancel(args.id)
+        if "error" in result:
+            print(f"⚠️ {result['error']}")
+            return 1
+        print(f"⏹️  Job {args.id}: {result['status']}")
+        return 0
+    return 2
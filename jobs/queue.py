@@ -0,0 +1,237 @@
+# jobs/queue.py
+"""
+SQLite-backed queue of generation jobs, shared by every process on the box.
+
+Jobs use the batch job format (see batch_runner.normalize_job) plus a
+priority: higher priorities are claimed first, then oldest first.
+
+A worker claims a job by taking a lease on it for Settings.JOB_LEASE_SECONDS
+and renews the lease with heartbeats while the job runs. If a worker dies,
+its lease expires and the next claim or read (get, list, counts) puts the job
+back in the queue (or fails it once it has been attempted max_attempts times),
+so a crashed run is retried by whichever worker is free and is never shown as
+running after its lease has run out.
+
+Statuses: queued -> running -> succeeded | failed | cancelled. Cancelling a
+queued job takes effect at once; a running job is flagged and its worker
+stops it at the next heartbeat.
+
+Every connection is short-lived and claims run in an IMMEDIATE transaction,
+so any number of worker and API processes can use the same file.
+"""
+import contextlib
+import json
+import logging
+import os
+import sqlite3
+import time
+
+from config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+STATUSES = ("queued", "running", "succeeded", "failed", "cancelled")
+FINISHED = ("succeeded", "failed", "cancelled")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    project TEXT,
+    tickets TEXT,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    heartbeat_at REAL,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    workspace TEXT,
+    run_id TEXT,
+    exit_code INTEGER,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, priority DESC, id);
+"""
+
+
+def _row(row: sqlite3.Row | None) -> dict | None:
+    if row is None:
+        return None
+    job = dict(row)
+    job["tickets"] = json.loads(job["tickets"] or "[]")
+    job["cancel_requested"] = bool(job["cancel_requested"])
+    return job
+
+
+class JobQueue:
+    """The job table in one SQLite file (default Settings.JOBS_DB)."""
+
+    def __init__(self, path: str | None = None):
+        self.path = path or Settings.JOBS_DB
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+        finally:
+            conn.close()
+
+    @contextlib.contextmanager
+    def _db(self, immediate: bool = False):
+        """A short-lived connection; commits on success, rolls back on error, always closed."""
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+    def enqueue(self, job: dict, priority: int = 0, max_attempts: int | None = None) -> int:
+        """Adds a checked job (see batch_runner.normalize_job); returns its id."""
+        with self._db() as conn:
+            cursor = conn.execute(
+                "INSERT INTO jobs (name, mode, project, tickets, priority, max_attempts, workspace, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job["name"], job["mode"], job.get("project") or "", json.dumps(job.get("tickets") or []),
+                 int(priority), int(max_attempts or Settings.JOB_MAX_ATTEMPTS), job.get("workspace"), time.time()))
+            return cursor.lastrowid
+
+    def _reclaim_expired(self):
+        """Applies lapsed leases before a read; takes the write lock only when there is one."""
+        now = time.time()
+        with self._db() as conn:
+            lapsed = conn.execute("SELECT 1 FROM jobs WHERE status = 'running' AND lease_expires < ? LIMIT 1",
+                                  (now,)).fetchone()
+        if lapsed:
+            with self._db(immediate=True) as conn:
+                self._expire_leases(conn, now)
+
+    def get(self, job_id: int) -> dict | None:
+        self._reclaim_expired()
+        with self._db() as conn:
+            return _row(conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def list(self, status: str | None = None, limit: int = 100) -> list:
+        """Jobs, newest first, optionally with one status."""
+        query, params = "SELECT * FROM jobs", []
+        if status:
+            query, params = query + " WHERE status = ?", [status]
+        self._reclaim_expired()
+        with self._db() as conn:
+            rows = conn.execute(query + " ORDER BY id DESC LIMIT ?", [*params, limit]).fetchall()
+        return [_row(row) for row in rows]
+
+    def counts(self) -> dict:
+        """{status: number of jobs} for every status."""
+        self._reclaim_expired()
+        with self._db() as conn:
+            rows = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {status: rows.get(status, 0) for status in STATUSES}
+
+    def cancel(self, job_id: int) -> dict:
+        """
+        Cancels a job: at once if queued, at its worker's next heartbeat if running.
+
+        Returns:
+            dict: {"id", "status"} after the request, or {"error": ...}.
+        """
+        with self._db(immediate=True) as conn:
+            job = _row(conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+            if job is None:
+                return {"error": f"no job {job_id}"}
+            if job["status"] in FINISHED:
+                return {"error": f"job {job_id} already {job['status']}"}
+            if job["status"] == "queued":
+                conn.execute("UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ?", (time.time(), job_id))
+                return {"id": job_id, "status": "cancelled"}
+            conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ?", (job_id,))
+            return {"id": job_id, "status": "cancelling"}
+
+    def _expire_leases(self, conn: sqlite3.Connection, now: float):
+        """Requeues running jobs whose worker stopped heartbeating, or fails them when out of attempts."""
+        expired = conn.execute(
+            "SELECT id, attempts, max_attempts, cancel_requested, lease_owner FROM jobs"
+            " WHERE status = 'running' AND lease_expires < ?", (now,)).fetchall()
+        for job in expired:
+            if job["cancel_requested"]:
+                status, error = "cancelled", None
+            elif job["attempts"] >= job["max_attempts"]:
+                status, error = "failed", f"lease lost {job['attempts']} times (worker crashed or hung)"
+            else:
+                status, error = "queued", None
+            logger.warning(f"Job {job['id']}: lease held by {job['lease_owner']} expired; now {status}")
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, lease_owner = NULL, lease_expires = NULL,"
+                " finished_at = CASE WHEN ? = 'queued' THEN NULL ELSE ? END WHERE id = ?",
+                (status, error, status, now, job["id"]))
+
+    def claim(self, owner: str) -> dict | None:
+        """
+        Leases the next job to `owner`: highest priority first, then oldest.
+
+        Returns:
+            dict: The claimed job (attempts already incremented), or None if the queue is empty.
+        """
+        now = time.time()
+        with self._db(immediate=True) as conn:
+            self._expire_leases(conn, now)
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' ORDER BY priority DESC, id LIMIT 1").fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', lease_owner = ?, lease_expires = ?, heartbeat_at = ?,"
+                " attempts = attempts + 1, started_at = COALESCE(started_at, ?) WHERE id = ?",
+                (owner, now + Settings.JOB_LEASE_SECONDS, now, now, row["id"]))
+            return _row(conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone())
+
+    def heartbeat(self, job_id: int, owner: str, **fields) -> dict:
+        """
+        Renews `owner`'s lease on a running job and records any `fields` (workspace, run_id).
+
+        Returns:
+            dict: {"leased": False if the lease was lost, "cancel": True if cancellation was requested}
+        """
+        now = time.time()
+        updates = {key: value for key, value in fields.items() if key in ("workspace", "run_id")}
+        assignments = "".join(f", {key} = ?" for key in updates)
+        with self._db() as conn:
+            cursor = conn.execute(
+                f"UPDATE jobs SET lease_expires = ?, heartbeat_at = ?{assignments}"
+                " WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                (now + Settings.JOB_LEASE_SECONDS, now, *updates.values(), job_id, owner))
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return {"leased": cursor.rowcount == 1, "cancel": bool(row and row["cancel_requested"])}
+
+    def finish(self, job_id: int, owner: str, status: str, exit_code: int | None = None,
+               error: str | None = None, run_id: str | None = None) -> bool:
+        """Records the outcome of `owner`'s run; False if the lease had already been lost."""
+        with self._db() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, exit_code = ?, error = ?, run_id = COALESCE(?, run_id),"
+                " finished_at = ?, lease_owner = NULL, lease_expires = NULL"
+                " WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                (status, exit_code, error, run_id, time.time(), job_id, owner))
+            return cursor.rowcount == 1
+
+    def release(self, job_id: int, owner: str) -> bool:
+        """Puts a running job back in the queue without using up an attempt (worker shutting down)."""
+        with self._db() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'queued', attempts = MAX(attempts - 1, 0), lease_owner = NULL,"
+                " lease_expires = NULL WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                (job_id, owner))
+            return cursor.rowcount == 1
@@ -0,0 +1,208 @@
+# jobs/worker.py
+"""
+Worker daemon for the job queue.
+
+`run_worker` starts one thread per slot (Settings.JOB_WORKERS). Each thread
+claims the next job, runs it as `python main.py <mode> ...` in the job's own
+workspace (<Settings.JOBS_DIR>/<id>-<name> unless the job names one), and
+heartbeats the lease while the process runs. A heartbeat also picks up
+cancellation, and the run id the job printed so the queue can show it.
+A heartbeat that cannot reach the database (e.g. it stays locked) is retried
+on the next tick; the job is stopped only once its lease has run out, since
+another worker may then take it over. A job's process never outlives its slot.
+
+A job that comes back after a crash (its lease expired) continues the
+previous attempt's checkpointed run with `main.py --resume` when the
+workspace holds one, instead of starting over.
+
+On SIGTERM or Ctrl-C the daemon stops claiming, stops its running jobs and
+puts them back in the queue without using up an attempt.
+"""
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from batch_runner import MAIN_PATH, find_run_ids, job_command
+from config.settings import Settings
+from jobs.queue import JobQueue
+
+logger = logging.getLogger(__name__)
+
+
+def job_workspace(job: dict) -> str:
+    return os.path.abspath(job.get("workspace") or os.path.join(Settings.JOBS_DIR, f"{job['id']:05d}-{job['name']}"))
+
+
+def command_for(job: dict, workspace: str) -> list:
+    """The command for this attempt: resume the previous attempt's unified run if it left a checkpoint."""
+    if job["attempts"] > 1 and job["mode"] == "unified":
+        run_ids = [job["run_id"]] if job.get("run_id") else find_run_ids(os.path.join(workspace, "job.log"))[-1:]
+        if run_ids and os.path.exists(os.path.join(workspace, Settings.RUNS_DIR, run_ids[0], "checkpoints.sqlite")):
+            return [sys.executable, MAIN_PATH, "--resume", run_ids[0]]
+    return job_command(job)
+
+
+def _stop_process(proc: subprocess.Popen):
+    """Stops the job and everything it started (test workers, streamlit) via its process group."""
+    for sig, wait in ((signal.SIGTERM, 10), (signal.SIGKILL, 5)):
+        try:
+            os.killpg(proc.pid, sig)
+        except ProcessLookupError:
+            return
+        try:
+            proc.wait(timeout=wait)
+            return
+        except subprocess.TimeoutExpired:
+            continue
+
+
+def _heartbeat(queue: JobQueue, job: dict, owner: str, **fields) -> dict | None:
+    """queue.heartbeat, or None if the database could not be reached this time (retried on the next tick)."""
+    try:
+        return queue.heartbeat(job["id"], owner, **fields)
+    except Exception as e:  # e.g. the database is locked for longer than the timeout
+        logger.warning(f"Job {job['id']}: heartbeat failed: {e}; retrying")
+        return None
+
+
+def execute_job(queue: JobQueue, job: dict, owner: str, stop: threading.Event) -> str:
+    """
+    Runs one claimed job to completion, heartbeating its lease.
+
+    Returns:
+        str: What happened: "succeeded", "failed", "cancelled", "released" (shutdown) or "lost" (lease taken over).
+    """
+    workspace = job_workspace(job)
+    os.makedirs(workspace, exist_ok=True)
+    log_path = os.path.join(workspace, "job.log")
+    command = command_for(job, workspace)
+    logger.info(f"Job {job['id']} ({job['name']}) attempt {job['attempts']}: {' '.join(command[1:])}")
+    print(f"▶️  Job {job['id']} {job['name']} (attempt {job['attempts']}) in {workspace}")
+
+    # Appended, so a retry can still find the run id of the attempt before it
+    with open(log_path, "a", encoding="utf-8") as log:
+        log.write(f"\n=== attempt {job['attempts']} by {owner} at {time.strftime('%Y-%m-%dT%H:%M:%S')} ===\n")
+        log.flush()
+        try:
+            proc = subprocess.Popen(command, cwd=workspace, stdout=log, stderr=subprocess.STDOUT,
+                                    stdin=subprocess.DEVNULL, env={**os.environ, "PYTHONUNBUFFERED": "1"},
+                                    start_new_session=True)
+        except OSError as e:
+            queue.finish(job["id"], owner, "failed", error=str(e))
+            return "failed"
+
+    # The job's process must never outlive this call: an orphan would keep writing to the workspace
+    # while another worker retries the job there
+    try:
+        return _watch_job(queue, job, owner, stop, proc, workspace, log_path)
+    finally:
+        if proc.poll() is None:
+            _stop_process(proc)
+
+
+def _watch_job(queue: JobQueue, job: dict, owner: str, stop: threading.Event, proc: subprocess.Popen,
+               workspace: str, log_path: str) -> str:
+    """Heartbeats a running job until its process exits or it has to be stopped, then records the outcome."""
+    lease_expires = job.get("lease_expires") or time.time() + Settings.JOB_LEASE_SECONDS
+    beat = _heartbeat(queue, job, owner, workspace=workspace)
+    if beat and beat["leased"]:
+        lease_expires = time.time() + Settings.JOB_LEASE_SECONDS
+
+    outcome = None
+    while outcome is None:
+        try:
+            proc.wait(timeout=Settings.JOB_HEARTBEAT_SECONDS)
+            break
+        except subprocess.TimeoutExpired:
+            pass
+        run_ids = find_run_ids(log_path)
+        beat = _heartbeat(queue, job, owner, workspace=workspace, run_id=run_ids[-1] if run_ids else None)
+        if beat is None:
+            # Unknown until the database answers again; the lease is only gone once it has run out
+            if time.time() > lease_expires:
+                outcome = "lost"
+        elif not beat["leased"]:
+            outcome = "lost"
+        elif beat["cancel"]:
+            outcome = "cancelled"
+        else:
+            lease_expires = time.time() + Settings.JOB_LEASE_SECONDS
+        if outcome is None and stop.is_set():
+            outcome = "released"
+        if outcome:
+            _stop_process(proc)
+
+    run_ids = find_run_ids(log_path)
+    run_id = run_ids[-1] if run_ids else None
+    if outcome == "lost":
+        logger.warning(f"Job {job['id']}: lease expired or taken over by another worker; stopped this attempt")
+    elif outcome == "released":
+        queue.release(job["id"], owner)
+    elif outcome == "cancelled":
+        queue.finish(job["id"], owner, "cancelled", exit_code=proc.returncode, run_id=run_id)
+    else:
+        outcome = "succeeded" if proc.returncode == 0 else "failed"
+        error = None if proc.returncode == 0 else f"exit code {proc.returncode}, see {log_path}"
+        queue.finish(job["id"], owner, outcome, exit_code=proc.returncode, error=error, run_id=run_id)
+
+    icon = {"succeeded": "✅", "failed": "❌"}.get(outcome, "⏹️ ")
+    print(f"{icon} Job {job['id']} {job['name']}: {outcome}")
+    logger.info(f"Job {job['id']} ({job['name']}): {outcome}")
+    return outcome
+
+
+def _slot(queue: JobQueue, owner: str, stop: threading.Event, exit_when_idle: bool):
+    while not stop.is_set():
+        try:
+            job = queue.claim(owner)
+        except Exception as e:  # e.g. the database is locked for longer than the timeout
+            logger.error(f"{owner}: claim failed: {e}")
+            job = None
+        if job is None:
+            if exit_when_idle:
+                return
+            stop.wait(Settings.JOB_POLL_SECONDS)
+            continue
+        try:
+            execute_job(queue, job, owner, stop)
+        except Exception as e:  # recording the outcome failed; the lease lapses and the job is retried
+            logger.error(f"{owner}: job {job['id']} failed in the worker: {e}", exc_info=True)
+
+
+def run_worker(workers: int | None = None, queue: JobQueue | None = None, stop: threading.Event | None = None,
+               exit_when_idle: bool = False):
+    """
+    Runs the worker daemon until stopped (SIGTERM, Ctrl-C or `stop`).
+
+    Args:
+        workers (int, optional): Jobs run at once. Defaults to Settings.JOB_WORKERS.
+        queue (JobQueue, optional): Queue to work on. Defaults to Settings.JOBS_DB.
+        stop (threading.Event, optional): Set to stop the daemon.
+        exit_when_idle (bool): Return once the queue is empty instead of polling.
+    """
+    queue = queue or JobQueue()
+    stop = stop or threading.Event()
+    workers = max(1, workers or Settings.JOB_WORKERS)
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+
+    prefix = f"{socket.gethostname()}:{os.getpid()}"
+    threads = [threading.Thread(target=_slot, args=(queue, f"{prefix}:{slot}", stop, exit_when_idle),
+                                name=f"job-worker-{slot}") for slot in range(workers)]
+    print(f"👷 Worker {prefix}: {workers} slots on {queue.path}")
+    for thread in threads:
+        thread.start()
+    try:
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(timeout=1)
+    except KeyboardInterrupt:
+        print("\n⏹️  Stopping: running jobs go back to the queue...")
+        stop.set()
+        for thread in threads:
+            thread.join()
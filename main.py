@@ -2,13 +2,26 @@
 """
 Jira Coder: AI-powered code generation from Jira tickets.
 
-This is the main entry point for the application. It allows users to choose between different code generation modes.
+This is the main entry point for the application. Run without arguments for the
+interactive menu, or non-interactively:
+
+    python main.py unified --project CAL [--tickets CAL-1,CAL-2]
+    python main.py tdd --tickets CAL-3,CAL-4 | --tickets-file tickets.txt | --project CAL [--workers 4] [--force]
+    python main.py incremental --tickets CAL-31,CAL-32
+    python main.py demo
+    python main.py batch jobs.json [--workers 4] [--summary summary.json]
+    python main.py jobs add|list|show|cancel|worker|serve ...   (see jobs/cli.py)
+    python main.py --resume RUN_ID
 """
+import argparse
 import subprocess
+import sys
 from config.settings import Settings
 from graph.tdd_code import run_poc_graph
 from graph.create_streamlit_app import run_unified_graph
+from graph.checkpointing import load_run_info
 from agents.jira_agent import jira_client
+from jobs import cli as jobs_cli
 import json
 import os
 
@@ -17,29 +30,231 @@ MODE_TDD = "1"
 MODE_UNIFIED = "2"
 MODE_DEMO = "3"
 MODE_INCREMENTAL = "4"
+MODE_BULK_TDD = "5"
 MAX_JIRA_RESULTS = 50
 DEMO_APP_PATH = "simple_calculator/app.py"
 
+def parse_tickets(text: str) -> list:
+    """Ticket keys from comma- and/or newline-separated text; '#' starts a comment."""
+    keys = []
+    for line in (text or "").splitlines():
+        line = line.split("#", 1)[0]
+        keys.extend(k.strip().upper() for k in line.split(",") if k.strip())
+    return keys
+
+
+def run_unified(project_key: str, ticket_keys: list) -> int:
+    """Builds the integrated app from `ticket_keys`, or from every ticket in the project if none are given."""
+    if not ticket_keys:
+        # Load all tickets from project
+        print(f"\n📦 Fetching all tickets from {project_key}...")
+        result = jira_client.list_all_issues_in_project(project_key, max_results=MAX_JIRA_RESULTS)
+        issues = result.get("issues", [])
+        if not issues:
+            print(f"⚠️ No tickets found in {project_key}. Details: {result.get('details')}")
+            return 1
+        ticket_keys = [issue.get("key") for issue in issues]
+        print(f"Found {len(ticket_keys)} tickets: {', '.join(ticket_keys[:5])}{'...' if len(ticket_keys) > 5 else ''}")
+
+    print(f"\n🏗️ Building integrated application for {len(ticket_keys)} tickets...")
+    run_unified_graph(project_key, ticket_keys)
+    return 0
+
+
+def run_tdd(ticket_keys: list) -> int:
+    """Runs the TDD workflow for each ticket in turn; returns the number of tickets that failed."""
+    statuses = {}
+    for ticket_key in ticket_keys:
+        print(f"\n--- Processing {ticket_key} with TDD workflow ---")
+        statuses[ticket_key] = "✅ success"
+        try:
+            run_poc_graph(ticket_key)
+        except Exception as e:
+            print(f"⚠️ Error processing {ticket_key}: {e}")
+            statuses[ticket_key] = f"❌ error: {e}"
+
+    print("\n" + "="*60)
+    print(f"📊 TDD Generation Result{'s' if len(ticket_keys) > 1 else f' for {ticket_keys[0]}'}")
+    print("="*60)
+    for ticket_key, status in statuses.items():
+        print(f"{ticket_key}: {status}")
+    print("="*60)
+    return sum(not status.startswith("✅") for status in statuses.values())
+
+
+def run_bulk(project_key: str, ticket_keys: list, workers: int | None = None, force: bool = False) -> int:
+    """
+    Runs the TDD workflow for many tickets in parallel (see bulk_tdd.py); returns the number that failed.
+
+    Tickets already generated successfully and unchanged in Jira since are skipped unless `force`.
+    With no `ticket_keys`, every ticket in the project is used.
+    """
+    from bulk_tdd import run_bulk_tdd
+
+    updated = {}
+    if not ticket_keys:
+        print(f"\n📦 Fetching all tickets from {project_key}...")
+        result = jira_client.list_all_issues_in_project(project_key, max_results=MAX_JIRA_RESULTS)
+        issues = result.get("issues", [])
+        if not issues:
+            print(f"⚠️ No tickets found in {project_key}. Details: {result.get('details')}")
+            return 1
+        ticket_keys = [issue.get("key") for issue in issues]
+        updated = {issue.get("key"): (issue.get("fields") or {}).get("updated") for issue in issues}
+    summary = run_bulk_tdd(ticket_keys, workers=workers, force=force, updated=updated)
+    return summary["failed"]
+
+
+def run_incremental(ticket_keys: list) -> int:
+    """Adds the tickets' functions to the modules of the app in the current directory."""
+    from incremental_update import incremental_update
+
+    print(f"\n🔄 Incremental update for {len(ticket_keys)} tickets...")
+    incremental_update(ticket_keys)
+    return 0
+
+
+def run_demo() -> int:
+    """Launches the bundled calculator demo."""
+    print(f"\n🚀 Launching calculator demo from '{DEMO_APP_PATH}'...")
+    if not os.path.exists(DEMO_APP_PATH):
+        print(f"⚠️  Demo application not found at '{DEMO_APP_PATH}'.")
+        print("   Please ensure the calculator app is saved in the 'simple_calculator' directory.")
+        return 1
+    return subprocess.run(["streamlit", "run", DEMO_APP_PATH]).returncode
+
+
+def resume_run(run_id: str) -> int:
+    """
+    Continues a checkpointed run from its last completed node.
+
+    Args:
+        run_id (str): The id printed when the run started (a directory under Settings.RUNS_DIR).
+
+    Returns:
+        int: The process exit code; 1 if there is no such run.
+    """
+    info = load_run_info(run_id)
+    if info is None:
+        print(f"⚠️ No checkpointed run '{run_id}' found in {Settings.RUNS_DIR}.")
+        return 1
+    print(f"\n↩️  Resuming {info['kind']} run {run_id}...")
+    if info["kind"] == "unified":
+        run_unified_graph(info["args"]["project_key"], info["args"]["ticket_keys"], run_id=run_id, resume=True)
+    else:
+        run_poc_graph(info["args"]["issue_key"], run_id=run_id, resume=True)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """The command line: one subcommand per mode, or none for the interactive menu."""
+    parser = argparse.ArgumentParser(description="Jira Coder: AI-powered code generation from Jira tickets.")
+    parser.add_argument("--resume", metavar="RUN_ID", help="continue a failed or interrupted run from its last completed step")
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+
+    unified = commands.add_parser("unified", help="build one integrated Streamlit app from many tickets")
+    unified.add_argument("--project", required=True, help="Jira project key, e.g. CAL")
+    unified.add_argument("--tickets", default="", help="comma-separated ticket keys (default: every ticket in the project)")
+
+    tdd = commands.add_parser("tdd", help="generate standalone code and tests per ticket (TDD workflow)")
+    tickets = tdd.add_mutually_exclusive_group(required=True)
+    tickets.add_argument("--tickets", help="comma-separated ticket keys")
+    tickets.add_argument("--tickets-file", help="file of ticket keys, comma- or newline-separated")
+    tickets.add_argument("--project", help="every ticket in this Jira project")
+    tdd.add_argument("--workers", type=int, default=None, help="tickets run at once (default: Settings.TDD_WORKERS)")
+    tdd.add_argument("--force", action="store_true", help="rerun tickets the manifest marks as done and unchanged")
+
+    incremental = commands.add_parser("incremental", help="add features to the app in the current directory")
+    incremental.add_argument("--tickets", required=True, help="comma-separated ticket keys to add")
+
+    commands.add_parser("demo", help="run the calculator demo")
+
+    batch = commands.add_parser("batch", help="run the jobs of a job file concurrently (see batch_runner.py)")
+    batch.add_argument("jobs_file", help="JSON job file")
+    batch.add_argument("--workers", type=int, default=None, help="jobs run at once (default: Settings.BATCH_WORKERS)")
+    batch.add_argument("--summary", default=None, help="summary JSON path (default: <BATCH_DIR>/<batch_id>/summary.json)")
+
+    jobs_cli.add_parser(commands)
+    return parser
+
+
+def parse_args(argv: list | None = None):
+    """Parses the command line; --resume continues a stored run, so it takes no subcommand."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.resume and args.command:
+        parser.error(f"--resume continues an existing run and cannot be combined with '{args.command}'")
+    return args
+
+
+def run_command(args) -> int:
+    """Runs a parsed subcommand; returns the process exit code."""
+    if args.command == "unified":
+        return run_unified(args.project.strip().upper(), parse_tickets(args.tickets))
+    if args.command == "tdd":
+        if args.tickets_file:
+            with open(args.tickets_file, "r", encoding="utf-8") as f:
+                ticket_keys = parse_tickets(f.read())
+        else:
+            ticket_keys = parse_tickets(args.tickets)
+        if not ticket_keys and not args.project:
+            print("⚠️ No ticket keys provided.")
+            return 2
+        return 1 if run_bulk((args.project or "").strip().upper(), ticket_keys, args.workers, args.force) else 0
+    if args.command == "incremental":
+        return run_incremental(parse_tickets(args.tickets))
+    if args.command == "demo":
+        return run_demo()
+    if args.command == "batch":
+        from batch_runner import load_jobs, run_batch
+
+        loaded = load_jobs(args.jobs_file)
+        for error in loaded["errors"]:
+            print(f"⚠️ {error}")
+        if loaded["errors"]:
+            return 2
+        summary = run_batch(loaded["jobs"], workers=args.workers, summary_path=args.summary)
+        return 1 if summary["failed"] else 0
+    if args.command == "jobs":
+        return jobs_cli.run(args)
+    return 2
+
+
 def main():
     """
     Main function to run the Jira Coder application.
 
-    Presents the user with a choice of modes:
+    With a subcommand (see build_parser) the mode runs without prompts. Otherwise
+    the user is presented with a choice of modes:
     1. Generate Standalone Module: Creates a tested module from one or more tickets using a TDD workflow.
     2. Build Integrated Application: Creates a single, unified Streamlit application from multiple tickets.
     3. Run Calculator Demo: Launches a pre-built demo application.
+    4. Incremental Update: Adds features to an existing app without regenerating its UI.
+    5. Bulk TDD: Standalone modules for many tickets, in parallel, skipping unchanged ones.
     """
+    args = parse_args()
+
+    # Batch and queued jobs run as separate main.py processes, which check the environment themselves
+    if args.command in ("batch", "jobs"):
+        return run_command(args)
+
     # Ensure all env vars are present
     Settings.check()
 
+    if args.resume:
+        return resume_run(args.resume)
+    if args.command:
+        return run_command(args)
+
     # Ask user for mode
     print("\n🔧 Jira Coder")
     print("1. Generate Standalone code and tests (from a single Jira ticket using TDD)")
     print("2. Build Integrated Application (from multiple tickets)")
     print("3. Run Calculator Demo")
     print("4. Incremental Update (add features to existing app without regenerating UI)")
+    print("5. Bulk TDD (standalone code and tests for many tickets, in parallel)")
     try:
-        mode = input("Choose mode (1, 2, 3, or 4): ").strip() or MODE_UNIFIED
+        mode = input("Choose mode (1, 2, 3, 4, or 5): ").strip() or MODE_UNIFIED
     except EOFError:
         mode = MODE_UNIFIED
 
@@ -51,42 +266,21 @@ def main():
             project_key = ""
         if not project_key:
             print("⚠️ No project key provided. Exiting.")
-            return
+            return 2
         
         try:
             ticket_input = input("Enter ticket keys (comma-separated, or press Enter for ALL): ").strip()
         except EOFError:
             ticket_input = ""
         
-        if not ticket_input:
-            # Load all tickets from project
-            print(f"\n📦 Fetching all tickets from {project_key}...")
-            result = jira_client.list_all_issues_in_project(project_key, max_results=MAX_JIRA_RESULTS)
-            issues = result.get("issues", [])
-            if not issues:
-                print(f"⚠️ No tickets found in {project_key}. Details: {result.get('details')}")
-                return
-            ticket_keys = [issue.get("key") for issue in issues]
-            print(f"Found {len(ticket_keys)} tickets: {', '.join(ticket_keys[:5])}{'...' if len(ticket_keys) > 5 else ''}")
-        else:
-            ticket_keys = [k.strip() for k in ticket_input.split(",") if k.strip()]
-        
-        print(f"\n🏗️ Building integrated application for {len(ticket_keys)} tickets...")
-        run_unified_graph(project_key, ticket_keys)
+        return run_unified(project_key, parse_tickets(ticket_input))
 
     elif mode == MODE_DEMO:
         # Mode 3: Run the calculator demo
-        print(f"\n🚀 Launching calculator demo from '{DEMO_APP_PATH}'...")
-        if os.path.exists(DEMO_APP_PATH):
-            subprocess.run(["streamlit", "run", DEMO_APP_PATH])
-        else:
-            print(f"⚠️  Demo application not found at '{DEMO_APP_PATH}'.")
-            print("   Please ensure the calculator app is saved in the 'simple_calculator' directory.")
+        return run_demo()
     
     elif mode == MODE_INCREMENTAL:
         # Mode 4: Incremental Update
-        from incremental_update import incremental_update
-        
         try:
             ticket_input = input("Enter ticket keys to add (comma-separated, e.g., CAL-31,CAL-32): ").strip()
         except EOFError:
@@ -94,36 +288,32 @@ def main():
         
         if not ticket_input:
             print("⚠️ No ticket keys provided. Exiting.")
-            return
+            return 2
         
-        ticket_keys = [k.strip().upper() for k in ticket_input.split(",") if k.strip()]
-        print(f"\n🔄 Incremental update for {len(ticket_keys)} tickets...")
-        incremental_update(ticket_keys)
+        return run_incremental(parse_tickets(ticket_input))
     
+    elif mode == MODE_BULK_TDD:
+        # Mode 5: Bulk TDD
+        try:
+            project_key = input("Enter Jira project key (e.g., CAL): ").strip().upper()
+            ticket_input = input("Enter ticket keys (comma-separated, or press Enter for ALL): ").strip()
+        except EOFError:
+            project_key, ticket_input = "", ""
+        if not project_key and not ticket_input:
+            print("⚠️ No project key or tickets provided. Exiting.")
+            return 2
+
+        return 1 if run_bulk(project_key, parse_tickets(ticket_input)) else 0
+
     else: # mode == MODE_TDD or default to 1
-        # Mode 1: Generate Standalone Module (can be single or bulk)
+        # Mode 1: Generate Standalone Module
         # For Mode 1, we only need the ticket key.
         ticket_key = input("Enter a single Jira ticket key (e.g., CAL-1): ").strip().upper()
         if not ticket_key:
             print("⚠️ No ticket key provided. Exiting.")
-            return
-        
-        print(f"\n--- Processing {ticket_key} with TDD workflow ---")
-        status = "✅ success"
-        try:
-            run_poc_graph(ticket_key)
-        except Exception as e:
-            print(f"⚠️ Error processing {ticket_key}: {e}")
-            status = f"❌ error: {e}"
-        
-        # For a single ticket, just print the result directly
-        print("\n" + "="*60)
-        print(f"📊 TDD Generation Result for {ticket_key}")
-        print("="*60)
-        print(f"{ticket_key}: {status}")
-        print("="*60)
+            return 2
         
-        # No manifest for single ticket, as it's not a bulk run
+        return 1 if run_tdd([ticket_key]) else 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
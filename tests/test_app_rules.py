@@ -0,0 +1,61 @@
+"""
+Tests for the validate_app rule engine in utils.app_rules.
+"""
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.app_rules import check_app
+
+APP = '''import streamlit as st
+from modules.calc import add, missing
+
+if st.button(
+    label=f"Add {str(len([1, 2]))}",
+):
+    st.session_state.total = add(1, 2)
+
+if st.button("Reset", key="reset", on_click=print):
+    st.session_state["total"] = 0
+    st.rerun()
+
+st.markdown(f"`{st.session_state.total}`")
+'''
+
+
+def _rules(issues):
+    return [(issue["rule"], issue["line"]) for issue in issues]
+
+
+def test_rules_report_exact_lines():
+    """Multi-line calls with nested parentheses are checked, each issue at its own line."""
+    issues = check_app(APP)
+    assert _rules(issues) == [
+        ("button_key", 4),
+        ("rerun_after_state_write", 4),
+        ("button_on_click", 9),
+        ("markdown_backticks", 13),
+    ]
+    assert "on_click" in issues[2]["message"]
+
+
+def test_streamlit_alias_is_followed():
+    """Checks apply to whatever name streamlit is imported as."""
+    issues = check_app("import streamlit as stl\n\nstl.button('Go')\n")
+    assert _rules(issues) == [("button_key", 3)]
+
+
+def test_syntax_error_is_the_only_issue():
+    issues = check_app("import streamlit as st\nst.button('x'\n")
+    assert [issue["rule"] for issue in issues] == ["syntax"]
+
+
+def test_large_app_validates_quickly():
+    """A few thousand lines are validated in one pass well under a second."""
+    block = 'if st.button("b{i}", key="b{i}"):\n    st.session_state.v = {i}\n    st.rerun()\n'
+    source = "import streamlit as st\n" + "".join(block.format(i=i) for i in range(2000))
+    start = time.perf_counter()
+    assert check_app(source) == []
+    assert time.perf_counter() - start < 1.0
@@ -0,0 +1,52 @@
+"""
+Tests for the headless app smoke run in agents.app_smoke.
+"""
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("streamlit.testing.v1")
+
+from agents.app_smoke import smoke_app
+
+APP = '''import streamlit as st
+from modules.calc import add
+
+if "total" not in st.session_state:
+    st.session_state.total = 0
+st.markdown(f"Total: {st.session_state.total}")
+if st.button("Add", key="add"):
+    st.session_state.total = add(st.session_state.total)
+    st.rerun()
+if st.button("Undo", key="undo"):
+    st.session_state.history.pop()
+if st.button("Reset", key="reset"):
+    st.session_state.total = 0
+    st.rerun()
+'''
+
+
+def _write_app(tmp_path, source):
+    (tmp_path / "modules").mkdir()
+    (tmp_path / "modules" / "__init__.py").write_text("")
+    (tmp_path / "modules" / "calc.py").write_text("def add(a, b):\n    return a + b\n")
+    (tmp_path / "app.py").write_text(source)
+    return str(tmp_path / "app.py")
+
+
+def test_clicks_report_runtime_errors_with_lines(tmp_path):
+    """Each keyed button is clicked; wrong call signatures and missing state keys come back with lines."""
+    issues = smoke_app(_write_app(tmp_path, APP), workers=2)
+    assert [(i["file"], i["line"]) for i in issues] == [("app.py", 8), ("app.py", 11)]
+    assert "Clicking button 'add' raised TypeError" in issues[0]["message"]
+    assert "Clicking button 'undo' raised AttributeError" in issues[1]["message"]
+
+
+def test_overrunning_app_is_cut_off_at_the_budget(tmp_path):
+    app = _write_app(tmp_path, "import time\nimport streamlit as st\n\ntime.sleep(30)\n")
+    issues = smoke_app(app, budget=3)
+    assert len(issues) == 1
+    assert issues[0]["message"] == "Running the app did not finish within the 3s smoke budget"
@@ -0,0 +1,42 @@
+"""
+Tests for the content-addressed artifact store used to keep large text out of graph state.
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from graph.artifacts import ArtifactStore, is_ref
+
+
+def test_put_returns_small_references_and_stores_identical_text_once(tmp_path):
+    store = ArtifactStore(str(tmp_path / "blobs"))
+    spec = '{"module": "calc", "functions": [{"name": "add"}]}' * 200
+
+    ref = store.put(spec)
+
+    assert is_ref(ref) and len(ref) < 80
+    assert store.put(spec) == ref
+    assert len(os.listdir(tmp_path / "blobs")) == 1
+    assert store.get(ref) == spec
+    assert store.put("") == "" and store.get(None) == ""
+    # Plain strings from states checkpointed before the store existed come back unchanged
+    assert store.get("legacy plan text") == "legacy plan text"
+    assert store.expand({"specs": {"calc": ref}, "architecture_plan": ref, "passed": 3},
+                        ["specs", "architecture_plan", "review_report"]) == \
+        {"specs": {"calc": spec}, "architecture_plan": spec, "passed": 3}
+
+
+def test_lru_evicts_least_recently_used_and_reloads_from_disk(tmp_path):
+    store = ArtifactStore(str(tmp_path / "blobs"), cache_bytes=25)
+    first, second, third = (store.put(text * 10) for text in "abc")
+
+    # Room for two: the third put evicted `first`
+    assert store.get(first) == "a" * 10
+    assert (store.hits, store.misses) == (0, 1)
+    assert store.get(third) == "c" * 10  # still cached
+    assert store.get(second) == "b" * 10  # evicted when `first` was reloaded
+    assert (store.hits, store.misses) == (1, 2)
+
+    fresh = ArtifactStore(str(tmp_path / "blobs"))  # e.g. a resumed run in a new process
+    assert fresh.get(third) == "c" * 10
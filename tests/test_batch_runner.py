@@ -0,0 +1,61 @@
+"""
+Tests for job files and concurrent batch runs in batch_runner.
+"""
+import sys
+import os
+import json
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import batch_runner
+from batch_runner import job_command, load_jobs, run_batch
+
+
+def test_load_jobs_normalizes_and_reports_errors(tmp_path):
+    jobs_file = tmp_path / "jobs.json"
+    jobs_file.write_text(json.dumps({"jobs": [
+        {"name": "calc", "mode": "unified", "project": "cal", "tickets": "cal-1, CAL-2"},
+        {"mode": "tdd", "tickets": ["CAL-3"]},
+        {"mode": "unified"},
+        {"mode": "deploy", "tickets": ["CAL-4"]},
+        {"mode": "incremental", "tickets": ["CAL-31"]},
+        {"name": "calc-a", "mode": "incremental", "tickets": ["CAL-32"], "workspace": str(tmp_path / "calc")},
+        {"name": "calc-b", "mode": "tdd", "tickets": ["CAL-33"], "workspace": str(tmp_path / "calc") + "/"},
+    ]}))
+    loaded = load_jobs(str(jobs_file))
+
+    assert loaded["jobs"][0]["project"] == "CAL"
+    assert loaded["jobs"][0]["tickets"] == ["CAL-1", "CAL-2"]
+    assert loaded["jobs"][1]["name"] == "02-tdd-cal-3"
+    assert job_command(loaded["jobs"][0])[-4:] == ["--project", "CAL", "--tickets", "CAL-1,CAL-2"]
+    assert len(loaded["errors"]) == 4
+    assert "need a project" in loaded["errors"][0]
+    assert "mode must be one of" in loaded["errors"][1]
+    assert "incremental jobs need the workspace of an existing app" in loaded["errors"][2]
+    assert "(calc-b): workspace" in loaded["errors"][3] and "used by an earlier job" in loaded["errors"][3]
+
+
+def test_run_batch_runs_jobs_concurrently_in_separate_workspaces(tmp_path, monkeypatch):
+    # Stand-in for main.py: writes into its working directory, sleeps, and fails for one job
+    def fake_command(job):
+        code = ("import sys, time; open('modules.txt', 'w').write(sys.argv[1]); time.sleep(0.5); "
+                "print('🧷 Run unified-x (resume with: ...)'); sys.exit(1 if sys.argv[1] == 'bad' else 0)")
+        return [sys.executable, "-c", code, job["name"]]
+
+    monkeypatch.setattr(batch_runner, "job_command", fake_command)
+    monkeypatch.setattr(batch_runner.Settings, "BATCH_DIR", str(tmp_path / "batches"))
+    jobs = [{"name": name, "mode": "tdd", "project": "", "tickets": ["CAL-1"], "workspace": None}
+            for name in ("one", "two", "bad")]
+
+    start = time.time()
+    summary = run_batch(jobs, workers=3, batch_id="b1")
+
+    assert time.time() - start < 1.4
+    assert (summary["succeeded"], summary["failed"]) == (2, 1)
+    for job in summary["jobs"]:
+        assert open(os.path.join(job["workspace"], "modules.txt")).read() == job["name"]
+        assert job["run_id"] == "unified-x"
+    with open(tmp_path / "batches" / "b1" / "summary.json") as f:
+        written = json.load(f)
+    assert [job["status"] for job in written["jobs"]] == ["succeeded", "succeeded", "failed"]
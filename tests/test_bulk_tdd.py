@@ -0,0 +1,77 @@
+"""
+Tests for the bulk TDD manifest: skipping unchanged tickets, resuming interrupted ones, atomic updates.
+"""
+import sys
+import os
+import json
+
+from langgraph.graph import StateGraph, START, END
+from typing_extensions import TypedDict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bulk_tdd
+from bulk_tdd import SUCCESS, plan_ticket, run_bulk_tdd
+from graph.checkpointing import run_graph, save_run_info
+
+
+class TicketState(TypedDict, total=False):
+    failed: int
+
+
+def fake_runner(ticket_key, run_id, resume):
+    # Runs in a worker process in place of run_poc_graph
+    if ticket_key == "CAL-3":
+        return {"status": "⚠️ 1 tests failing", "passed": 2, "failed": 1}
+    return {"status": SUCCESS, "passed": 3, "failed": 0}
+
+
+def test_plan_ticket_skips_unchanged_successes_and_resumes_interrupted_runs(tmp_path, monkeypatch):
+    monkeypatch.setattr(bulk_tdd.Settings, "RUNS_DIR", str(tmp_path / "runs"))
+    monkeypatch.setattr(bulk_tdd.Settings, "CHECKPOINTS", True)
+    save_run_info("tdd-1", "tdd", {"issue_key": "CAL-1"})
+    done = {"key": "CAL-1", "status": SUCCESS, "updated": "2025-01-01"}
+    interrupted = {"key": "CAL-1", "status": "⏳ running", "updated": "2025-01-01", "run_id": "tdd-1"}
+
+    assert plan_ticket(done, "2025-01-01") == "skip"
+    assert plan_ticket(done, "2025-02-01") == "run"
+    assert plan_ticket(done, "2025-01-01", force=True) == "run"
+    assert plan_ticket({"key": "CAL-1", "status": SUCCESS}, "2025-01-01") == "run"  # old manifest format
+    assert plan_ticket(interrupted, "2025-01-01") == "resume"
+    assert plan_ticket({**interrupted, "run_id": "tdd-gone"}, "2025-01-01") == "run"
+
+
+def test_plan_ticket_reruns_a_run_that_finished_with_failing_tests(tmp_path, monkeypatch):
+    monkeypatch.setattr(bulk_tdd.Settings, "RUNS_DIR", str(tmp_path / "runs"))
+    monkeypatch.setattr(bulk_tdd.Settings, "CHECKPOINTS", True)
+    builder = StateGraph(TicketState)
+    builder.add_node("run_tests", lambda state: {"failed": 2})
+    builder.add_edge(START, "run_tests")
+    builder.add_edge("run_tests", END)
+    save_run_info("tdd-2", "tdd", {"issue_key": "CAL-2"})
+    assert run_graph(builder, {}, "tdd-2") == {"failed": 2}
+
+    # The graph reached END: resuming would run no nodes and report the same failures again
+    failing = {"key": "CAL-2", "status": "⚠️ 2 tests failing", "updated": "2025-01-01", "run_id": "tdd-2"}
+    assert plan_ticket(failing, "2025-01-01") == "run"
+
+
+def test_run_bulk_tdd_records_outcomes_and_skips_on_the_next_run(tmp_path, monkeypatch):
+    manifest_path = str(tmp_path / "generation_manifest.json")
+    with open(manifest_path, "w") as f:
+        json.dump([{"key": "CAL-1", "status": SUCCESS}], f)
+    monkeypatch.setattr(bulk_tdd, "fetch_updated", lambda keys: {
+        key: {"error": "Jira API returned 404"} if key == "CAL-4" else {"updated": "2025-01-01"} for key in keys})
+
+    keys = ["CAL-1", "CAL-2", "CAL-3", "CAL-4"]
+    first = run_bulk_tdd(keys, workers=2, manifest_path=manifest_path, runner=fake_runner)
+    second = run_bulk_tdd(keys, workers=2, manifest_path=manifest_path, runner=fake_runner)
+
+    assert (first["succeeded"], first["failed"], first["skipped"]) == (2, 2, 0)
+    assert (second["succeeded"], second["failed"], second["skipped"]) == (0, 2, 2)
+    with open(manifest_path) as f:
+        entries = {entry["key"]: entry for entry in json.load(f)}
+    assert [entries[key]["status"] for key in keys[:3]] == [SUCCESS, SUCCESS, "⚠️ 1 tests failing"]
+    assert entries["CAL-4"]["status"].startswith("❌ error: Jira API returned 404")
+    assert entries["CAL-2"]["updated"] == "2025-01-01" and entries["CAL-2"]["run_id"].startswith("tdd-")
+    assert not os.path.exists(manifest_path + ".tmp")
@@ -0,0 +1,109 @@
+"""
+Tests for durable runs (checkpoints and file snapshots) in graph.checkpointing.
+"""
+import sys
+import os
+from typing import Annotated
+
+import pytest
+from langgraph.graph import StateGraph, START, END
+from typing_extensions import TypedDict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import Settings
+from graph.checkpointing import load_run_info, run_graph, save_run_info
+
+
+class State(TypedDict, total=False):
+    code_files: dict
+    app_path: str
+
+
+class FanOutState(TypedDict, total=False):
+    module_results: Annotated[dict, lambda old, new: {**old, **new}]
+
+
+def _builder(calls, fail_app):
+    def generate_code(state):
+        calls.append("generate_code")
+        with open("calc.py", "w") as fh:
+            fh.write("def add(a, b):\n    return a + b\n")
+        return {"code_files": {"calc": "calc.py"}}
+
+    def generate_main_app(state):
+        calls.append("generate_main_app")
+        if fail_app:
+            raise RuntimeError("quota exceeded")
+        with open("app.py", "w") as fh:
+            fh.write("from calc import add\n")
+        return {"app_path": "app.py"}
+
+    builder = StateGraph(State)
+    builder.add_node(generate_code)
+    builder.add_node(generate_main_app)
+    builder.add_edge(START, "generate_code")
+    builder.add_edge("generate_code", "generate_main_app")
+    builder.add_edge("generate_main_app", END)
+    return builder
+
+
+def test_resume_continues_after_last_completed_node(tmp_path, monkeypatch):
+    """A run failing at generate_main_app resumes there, with generated files restored from the snapshot."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(Settings, "RUNS_DIR", str(tmp_path / "runs"))
+    monkeypatch.setattr(Settings, "CHECKPOINTS", True)
+    save_run_info("run-1", "unified", {"project_key": "CAL", "ticket_keys": ["CAL-1"]})
+
+    calls = []
+    with pytest.raises(RuntimeError):
+        run_graph(_builder(calls, fail_app=True), {}, "run-1")
+    assert load_run_info("run-1")["finished"] is False
+    os.remove("calc.py")  # e.g. the workspace was cleaned between attempts
+
+    result = run_graph(_builder(calls, fail_app=False), {}, "run-1", resume=True)
+    assert calls == ["generate_code", "generate_main_app", "generate_main_app"]
+    assert result == {"code_files": {"calc": "calc.py"}, "app_path": "app.py"}
+    assert open("calc.py").read().startswith("def add")
+    assert load_run_info("run-1") == {"kind": "unified", "args": {"project_key": "CAL", "ticket_keys": ["CAL-1"]},
+                                      "finished": True}
+    assert load_run_info("missing") is None
+
+
+def test_files_of_parallel_nodes_are_snapshotted_with_their_superstep(tmp_path, monkeypatch):
+    """Modules written in one superstep are restored when resuming from the checkpoint after it."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(Settings, "RUNS_DIR", str(tmp_path / "runs"))
+    monkeypatch.setattr(Settings, "CHECKPOINTS", True)
+
+    def module(name):
+        def build(state):
+            with open(f"{name}.py", "w") as fh:
+                fh.write(f"NAME = {name!r}\n")
+            return {"module_results": {name: {"code_path": f"{name}.py"}}}
+        return build
+
+    def join_modules(state):
+        if fail_join:
+            raise RuntimeError("quota exceeded")
+        return {}
+
+    builder = StateGraph(FanOutState)
+    builder.add_node("calc", module("calc"))
+    builder.add_node("storage", module("storage"))
+    builder.add_node("join_modules", join_modules)
+    builder.add_edge(START, "calc")
+    builder.add_edge(START, "storage")
+    builder.add_edge(["calc", "storage"], "join_modules")
+    builder.add_edge("join_modules", END)
+
+    fail_join = True
+    with pytest.raises(RuntimeError):
+        run_graph(builder, {}, "run-2")
+    os.remove("calc.py")
+    os.remove("storage.py")
+
+    fail_join = False
+    run_graph(builder, {}, "run-2", resume=True)
+    assert open("calc.py").read() == "NAME = 'calc'\n"
+    assert open("storage.py").read() == "NAME = 'storage'\n"
@@ -0,0 +1,52 @@
+"""
+Tests for utils.code_merge.splice_definitions.
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.code_merge import splice_definitions
+
+EXISTING = '''"""Calculator."""
+import math
+
+# Keep this comment
+def add(a, b):
+    return a + b
+
+
+if __name__ == "__main__":
+    print(add(1, 2))
+'''
+
+
+def test_new_functions_are_spliced_and_imports_deduped():
+    """Existing text is preserved, new imports join the import block, defs go above the main guard."""
+    additions = "```python\nimport math\nfrom statistics import mean\n\ndef average(xs):\n    return mean(xs)\n```"
+    merge = splice_definitions(EXISTING, additions)
+    assert merge["error"] is None and merge["added"] == ["average"]
+    code = merge["code"]
+    assert code.count("import math") == 1
+    assert code.index("from statistics import mean") < code.index("# Keep this comment")
+    assert code.index("def average") < code.index('if __name__ == "__main__":')
+    assert "return a + b" in code
+
+
+def test_conflicting_redefinition_is_rejected():
+    """A different body for an existing function is reported and the original is kept."""
+    merge = splice_definitions(EXISTING, "def add(a, b):\n    return a - b\n\ndef add_one(a):\n    return a + 1\n")
+    assert merge["added"] == ["add_one"]
+    assert merge["conflicts"] and "return a - b" not in merge["code"]
+
+
+def test_identical_redefinition_is_skipped():
+    """Re-emitting an existing function unchanged is harmless."""
+    merge = splice_definitions(EXISTING, "def add(a, b):\n    return a + b\n")
+    assert merge["skipped"] == ["add"] and merge["code"] == EXISTING
+
+
+def test_unparseable_additions_leave_code_untouched():
+    """Syntax errors in the model output are reported, not written."""
+    merge = splice_definitions(EXISTING, "def broken(:\n")
+    assert merge["error"] and merge["code"] == EXISTING
@@ -0,0 +1,82 @@
+"""
+Tests for agents.failure_records: parsing pytest failures into compact records.
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.failure_records import build_records, focus_source, format_records, parse_longrepr, summary_counts
+
+ASSERT_LONGREPR = """def test_add():
+>       assert add(1, 2) == 4
+E       assert 3 == 4
+E        +  where 3 = add(1, 2)
+
+generated_tests/test_calc.py:4: AssertionError"""
+
+MODULE_ERROR_LONGREPR = """def test_div():
+>       assert div(1, 0) == 1
+
+generated_tests/test_calc.py:7: 
+_ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ 
+
+    def div(a, b):
+>       return a / b
+E       ZeroDivisionError: division by zero
+
+modules/calc.py:5: ZeroDivisionError"""
+
+
+def test_parse_assertion_operands():
+    """Comparisons yield the exception type, operands and failing location."""
+    info = parse_longrepr(ASSERT_LONGREPR)
+    assert info["exc_type"] == "AssertionError"
+    assert (info["left"], info["op"], info["right"]) == ("3", "==", "4")
+    assert (info["file"], info["line"]) == ("generated_tests/test_calc.py", 4)
+
+
+def test_parse_points_at_raising_frame():
+    """Errors raised in module code point at the module line, not the test."""
+    info = parse_longrepr(MODULE_ERROR_LONGREPR)
+    assert info["exc_type"] == "ZeroDivisionError"
+    assert info["message"] == "division by zero"
+    assert (info["file"], info["line"]) == ("modules/calc.py", 5)
+
+
+def test_build_records_adds_source_context(tmp_path):
+    """Only failing tests become records, each with the failing line marked."""
+    (tmp_path / "generated_tests").mkdir()
+    (tmp_path / "generated_tests" / "test_calc.py").write_text(
+        "from modules.calc import add\n\n\ndef test_add():\n    assert add(1, 2) == 4\n")
+    result = {"rootdir": str(tmp_path), "tests": [
+        {"nodeid": "generated_tests/test_calc.py::test_ok", "outcome": "passed", "longrepr": ""},
+        {"nodeid": "generated_tests/test_calc.py::test_add", "outcome": "failed", "when": "call",
+         "longrepr": ASSERT_LONGREPR},
+    ]}
+    records = build_records(result)
+    assert [r["nodeid"] for r in records] == ["generated_tests/test_calc.py::test_add"]
+    assert ">" in records[0]["context"] and "def test_add" in records[0]["context"]
+    text = format_records(records)
+    assert "left:  3" in text and "right: 4" in text
+
+
+def test_summary_counts_reads_final_line():
+    """Counts come from pytest's summary line, including errors."""
+    output = "collected 5 items\n...\n===== 2 failed, 2 passed, 1 error in 0.31s =====\n"
+    assert summary_counts(output) == {"passed": 2, "failed": 3, "errors": 1, "collected": 4}
+    assert summary_counts("no summary here") is None
+
+
+def test_focus_source_keeps_only_hit_functions():
+    """Functions the failing tests never executed are replaced by a one-line marker."""
+    source = (
+        "import math\n\nLIMIT = 10\n\n\ndef add(a, b):\n    return a + b\n\n\n"
+        "def div(a, b):\n    return a / b\n\n\nclass Shape:\n    def __init__(self, r):\n        self.r = r\n\n"
+        "    def area(self):\n        return math.pi * self.r ** 2\n\n    def name(self):\n        return 'shape'\n"
+    )
+    focused = focus_source(source, {"div", "Shape.area"})
+    assert "import math" in focused and "LIMIT = 10" in focused
+    assert "def div" in focused and "def area" in focused and "def __init__" in focused
+    assert "def add" not in focused and "def name" not in focused
+    assert "# ... add omitted" in focused
@@ -0,0 +1,42 @@
+"""
+Tests for failure fingerprints and the fix-attempt memo in agents.fix_memo.
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.failure_records import fingerprint
+from agents.fix_memo import failure_set_key, next_step, record_attempt
+
+A = [{"nodeid": "test_calc.py::test_add", "exc_type": "AssertionError", "message": "assert 3 == 4"}]
+B = [{"nodeid": "test_calc.py::test_div", "exc_type": "ZeroDivisionError", "message": "division by zero"}]
+
+
+def test_fingerprint_ignores_volatile_details():
+    """Numbers, addresses and paths in the message do not change the fingerprint; the exception type does."""
+    moved = {**A[0], "message": "assert 5 == 4\n  + where 5 = add(<Calc at 0x7f3a>, 2)"}
+    assert fingerprint(moved) == fingerprint(A[0])
+    assert fingerprint({**A[0], "exc_type": "TypeError"}) != fingerprint(A[0])
+    assert failure_set_key(A + B) == failure_set_key(B + A)
+
+
+def test_repeated_failures_switch_strategy_then_stop():
+    key = failure_set_key(A)
+    memo = {}
+    assert next_step(memo, "calc", key)["strategy"] == "analyze"
+    memo = record_attempt(memo, "calc", key, "analyze", "fix add()")
+    step = next_step(memo, "calc", key)
+    assert (step["strategy"], step["cycle"], step["previous"]) == ("alternate", False, ["fix add()"])
+    memo = record_attempt(memo, "calc", key, "alternate", "fix the test")
+    assert next_step(memo, "calc", key)["strategy"] == "stop"
+    assert next_step(memo, "other", key)["strategy"] == "analyze"
+
+
+def test_oscillation_is_detected():
+    """A fails, then B, then A again: the third lap is a cycle and does not repeat the first fix."""
+    memo = record_attempt({}, "calc", failure_set_key(A), "analyze", "fix add()")
+    memo = record_attempt(memo, "calc", failure_set_key(B), "analyze", "fix divide()")
+    step = next_step(memo, "calc", failure_set_key(A))
+    assert step["cycle"] is True
+    assert step["strategy"] == "alternate"
@@ -0,0 +1,63 @@
+"""
+Tests for the SQLite job queue in jobs.queue.
+"""
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import Settings
+from jobs.queue import JobQueue
+
+
+def _job(name):
+    return {"name": name, "mode": "tdd", "project": "", "tickets": ["CAL-1"], "workspace": None}
+
+
+def test_claims_by_priority_then_age_and_cancels_queued_jobs(tmp_path):
+    queue = JobQueue(str(tmp_path / "q.sqlite"))
+    low = queue.enqueue(_job("low"))
+    high = queue.enqueue(_job("high"), priority=5)
+    later = queue.enqueue(_job("later"))
+
+    assert queue.cancel(later) == {"id": later, "status": "cancelled"}
+    assert queue.claim("w1")["id"] == high
+    assert queue.claim("w2")["id"] == low
+    assert queue.claim("w3") is None
+    assert queue.cancel(later)["error"] == f"job {later} already cancelled"
+    assert queue.cancel(low) == {"id": low, "status": "cancelling"}
+    assert queue.heartbeat(low, "w2") == {"leased": True, "cancel": True}
+    assert queue.counts()["running"] == 2
+
+
+def test_expired_leases_are_retried_then_failed(tmp_path, monkeypatch):
+    monkeypatch.setattr(Settings, "JOB_LEASE_SECONDS", 0.05)
+    queue = JobQueue(str(tmp_path / "q.sqlite"))
+    job_id = queue.enqueue(_job("crashy"), max_attempts=2)
+
+    first = queue.claim("w1")
+    time.sleep(0.1)  # w1 "crashes": no heartbeat
+    second = queue.claim("w2")
+    assert (first["attempts"], second["id"], second["attempts"]) == (1, job_id, 2)
+    assert queue.heartbeat(job_id, "w1")["leased"] is False
+    assert queue.finish(job_id, "w1", "succeeded") is False
+
+    time.sleep(0.1)
+    assert queue.claim("w3") is None
+    job = queue.get(job_id)
+    assert job["status"] == "failed"
+    assert "lease lost" in job["error"]
+
+
+def test_reads_requeue_jobs_whose_lease_ran_out_without_a_claim(tmp_path, monkeypatch):
+    monkeypatch.setattr(Settings, "JOB_LEASE_SECONDS", 0.05)
+    queue = JobQueue(str(tmp_path / "q.sqlite"))
+    job_id = queue.enqueue(_job("crashy"))
+    queue.claim("w1")
+    assert queue.counts()["running"] == 1
+
+    time.sleep(0.1)  # w1 "crashes" and no worker is polling
+    assert queue.counts()["running"] == 0
+    assert [job["status"] for job in queue.list()] == ["queued"]
+    assert queue.get(job_id)["lease_owner"] is None
@@ -0,0 +1,65 @@
+"""
+Tests for the job worker daemon in jobs.worker.
+"""
+import sys
+import os
+import sqlite3
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jobs.worker as worker
+from config.settings import Settings
+from jobs.queue import JobQueue
+
+
+def test_worker_runs_jobs_concurrently_and_stops_cancelled_ones(tmp_path, monkeypatch):
+    # Stand-in for main.py: records its working directory, sleeps (a long time for "slow"), fails for "bad"
+    def fake_command(job):
+        seconds = 30 if job["name"] == "slow" else 0.5
+        code = ("import os, sys, time; open('ran.txt', 'w').write(os.getcwd()); "
+                "print('🧷 Run unified-x (resume with: ...)', flush=True); "
+                f"time.sleep({seconds}); sys.exit(1 if sys.argv[1] == 'bad' else 0)")
+        return [sys.executable, "-c", code, job["name"]]
+
+    monkeypatch.setattr(worker, "job_command", fake_command)
+    monkeypatch.setattr(Settings, "JOBS_DIR", str(tmp_path / "workspaces"))
+    monkeypatch.setattr(Settings, "JOB_HEARTBEAT_SECONDS", 0.1)
+    queue = JobQueue(str(tmp_path / "q.sqlite"))
+    ids = {name: queue.enqueue({"name": name, "mode": "tdd", "project": "", "tickets": ["CAL-1"]})
+           for name in ("slow", "good", "bad")}
+
+    threading.Timer(1.0, queue.cancel, args=(ids["slow"],)).start()
+    start = time.time()
+    worker.run_worker(workers=3, queue=queue, exit_when_idle=True)
+
+    assert time.time() - start < 10
+    statuses = {name: queue.get(job_id)["status"] for name, job_id in ids.items()}
+    assert statuses == {"slow": "cancelled", "good": "succeeded", "bad": "failed"}
+    good = queue.get(ids["good"])
+    assert good["run_id"] == "unified-x"
+    assert good["workspace"].startswith(str(tmp_path / "workspaces"))
+    assert open(os.path.join(good["workspace"], "ran.txt")).read() == good["workspace"]
+
+
+def test_failing_heartbeats_stop_the_job_once_its_lease_has_run_out(tmp_path, monkeypatch):
+    class LockedQueue(JobQueue):
+        def heartbeat(self, job_id, owner, **fields):
+            raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(worker, "job_command", lambda job: [sys.executable, "-c", "import time; time.sleep(30)"])
+    monkeypatch.setattr(Settings, "JOBS_DIR", str(tmp_path / "workspaces"))
+    monkeypatch.setattr(Settings, "JOB_HEARTBEAT_SECONDS", 0.1)
+    monkeypatch.setattr(Settings, "JOB_LEASE_SECONDS", 0.5)
+    queue = LockedQueue(str(tmp_path / "q.sqlite"))
+    queue.enqueue({"name": "hung-db", "mode": "tdd", "project": "", "tickets": ["CAL-1"]})
+    job = queue.claim("w1")
+    started = []
+    real_popen = worker.subprocess.Popen
+    monkeypatch.setattr(worker.subprocess, "Popen", lambda *a, **kw: started.append(real_popen(*a, **kw)) or started[-1])
+
+    start = time.time()
+    assert worker.execute_job(queue, job, "w1", threading.Event()) == "lost"
+    assert time.time() - start < 5
+    assert started[0].poll() is not None  # not left running for the next worker to collide with
@@ -0,0 +1,62 @@
+"""
+Tests for the job status API in jobs.api.
+"""
+import sys
+import os
+import json
+import threading
+import urllib.error
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import Settings
+from jobs.api import make_server
+from jobs.queue import JobQueue
+
+
+def _call(base, path, body=None):
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    request = urllib.request.Request(base + path, data=data, method="POST" if data is not None else "GET")
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_enqueue_status_and_cancel_over_http(tmp_path):
+    server = make_server(JobQueue(str(tmp_path / "q.sqlite")), host="127.0.0.1", port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        status, created = _call(base, "/jobs", {"mode": "unified", "project": "cal", "priority": 2})
+        assert status == 201
+        assert _call(base, "/jobs", {"mode": "tdd"})[0] == 400
+
+        status, job = _call(base, f"/jobs/{created['id']}")
+        assert (status, job["project"], job["priority"], job["status"]) == (200, "CAL", 2, "queued")
+        assert _call(base, f"/jobs/{created['id']}/cancel", {}) == (200, {"id": created["id"], "status": "cancelled"})
+        assert _call(base, f"/jobs/{created['id']}/cancel", {})[0] == 409
+        assert _call(base, "/health")[1]["counts"]["cancelled"] == 1
+        assert _call(base, "/jobs/999")[0] == 404
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_submitted_workspaces_must_stay_inside_jobs_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(Settings, "JOBS_DIR", str(tmp_path / "workspaces"))
+    server = make_server(JobQueue(str(tmp_path / "q.sqlite")), host="127.0.0.1", port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    job = {"mode": "incremental", "tickets": ["CAL-31"]}
+    try:
+        for outside in ("/etc", "../elsewhere", "."):
+            assert _call(base, "/jobs", {**job, "workspace": outside})[0] == 400
+        status, created = _call(base, "/jobs", {**job, "workspace": "apps/calc"})
+        assert status == 201
+        assert _call(base, f"/jobs/{created['id']}")[1]["workspace"] == str(tmp_path / "workspaces" / "apps" / "calc")
+    finally:
+        server.shutdown()
+        server.server_close()
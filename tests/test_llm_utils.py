@@ -0,0 +1,79 @@
+"""
+Tests for adaptive output budgets and truncated-response continuation.
+"""
+import json
+import sys
+import os
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import Settings
+from utils import llm_utils
+
+
+class FakeClient:
+    """Returns queued (content, finish_reason) pairs and records each request."""
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.requests = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        self.requests.append(kwargs)
+        content, finish_reason = self.replies.pop(0)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason=finish_reason)],
+            usage=SimpleNamespace(completion_tokens=len(content)),
+        )
+
+
+def _isolate_history(monkeypatch, tmp_path):
+    monkeypatch.setattr(Settings, "TOKEN_HISTORY_PATH", str(tmp_path / "history.json"))
+    monkeypatch.setattr(llm_utils, "_history", None)
+
+
+def test_budget_scales_with_spec_size(monkeypatch, tmp_path):
+    """A spec with more functions gets a larger budget."""
+    _isolate_history(monkeypatch, tmp_path)
+    small = json.dumps({"functions": [{"name": "add"}], "edge_cases": []})
+    large = json.dumps({"functions": [{"name": f"f{i}"} for i in range(12)], "edge_cases": ["x"] * 10})
+    assert llm_utils.estimate_max_tokens("generate_tests", spec=small) < llm_utils.estimate_max_tokens("generate_tests", spec=large)
+    assert llm_utils.estimate_max_tokens("generate_tests", spec=large) <= Settings.LLM_MAX_OUTPUT_TOKENS
+
+
+def test_history_overrides_static_profile(monkeypatch, tmp_path):
+    """Recorded completion lengths drive the estimate once enough are stored."""
+    _isolate_history(monkeypatch, tmp_path)
+    for _ in range(llm_utils.MIN_HISTORY):
+        llm_utils.record_completion("fix_analyzer", 400)
+    assert llm_utils.estimate_max_tokens("fix_analyzer", default=1000) == int(400 * llm_utils.SAFETY_MARGIN)
+    assert json.loads((tmp_path / "history.json").read_text())["fix_analyzer"][0]["tokens"] == 400
+
+
+def test_history_merges_with_entries_written_by_other_processes(monkeypatch, tmp_path):
+    """Recording re-reads the file, so entries another process wrote in the meantime survive."""
+    _isolate_history(monkeypatch, tmp_path)
+    llm_utils.record_completion("spec_agent", 300)
+    on_disk = json.loads((tmp_path / "history.json").read_text())
+    on_disk["generate_code"] = [{"tokens": 900, "units": None}]
+    (tmp_path / "history.json").write_text(json.dumps(on_disk))
+
+    llm_utils.record_completion("spec_agent", 350)
+
+    history = json.loads((tmp_path / "history.json").read_text())
+    assert [e["tokens"] for e in history["spec_agent"]] == [300, 350]
+    assert history["generate_code"] == [{"tokens": 900, "units": None}]
+    assert llm_utils._load_history() == history
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_truncated_response_is_continued(monkeypatch, tmp_path):
+    """finish_reason == 'length' triggers a continuation and the parts are stitched."""
+    _isolate_history(monkeypatch, tmp_path)
+    client = FakeClient([("def add(a, b):\n", "length"), ("    return a + b\n", "stop")])
+    text = llm_utils.chat_completion(client, "generate_code", [{"role": "user", "content": "go"}], max_tokens=300)
+    assert text == "def add(a, b):\n    return a + b\n"
+    assert len(client.requests) == 2
+    assert client.requests[1]["messages"][-2] == {"role": "assistant", "content": "def add(a, b):\n"}
@@ -0,0 +1,27 @@
+"""
+Tests for the main.py command line: --resume exit codes and argument checks.
+"""
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from config.settings import Settings
+
+
+def test_resuming_an_unknown_run_fails(tmp_path, monkeypatch, capsys):
+    """Batch runs and the job worker read exit code 0 as success, so a missing run must not return it."""
+    monkeypatch.setattr(Settings, "RUNS_DIR", str(tmp_path / "runs"))
+    assert main.resume_run("unified-bogus") == 1
+    assert "No checkpointed run 'unified-bogus'" in capsys.readouterr().out
+
+
+def test_resume_cannot_be_combined_with_a_subcommand(capsys):
+    assert main.parse_args(["--resume", "tdd-1"]).resume == "tdd-1"
+    with pytest.raises(SystemExit) as exit_info:
+        main.parse_args(["--resume", "tdd-1", "demo"])
+    assert exit_info.value.code == 2
+    assert "cannot be combined with 'demo'" in capsys.readouterr().err
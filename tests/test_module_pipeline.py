@@ -0,0 +1,89 @@
+"""
+Tests for the per-module pipeline helpers in graph.module_pipeline.
+"""
+import sys
+import os
+import threading
+import time
+
+from langgraph.graph import StateGraph, START, END
+from typing_extensions import Annotated, TypedDict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from graph.module_pipeline import collect_module_results, merge_module_results, module_sends
+
+
+class State(TypedDict, total=False):
+    modules: dict
+    tickets: list
+    module_results: Annotated[dict, merge_module_results]
+    order: list
+
+
+class ModuleState(TypedDict, total=False):
+    module_name: str
+    module_info: dict
+    tickets: list
+    fix_laps: int
+    module_results: Annotated[dict, merge_module_results]
+
+
+class ModuleOutput(TypedDict, total=False):
+    module_results: Annotated[dict, merge_module_results]
+
+
+def test_modules_run_concurrently_and_finish_independently():
+    finished = []
+    lock = threading.Lock()
+
+    def work(state):
+        time.sleep(0.6 if state["module_name"] == "slow" else 0.05)
+        with lock:
+            finished.append(state["module_name"])
+        return {"module_results": {state["module_name"]: {
+            "spec": "{}", "code_path": f"modules/{state['module_name']}.py",
+            "tickets": [t["key"] for t in state["tickets"]]}}}
+
+    module_builder = StateGraph(ModuleState, output_schema=ModuleOutput)
+    module_builder.add_node(work)
+    module_builder.add_edge(START, "work")
+    module_builder.add_edge("work", END)
+
+    builder = StateGraph(State)
+    builder.add_node("pipeline", module_builder.compile())
+    builder.add_node("join", lambda state: {"order": list(finished)})
+    builder.add_conditional_edges(
+        START, lambda state: module_sends("pipeline", state["modules"], state["tickets"]), ["pipeline"])
+    builder.add_edge("pipeline", "join")
+
+    modules = {"slow": {"tickets": ["P-1"]}, "fast": {"tickets": ["P-2"]}, "other": {"tickets": ["P-3"]}}
+    tickets = [{"key": "P-1"}, {"key": "P-2"}, {"key": "P-3"}]
+    start = time.time()
+    result = builder.compile().invoke({"modules": modules, "tickets": tickets})
+
+    assert time.time() - start < 1.2
+    assert result["order"][-1] == "slow"
+    assert set(result["module_results"]) == {"slow", "fast", "other"}
+    assert result["module_results"]["fast"]["tickets"] == ["P-2"]
+
+
+def test_collect_module_results_rebuilds_stage_keys():
+    results = {
+        "calc": {"spec": "{}", "test_path": "generated_tests/test_calc.py", "code_path": "modules/calc.py",
+                 "test_result": {"passed": 3, "failed": 0, "collected": 3}, "failures": [], "fix_memo": None},
+        "parse": {"spec": "{}", "test_path": "generated_tests/test_parse.py", "code_path": "modules/parse.py",
+                  "test_result": {"passed": 1, "failed": 1, "collected": 2},
+                  "failures": [{"nodeid": "test_parse.py::test_parse", "outcome": "failed",
+                               "message": "assert 1 == 2"}],
+                  "fix_memo": {"history": ["abc"], "attempts": {}}, "stuck": True},
+    }
+    update = collect_module_results(results)
+
+    assert update["code_files"] == {"calc": "modules/calc.py", "parse": "modules/parse.py"}
+    assert update["test_files"]["parse"] == "generated_tests/test_parse.py"
+    assert (update["passed"], update["failed"], update["collected"]) == (4, 1, 5)
+    assert list(update["test_failures"]) == ["parse"]
+    assert "--- parse ---" in update["test_output"]
+    assert update["fix_memo"] == {"parse": {"history": ["abc"], "attempts": {}}}
+    assert update["stuck"] is True
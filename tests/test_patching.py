@@ -0,0 +1,92 @@
+"""
+Tests for applying fixer patches in utils.patching.
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.patching import apply_patch, parse_patch
+
+CODE = '''def add(a, b):
+    return a + b
+
+
+def divide(a, b):
+    return a / b
+
+
+def average(values):
+    total = 0
+    for value in values:
+        total += value
+    return total / len(values)
+'''
+
+
+def test_search_replace_blocks_are_applied_per_file():
+    patch = '''--- EDIT FILE: modules/calc.py ---
+<<<<<<< SEARCH
+def divide(a, b):
+    return a / b
+=======
+def divide(a, b):
+    if b == 0:
+        raise ValueError("Cannot divide by zero")
+    return a / b
+>>>>>>> REPLACE
+--- END EDIT ---
+'''
+    outcome = apply_patch(patch, {"modules/calc.py": CODE, "tests/test_calc.py": "import pytest\n"})
+    assert outcome["error"] is None
+    assert list(outcome["files"]) == ["modules/calc.py"]
+    assert 'raise ValueError("Cannot divide by zero")\n    return a / b\n\n\ndef average' in outcome["files"]["modules/calc.py"]
+
+
+def test_indentation_and_small_differences_are_tolerated():
+    """A search block with lost indentation or a typo still finds its place; the replacement is re-indented."""
+    dedented = ("<<<<<<< SEARCH\ntotal = 0\nfor value in values:\n=======\n"
+                "if not values:\n    return 0.0\ntotal = 0\nfor value in values:\n>>>>>>> REPLACE\n")
+    outcome = apply_patch(dedented, {"calc.py": CODE}, "calc.py")
+    assert outcome["error"] is None
+    assert "    if not values:\n        return 0.0\n    total = 0\n" in outcome["files"]["calc.py"]
+
+    typo = ("<<<<<<< SEARCH\n    for valeu in values:\n        total += value\n=======\n"
+            "    for value in values:\n        total += float(value)\n>>>>>>> REPLACE\n")
+    outcome = apply_patch(typo, {"calc.py": CODE}, "calc.py")
+    assert outcome["error"] is None
+    assert "        total += float(value)\n    return total" in outcome["files"]["calc.py"]
+
+
+def test_unified_diff_uses_the_hunk_line_for_repeated_blocks():
+    code = "def a():\n    return 1\n\n\ndef b():\n    return 1\n"
+    diff = '''--- a/m.py
++++ b/m.py
+@@ -5,2 +5,2 @@
+ def b():
+-    return 1
++    return 2
+'''
+    assert parse_patch(diff)["m.py"][0]["line"] == 5
+    outcome = apply_patch(diff, {"m.py": code})
+    assert outcome["files"]["m.py"] == "def a():\n    return 1\n\n\ndef b():\n    return 2\n"
+
+
+def test_unusable_patches_report_why():
+    """Ambiguous blocks, unknown files and results that do not parse all ask for a fallback."""
+    code = "x = 1\nx = 1\n"
+    ambiguous = "<<<<<<< SEARCH\nx = 1\n=======\nx = 2\n>>>>>>> REPLACE\n"
+    assert "matches 2 places" in apply_patch(ambiguous, {"m.py": code}, "m.py")["error"]
+    broken = "<<<<<<< SEARCH\nx = 1\nx = 1\n=======\nx = (\n>>>>>>> REPLACE\n"
+    assert "does not parse" in apply_patch(broken, {"m.py": code}, "m.py")["error"]
+    assert apply_patch("Here is the full file:\nx = 2\n", {"m.py": code}, "m.py")["error"] == "no edits found in the response"
+
+
+def test_empty_replace_deletes_without_a_blank_line_and_crlf_output_parses():
+    patch = ('--- EDIT FILE: modules/calc.py ---\r\n<<<<<<< SEARCH\r\ndef divide(a, b):\r\n    return a / b\r\n'
+             '=======\r\n>>>>>>> REPLACE\r\n--- END EDIT ---\r\n')
+    assert parse_patch(patch) == {"modules/calc.py": [
+        {"search": "def divide(a, b):\n    return a / b", "replace": "", "line": None}]}
+    outcome = apply_patch(patch, {"modules/calc.py": CODE})
+    assert outcome["error"] is None
+    assert "    return a + b\n\n\n\n\ndef average" in outcome["files"]["modules/calc.py"]
@@ -0,0 +1,68 @@
+"""
+Tests for the parallel and background review stage in graph.reviews.
+"""
+import sys
+import os
+import time
+
+from langgraph.graph import StateGraph, START
+from typing_extensions import TypedDict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import Settings
+from graph.reviews import add_review_stage, run_reviews_async
+
+
+class State(TypedDict, total=False):
+    app_path: str
+    review_report: str
+    senior_dev_review: str
+    architecture_review: str
+
+
+def quality_reviewer(state):
+    time.sleep(0.3)
+    return {"review_report": "quality ok"}
+
+
+def senior_dev_reviewer(state):
+    time.sleep(0.3)
+    return {"senior_dev_review": "WILL_RUN: YES"}
+
+
+def architecture_reviewer(state):
+    time.sleep(0.3)
+    return {"architecture_review": "ARCHITECTURE_SCORE: 8"}
+
+
+REVIEWERS = [quality_reviewer, senior_dev_reviewer, architecture_reviewer]
+
+
+def _graph():
+    builder = StateGraph(State)
+    builder.add_node("generate_main_app", lambda state: {"app_path": "app.py"})
+    builder.add_edge(START, "generate_main_app")
+    builder.add_edge("generate_main_app", add_review_stage(builder, REVIEWERS))
+    return builder.compile()
+
+
+def test_reviewers_run_concurrently_and_join(monkeypatch):
+    monkeypatch.setattr(Settings, "REVIEWS_ASYNC", False)
+    start = time.perf_counter()
+    result = _graph().invoke({})
+    assert time.perf_counter() - start < 0.8  # three 0.3s reviews back to back would take 0.9s
+    assert result == {"app_path": "app.py", "review_report": "quality ok",
+                      "senior_dev_review": "WILL_RUN: YES", "architecture_review": "ARCHITECTURE_SCORE: 8"}
+
+
+def test_async_mode_returns_first_and_writes_the_report(tmp_path, monkeypatch):
+    monkeypatch.setattr(Settings, "REVIEWS_ASYNC", True)
+    result = _graph().invoke({})
+    assert result == {"app_path": "app.py"}
+
+    report = tmp_path / "run_reviews.md"
+    run_reviews_async(REVIEWERS, result, str(report)).join(timeout=5)
+    text = report.read_text()
+    assert "## Quality Review\n\nquality ok" in text
+    assert "ARCHITECTURE_SCORE: 8" in text
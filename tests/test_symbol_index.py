@@ -0,0 +1,75 @@
+"""
+Tests for utils.symbol_index.
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import symbol_index
+
+SOURCE = '''"""Calc module."""
+import math
+from .helpers import clamp as _clamp
+
+PI2 = math.pi * 2
+
+
+def add(a: int, b: int = 0) -> int:
+    """Adds numbers."""
+    return a + b
+
+
+async def fetch(url):
+    return url
+
+
+class Calculator:
+    def total(self, *values):
+        return sum(values)
+'''
+
+
+def test_index_lists_functions_classes_and_imports(tmp_path):
+    """Async defs and methods are found, with signatures and docstrings."""
+    path = tmp_path / "calc.py"
+    path.write_text(SOURCE)
+    index = symbol_index.index_module(str(path))
+    assert [f["name"] for f in index["functions"]] == ["add", "fetch"]
+    assert index["functions"][0]["signature"] == "def add(a: int, b: int=0) -> int"
+    assert index["functions"][0]["docstring"] == "Adds numbers."
+    assert index["functions"][1]["is_async"]
+    assert index["classes"][0]["methods"][0]["name"] == "total"
+    assert {"kind": "from", "module": "helpers", "level": 1, "names": [("clamp", "_clamp")]} in index["imports"]
+    assert set(index["names"]) == {"math", "_clamp", "PI2", "add", "fetch", "Calculator"}
+
+
+def test_index_is_cached_until_the_file_changes(tmp_path):
+    """Unchanged files return the cached index; edits are picked up."""
+    path = tmp_path / "calc.py"
+    path.write_text(SOURCE)
+    first = symbol_index.index_module(str(path))
+    assert symbol_index.index_module(str(path)) is first
+
+    path.write_text(SOURCE + "\n\ndef sub(a, b):\n    return a - b\n")
+    assert symbol_index.function_names(str(path)) == ["add", "fetch", "sub"]
+
+
+def test_same_size_rewrite_with_the_same_mtime_is_picked_up(tmp_path):
+    """A quick fix rewriting a file within the mtime granularity is caught by the content hash."""
+    path = tmp_path / "calc.py"
+    path.write_text("def add(a, b):\n    return a + b\n")
+    stat = os.stat(path)
+    assert symbol_index.function_names(str(path)) == ["add"]
+
+    path.write_text("def sub(a, b):\n    return a - b\n")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert symbol_index.function_names(str(path)) == ["sub"]
+
+
+def test_syntax_error_yields_empty_index(tmp_path):
+    """A file that does not parse reports the error instead of raising."""
+    path = tmp_path / "broken.py"
+    path.write_text("def broken(:\n")
+    index = symbol_index.index_module(str(path))
+    assert index["functions"] == [] and index["error"]
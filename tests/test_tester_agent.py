@@ -0,0 +1,248 @@
+"""
+Tests for the pytest execution engines behind agents.tester_agent.run_pytest.
+"""
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.tester_agent import run_pytest, run_pytest_many
+
+MODULE_SRC = "def add(a, b):\n    return a + b\n"
+TESTS_SRC = (
+    "from modules.calc import add\n\n"
+    "def test_add():\n    assert add(2, 3) == 5\n\n"
+    "def test_add_negative():\n    assert add(-1, -1) == -2\n"
+)
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """A generated-project layout: modules/calc.py plus generated_tests/test_calc.py."""
+    (tmp_path / "modules").mkdir()
+    (tmp_path / "modules" / "__init__.py").write_text("")
+    (tmp_path / "modules" / "calc.py").write_text(MODULE_SRC)
+    (tmp_path / "generated_tests").mkdir()
+    (tmp_path / "generated_tests" / "test_calc.py").write_text(TESTS_SRC)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_inprocess_returns_per_test_outcomes(project):
+    """The in-process engine reports counts and one entry per test."""
+    res = run_pytest("generated_tests/test_calc.py", extra_paths=[str(project)], engine="inprocess")
+    assert (res["passed"], res["failed"], res["collected"]) == (2, 0, 2)
+    assert sorted(t["outcome"] for t in res["tests"]) == ["passed", "passed"]
+    assert not (project / ".report.json").exists()
+
+
+def test_inprocess_sees_rewritten_modules(project):
+    """Project modules are purged between runs, so a fix is picked up by the next run."""
+    run_pytest("generated_tests/test_calc.py", extra_paths=[str(project)], engine="inprocess")
+    (project / "modules" / "calc.py").write_text("def add(a, b):\n    return a - b\n")
+    res = run_pytest("generated_tests/test_calc.py", extra_paths=[str(project)], engine="inprocess")
+    assert res["failed"] == 2
+    failing = [t for t in res["tests"] if t["outcome"] == "failed"]
+    assert "assert" in failing[0]["longrepr"]
+
+
+def test_collection_error_counts_as_failure(project):
+    """An import error in the test file surfaces as an error, not as zero tests."""
+    (project / "generated_tests" / "test_calc.py").write_text("from modules.calc import missing\n")
+    res = run_pytest("generated_tests/test_calc.py", extra_paths=[str(project)], engine="inprocess")
+    assert res["errors"] == 1 and res["failed"] == 1
+
+
+def test_run_many_runs_suites_concurrently(project):
+    """Each module's suite gets its own result, merged under the module name."""
+    (project / "modules" / "greet.py").write_text("def hello():\n    return 'hi'\n")
+    (project / "generated_tests" / "test_greet.py").write_text(
+        "from modules.greet import hello\n\ndef test_hello():\n    assert hello() == 'bye'\n"
+    )
+    results = run_pytest_many(
+        {"calc": "generated_tests/test_calc.py", "greet": "generated_tests/test_greet.py"},
+        extra_paths=[str(project)], max_workers=2,
+    )
+    assert list(results) == ["calc", "greet"]
+    assert results["calc"]["passed"] == 2 and results["greet"]["failed"] == 1
+
+
+def test_subprocess_engine_uses_private_report(project):
+    """The subprocess engine no longer writes or reads a shared .report.json."""
+    res = run_pytest("generated_tests/test_calc.py", extra_paths=[str(project)], engine="subprocess")
+    assert (res["passed"], res["failed"], res["collected"]) == (2, 0, 2)
+    assert not (project / ".report.json").exists()
+
+
+def test_pool_recycles_workers_after_max_runs(project):
+    """A worker is replaced by a fresh fork once it has served max_runs jobs."""
+    from agents.pytest_worker import WorkerPool, worker_context
+
+    pool = WorkerPool(1, context=worker_context(), max_runs=1)
+    try:
+        worker = pool._idle.queue[0]
+        first_pid = worker._process.pid
+        assert pool.run(test_path="generated_tests/test_calc.py", extra_paths=[str(project)], cwd=str(project))["passed"] == 2
+        assert pool.run(test_path="generated_tests/test_calc.py", extra_paths=[str(project)], cwd=str(project))["passed"] == 2
+        assert worker._process.pid != first_pid
+    finally:
+        pool.stop()
+
+
+def test_unchanged_suite_reuses_cached_result(project):
+    """A second run with identical inputs is served from the cache."""
+    first = run_pytest("generated_tests/test_calc.py", extra_paths=[str(project)], use_cache=True)
+    second = run_pytest("generated_tests/test_calc.py", extra_paths=[str(project)], use_cache=True)
+    assert not first.get("cached") and second.get("cached")
+    assert second["passed"] == first["passed"]
+
+
+def test_transitive_module_change_invalidates_cache(project):
+    """Editing a module imported indirectly by the tests forces a rerun."""
+    (project / "modules" / "helpers.py").write_text("OFFSET = 0\n")
+    (project / "modules" / "calc.py").write_text(
+        "from modules.helpers import OFFSET\n\ndef add(a, b):\n    return a + b + OFFSET\n"
+    )
+    assert run_pytest("generated_tests/test_calc.py", extra_paths=[str(project)], use_cache=True)["passed"] == 2
+    (project / "modules" / "helpers.py").write_text("OFFSET = 1\n")
+    res = run_pytest("generated_tests/test_calc.py", extra_paths=[str(project)], use_cache=True)
+    assert not res.get("cached") and res["failed"] == 2
+
+
+def test_failing_tests_rerun_first(project):
+    """After a failure, only the failing tests run until they pass; then the full suite runs."""
+    (project / "modules" / "calc.py").write_text(
+        "def add(a, b):\n    return a + b if a > 0 else 0\n"
+    )
+    first = run_pytest("generated_tests/test_calc.py", extra_paths=[str(project)], use_cache=False, failing_first=True)
+    assert (first["passed"], first["failed"]) == (1, 1)
+
+    # Unrelated edit: the still-failing test is rerun alone and the run stops early
+    (project / "modules" / "calc.py").write_text(
+        "def add(a, b):\n    return a + b if a > 0 else 1\n"
+    )
+    second = run_pytest("generated_tests/test_calc.py", extra_paths=[str(project)], use_cache=False, failing_first=True)
+    assert second.get("partial") and (second["collected"], second["failed"]) == (1, 1)
+
+    # Once the failure is fixed, the whole suite is executed again
+    (project / "modules" / "calc.py").write_text(MODULE_SRC)
+    third = run_pytest("generated_tests/test_calc.py", extra_paths=[str(project)], use_cache=False, failing_first=True)
+    assert not third.get("partial") and (third["passed"], third["collected"]) == (2, 2)
+
+
+def test_infinite_loop_is_reported_as_timeout(project, monkeypatch):
+    """A hanging test fails with reason 'timeout' instead of stalling the run."""
+    from config.settings import Settings
+
+    monkeypatch.setattr(Settings, "TEST_TIMEOUT", 1)
+    (project / "generated_tests" / "test_calc.py").write_text(
+        TESTS_SRC + "\ndef test_hangs():\n    while True:\n        pass\n"
+    )
+    res = run_pytest("generated_tests/test_calc.py", extra_paths=[str(project)], use_cache=False)
+    hung = [t for t in res["tests"] if t["nodeid"].endswith("test_hangs")]
+    assert (res["passed"], res["failed"]) == (2, 1)
+    assert hung[0]["reason"] == "timeout"
+
+
+def test_huge_allocation_is_reported_as_memory_failure(project, monkeypatch):
+    """RLIMIT_AS turns a runaway allocation into a MemoryError tagged 'memory'."""
+    from config.settings import Settings
+
+    monkeypatch.setattr(Settings, "TEST_MEMORY_LIMIT_MB", 256)
+    (project / "generated_tests" / "test_calc.py").write_text(
+        "def test_allocates():\n    data = bytearray(4 * 1024 ** 3)\n    assert data\n"
+    )
+    res = run_pytest("generated_tests/test_calc.py", extra_paths=[str(project)], use_cache=False)
+    assert res["failed"] == 1
+    assert res["tests"][0]["reason"] == "memory"
+
+
+def test_subprocess_engine_applies_limits_from_worker_threads(project, monkeypatch):
+    """The subprocess engine caps the child itself, so concurrent runs from threads stay safe."""
+    from concurrent.futures import ThreadPoolExecutor
+    from config.settings import Settings
+
+    monkeypatch.setattr(Settings, "TEST_MEMORY_LIMIT_MB", 512)
+    (project / "generated_tests" / "test_big.py").write_text(
+        "def test_allocates():\n    data = bytearray(4 * 1024 ** 3)\n    assert data\n"
+    )
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        small, big = pool.map(lambda path: run_pytest(path, extra_paths=[str(project)], use_cache=False,
+                                                      engine="subprocess"),
+                              ["generated_tests/test_calc.py", "generated_tests/test_big.py"])
+    assert (small["passed"], small["failed"]) == (2, 0)
+    assert big["failed"] == 1 and big["tests"][0]["reason"] == "memory"
+
+
+def test_suite_timeout_kills_the_worker(project, monkeypatch):
+    """A suite that overruns its wall-clock budget is killed and reported, not awaited."""
+    from config.settings import Settings
+
+    monkeypatch.setattr(Settings, "TEST_TIMEOUT", 0)
+    monkeypatch.setattr(Settings, "TEST_SUITE_TIMEOUT", 2)
+    (project / "generated_tests" / "test_calc.py").write_text("import time\n\ndef test_sleeps():\n    time.sleep(30)\n")
+    res = run_pytest("generated_tests/test_calc.py", extra_paths=[str(project)], use_cache=False)
+    assert res["failed"] == 1 and res["tests"][0]["reason"] == "suite_timeout"
+
+
+def test_plan_shards_balances_by_duration():
+    """Slow tests are spread out so shards finish at about the same time."""
+    from agents.tester_agent import plan_shards
+
+    durations = {"t::slow1": 5.0, "t::slow2": 5.0, **{f"t::fast{i}": 0.5 for i in range(10)}}
+    plan = plan_shards(list(durations), durations, 2)
+    loads = sorted(sum(durations[n] for n in shard) for shard in plan)
+    assert loads == [7.5, 7.5]
+    assert sorted(n for shard in plan for n in shard) == sorted(durations)
+
+
+def test_record_durations_merges_with_other_writers(tmp_path, monkeypatch):
+    """Durations are folded into the file as it is on disk, keeping suites recorded by other processes."""
+    import json
+    from agents import tester_agent
+    from config.settings import Settings
+
+    path = tmp_path / ".cache" / "test_durations.json"
+    monkeypatch.setattr(Settings, "TEST_DURATIONS_PATH", str(path))
+    monkeypatch.setattr(tester_agent, "_durations", None)
+    tester_agent.record_durations("a.py", {"tests": [{"nodeid": "a.py::t", "duration": 2.0}]})
+    path.write_text(json.dumps({**json.loads(path.read_text()), "b.py": {"b.py::t": 1.0}}))
+
+    tester_agent.record_durations("a.py", {"tests": [{"nodeid": "a.py::t", "duration": 4.0}]})
+
+    assert json.loads(path.read_text()) == {"a.py": {"a.py::t": 3.0}, "b.py": {"b.py::t": 1.0}}
+    assert tester_agent._load_durations()["b.py"] == {"b.py::t": 1.0}
+
+
+def test_sharded_run_merges_outcomes(project):
+    """A suite split across shards reports the same totals as a single run."""
+    from agents.tester_agent import run_pytest_sharded
+
+    (project / "generated_tests" / "test_calc.py").write_text(
+        "from modules.calc import add\n\n"
+        + "".join(f"def test_add_{i}():\n    assert add({i}, 1) == {i + 1 if i % 4 else 0}\n\n" for i in range(8))
+    )
+    res = run_pytest_sharded("generated_tests/test_calc.py", extra_paths=[str(project)], shards=3)
+    assert res["shards"] == 3
+    assert (res["passed"], res["failed"], res["collected"]) == (6, 2, 8)
+    assert len({t["nodeid"] for t in res["tests"]}) == 8
+
+
+def test_function_coverage_maps_tests_to_functions(project, monkeypatch):
+    """With coverage on, each test lists the project functions it executed."""
+    from config.settings import Settings
+    from agents.failure_records import focused_source
+
+    monkeypatch.setattr(Settings, "TEST_FUNCTION_COVERAGE", True)
+    (project / "modules" / "calc.py").write_text(MODULE_SRC + "\n\ndef sub(a, b):\n    return a - b\n")
+    (project / "generated_tests" / "test_calc.py").write_text(
+        TESTS_SRC.replace("assert add(-1, -1) == -2", "assert add(-1, -1) == 0")
+    )
+    res = run_pytest("generated_tests/test_calc.py", extra_paths=[str(project)], use_cache=False)
+    functions = {t["nodeid"].split("::")[-1]: t["functions"] for t in res["tests"]}
+    assert functions["test_add"] == ["generated_tests/test_calc.py::test_add", "modules/calc.py::add"]
+
+    focused = focused_source("modules/calc.py", res["failures"], res["rootdir"])
+    assert "def add" in focused and "def sub" not in focused
@@ -0,0 +1,59 @@
+"""
+Tests for node and call spans in utils.tracing.
+"""
+import sys
+import os
+import json
+
+from langgraph.graph import StateGraph, START, END
+from typing_extensions import TypedDict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import Settings
+from graph.checkpointing import run_graph
+from utils import tracing
+
+
+class State(TypedDict, total=False):
+    answer: str
+
+
+def _builder():
+    def fix_analyzer(state):
+        with tracing.span("llm", node="fix_analyzer") as s:
+            s.set(completion_tokens=42)
+        return {"answer": "ok"}
+
+    builder = StateGraph(State)
+    builder.add_node(fix_analyzer)
+    builder.add_edge(START, "fix_analyzer")
+    builder.add_edge("fix_analyzer", END)
+    return builder
+
+
+def test_nodes_and_calls_are_exported_as_nested_spans(tmp_path, monkeypatch):
+    monkeypatch.setattr(Settings, "TRACE", True)
+    monkeypatch.setattr(Settings, "CHECKPOINTS", False)
+    monkeypatch.setattr(Settings, "TRACE_DIR", str(tmp_path))
+    assert run_graph(_builder(), {}, "run-1") == {"answer": "ok"}
+
+    otlp = json.load(open(tmp_path / "run-1.otlp.json"))
+    spans = {s["name"]: s for s in otlp["resourceSpans"][0]["scopeSpans"][0]["spans"]}
+    assert set(spans) == {"node:fix_analyzer", "llm"}
+    assert spans["llm"]["parentSpanId"] == spans["node:fix_analyzer"]["spanId"]
+    assert {"key": "completion_tokens", "value": {"intValue": "42"}} in spans["llm"]["attributes"]
+    assert spans["node:fix_analyzer"]["status"] == {"code": 1}
+
+    events = json.load(open(tmp_path / "run-1.trace.json"))["traceEvents"]
+    assert [e["name"] for e in events] == ["node:fix_analyzer", "llm"]
+    assert all(e["ph"] == "X" and e["dur"] >= 0 for e in events)
+
+
+def test_disabled_tracing_records_nothing(monkeypatch):
+    monkeypatch.setattr(Settings, "TRACE", False)
+    tracing.start_trace()
+    with tracing.span("llm") as s:
+        s.set(completion_tokens=1)
+    assert tracing.finished_spans() == []
+    assert tracing.export_trace("unused") == {}
@@ -0,0 +1,168 @@
+# utils/app_rules.py
+"""
+Rule engine for validating the generated Streamlit app.
+
+`check_app` parses app.py once and walks the tree once. Each rule registers
+the AST node types it wants to see with `@rule(...)` and yields messages for
+the nodes it is handed, so adding a check never adds another pass over the
+source. Calls are matched structurally (nested parentheses, multi-line calls
+and `import streamlit as <alias>` all work) and every issue carries the exact
+line number. Imports are resolved separately, across app.py and every module it
+reaches, by utils.import_resolver.
+
+Issues are dicts: {"rule": name, "line": int | None, "message": str}, plus
+"file" when the issue is in a file other than app.py.
+"""
+import ast
+import logging
+
+logger = logging.getLogger(__name__)
+
+# name -> (node types, check function); populated by @rule
+RULES = {}
+
+
+def rule(name: str, *node_types):
+    """Registers `func(node, ctx)` to be called for every node of `node_types`; it yields messages."""
+    def register(func):
+        RULES[name] = (node_types, func)
+        return func
+    return register
+
+
+class AppContext:
+    """What rules may need besides the node itself: the streamlit aliases and the source."""
+
+    def __init__(self, tree, source: str):
+        self.source = source
+        # Names bound to the streamlit module (usually just "st"); only top-level imports are considered
+        self.streamlit_aliases = {
+            alias.asname or alias.name
+            for node in tree.body if isinstance(node, ast.Import)
+            for alias in node.names if alias.name == "streamlit"
+        } or {"st"}
+
+    def st_call(self, node, *functions) -> bool:
+        """True for a call like st.button(...) (any streamlit alias) to one of `functions`."""
+        func = getattr(node, "func", None)
+        return (isinstance(node, ast.Call) and isinstance(func, ast.Attribute) and func.attr in functions
+                and isinstance(func.value, ast.Name) and func.value.id in self.streamlit_aliases)
+
+    def is_session_state(self, node) -> bool:
+        """True for st.session_state itself or any attribute/item of it."""
+        while isinstance(node, (ast.Attribute, ast.Subscript)):
+            if (isinstance(node, ast.Attribute) and node.attr == "session_state"
+                    and isinstance(node.value, ast.Name) and node.value.id in self.streamlit_aliases):
+                return True
+            node = node.value
+        return False
+
+    def segment(self, node, limit: int = 80) -> str:
+        text = " ".join((ast.get_source_segment(self.source, node) or "").split())
+        return text if len(text) <= limit else text[:limit - 3] + "..."
+
+
+def _keyword(call, name):
+    return next((kw for kw in call.keywords if kw.arg == name), None)
+
+
+@rule("button_on_click", ast.Call)
+def _button_on_click(node, ctx):
+    if ctx.st_call(node, "button") and _keyword(node, "on_click"):
+        yield "Button uses an 'on_click' callback, which causes issues. Use 'if st.button():' pattern with st.rerun() instead."
+
+
+@rule("button_key", ast.Call)
+def _button_key(node, ctx):
+    if ctx.st_call(node, "button") and not _keyword(node, "key") and not any(kw.arg is None for kw in node.keywords):
+        yield (f"Button without unique key found: {ctx.segment(node)}. "
+               "ALL buttons must have key parameter to avoid duplicate ID errors.")
+
+
+def _writes_session_state(statements, ctx) -> bool:
+    for node in (n for statement in statements for n in ast.walk(statement)):
+        targets = []
+        if isinstance(node, ast.Assign):
+            targets = node.targets
+        elif isinstance(node, (ast.AugAssign, ast.AnnAssign)):
+            targets = [node.target]
+        elif isinstance(node, ast.Delete):
+            targets = node.targets
+        elif (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+              and node.func.attr in ("update", "pop", "clear", "setdefault")):
+            targets = [node.func.value]
+        if any(ctx.is_session_state(t) for t in targets):
+            return True
+    return False
+
+
+def _calls_rerun(statements, ctx) -> bool:
+    return any(ctx.st_call(n, "rerun", "experimental_rerun") for s in statements for n in ast.walk(s))
+
+
+@rule("rerun_after_state_write", ast.If)
+def _rerun_after_state_write(node, ctx):
+    if ctx.st_call(node.test, "button") and _writes_session_state(node.body, ctx) and not _calls_rerun(node.body, ctx):
+        yield (f"Button {ctx.segment(node.test)} updates session_state but doesn't call st.rerun(). "
+               "Add st.rerun() after state updates for immediate display refresh.")
+
+
+@rule("disabled_text_display", ast.Call)
+def _disabled_text_display(node, ctx):
+    disabled = _keyword(node, "disabled")
+    if (ctx.st_call(node, "text_input", "text_area") and disabled is not None
+            and isinstance(disabled.value, ast.Constant) and disabled.value.value is True):
+        yield "Using disabled text_input for display. Use st.markdown() or st.text() instead for proper state updates."
+
+
+@rule("markdown_backticks", ast.Call)
+def _markdown_backticks(node, ctx):
+    if not ctx.st_call(node, "markdown") or not node.args or not isinstance(node.args[0], ast.JoinedStr):
+        return
+    values = node.args[0].values
+    # f"`{value}`" puts the backticks around the placeholder instead of inside a label
+    if (len(values) >= 2 and isinstance(values[0], ast.Constant) and values[0].value == "`"
+            and isinstance(values[1], ast.FormattedValue)):
+        yield ("Incorrect markdown format. Use: st.markdown(f'### Display: `{st.session_state.display}`') "
+               "with backticks INSIDE the f-string.")
+
+
+def check_app(source: str, rules: list | None = None) -> list:
+    """
+    Runs every registered rule (or only `rules`) over the app source in a single AST pass.
+
+    Args:
+        source (str): Contents of app.py.
+        rules (list, optional): Rule names to run. Defaults to all registered rules.
+
+    Returns:
+        list: Issues ordered by line; a syntax error is the only issue when the file does not parse.
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError as e:
+        return [{"rule": "syntax", "line": e.lineno,
+                 "message": f"Syntax error: {e.msg}. Check for unterminated strings, missing quotes, or unmatched brackets."}]
+
+    ctx = AppContext(tree, source)
+    by_type = {}
+    for name, (node_types, func) in RULES.items():
+        if rules is None or name in rules:
+            for node_type in node_types:
+                by_type.setdefault(node_type, []).append((name, func))
+
+    issues = []
+    for node in ast.walk(tree):
+        for name, func in by_type.get(type(node), ()):
+            issues.extend({"rule": name, "line": getattr(node, "lineno", None), "message": message}
+                          for message in func(node, ctx))
+    issues.sort(key=lambda issue: (issue["line"] or 0, issue["rule"]))
+    return issues
+
+
+def format_issue(issue: dict) -> str:
+    """Renders an issue the way validate_app reports errors to fix_app."""
+    other_file = issue.get("file") not in (None, "app.py")
+    if issue.get("line"):
+        return f"{issue['file'] + ' line' if other_file else 'Line'} {issue['line']}: {issue['message']}"
+    return f"{issue['file']}: {issue['message']}" if other_file else issue["message"]
@@ -0,0 +1,213 @@
+# utils/code_merge.py
+"""
+Deterministic merging of new definitions into an existing module.
+
+Instead of asking the model to re-emit a whole module with a few functions
+added, callers ask only for the new definitions and the imports they need,
+then `splice_definitions` inserts them into the existing file:
+
+- the existing source is kept byte-for-byte (comments and formatting included);
+- new imports are de-duplicated against existing ones and placed after the
+  module's import block;
+- new functions, classes and constants are appended at the end;
+- a definition identical to an existing one is skipped; one that would
+  rebind an existing name to something different is a conflict and is not
+  applied, so an existing implementation is never silently replaced.
+
+The LLM output therefore scales with what was added, not with module size.
+"""
+import ast
+import logging
+import re
+
+from utils import symbol_index
+
+logger = logging.getLogger(__name__)
+
+_DEFINITIONS = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+_ASSIGNMENTS = (ast.Assign, ast.AnnAssign)
+
+
+def strip_fences(text: str) -> str:
+    """Removes a surrounding ```python ... ``` fence from model output."""
+    text = (text or "").strip()
+    text = re.sub(r'^```(?:python)?\s*', '', text)
+    return re.sub(r'```\s*$', '', text).strip()
+
+
+def _segment(lines: list, node) -> str:
+    start = min([node.lineno, *(d.lineno for d in getattr(node, "decorator_list", []))])
+    return "\n".join(lines[start - 1:node.end_lineno])
+
+
+def _assigned_names(node) -> list:
+    targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+    return [n.id for t in targets for n in ast.walk(t) if isinstance(n, ast.Name)]
+
+
+def _binding(node, alias) -> tuple:
+    """(bound name, canonical source) for one name of an import, e.g. ("np", "import numpy")."""
+    if isinstance(node, ast.Import):
+        if alias.asname:
+            return alias.asname, f"import {alias.name}"
+        return alias.name.split(".")[0], f"import {alias.name.split('.')[0]}"
+    return alias.asname or alias.name, f"from {'.' * node.level}{node.module or ''} import {alias.name}"
+
+
+def _existing_bindings(tree) -> tuple:
+    """(imports {name: source}, definitions {name: ast dump}) bound at module level."""
+    imports, definitions = {}, {}
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            imports.update(_binding(node, alias) for alias in node.names)
+        elif isinstance(node, _DEFINITIONS):
+            definitions[node.name] = ast.dump(node)
+        elif isinstance(node, _ASSIGNMENTS):
+            for name in _assigned_names(node):
+                definitions[name] = ast.dump(node)
+    return imports, definitions
+
+
+def _import_insert_line(tree) -> int:
+    """Line after which new imports go: the end of the leading import block (or docstring)."""
+    line = 0
+    for index, node in enumerate(tree.body):
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            line = node.end_lineno
+        elif index == 0 and isinstance(node, ast.Expr) and isinstance(getattr(node, "value", None), ast.Constant):
+            line = node.end_lineno  # module docstring
+        else:
+            break
+    return line
+
+
+def _main_guard_line(tree) -> int | None:
+    """First line of a trailing `if __name__ == "__main__":` block, so new code goes above it."""
+    last = tree.body[-1] if tree.body else None
+    if isinstance(last, ast.If) and "__name__" in ast.unparse(last.test):
+        return last.lineno
+    return None
+
+
+def describe_module(path: str) -> str:
+    """
+    A compact outline of a module for merge prompts: its imports, constants, function
+    signatures (with the first docstring line) and class/method signatures, without bodies.
+    """
+    index = symbol_index.index_module(path)
+    lines = []
+    for entry in index["imports"]:
+        if entry["kind"] == "import":
+            lines.append(f"import {entry['module']}" + (f" as {entry['alias']}" if entry["alias"] else ""))
+        else:
+            names = ", ".join(name + (f" as {alias}" if alias else "") for name, alias in entry["names"])
+            lines.append(f"from {'.' * entry['level']}{entry['module'] or ''} import {names}")
+
+    defined = {f["name"] for f in index["functions"]} | {c["name"] for c in index["classes"]}
+    imported = {line.split(" as ")[-1].split()[-1] for line in lines}
+    constants = [name for name in index["names"] if name not in defined and name not in imported]
+    if constants:
+        lines.append("# module-level names: " + ", ".join(constants))
+
+    def _outline(func, indent=""):
+        doc = (func["docstring"] or "").strip().splitlines()
+        return f"{indent}{func['signature']}: ..." + (f"  # {doc[0]}" if doc else "")
+
+    lines.extend(_outline(f) for f in index["functions"])
+    for cls in index["classes"]:
+        bases = f"({', '.join(cls['bases'])})" if cls["bases"] else ""
+        lines.append(f"class {cls['name']}{bases}:")
+        lines.extend(_outline(m, "    ") for m in cls["methods"])
+        if not cls["methods"]:
+            lines.append("    ...")
+    return "\n".join(lines) or "(empty module)"
+
+
+def splice_definitions(existing_code: str, new_code: str) -> dict:
+    """
+    Merges the top-level imports and definitions in `new_code` into `existing_code`.
+
+    Args:
+        existing_code (str): The current module source.
+        new_code (str): Only the new definitions plus the imports they need.
+
+    Returns:
+        dict: {"code": merged source (existing_code unchanged on error),
+               "added": names added, "skipped": names already present and identical,
+               "conflicts": [descriptions], "error": message or None}
+    """
+    result = {"code": existing_code, "added": [], "skipped": [], "conflicts": [], "error": None}
+    try:
+        tree = ast.parse(existing_code)
+    except SyntaxError as e:
+        result["error"] = f"Existing module does not parse: {e}"
+        return result
+    try:
+        new_tree = ast.parse(strip_fences(new_code))
+    except SyntaxError as e:
+        result["error"] = f"New definitions do not parse: {e}"
+        return result
+
+    new_lines = strip_fences(new_code).splitlines()
+    imports, definitions = _existing_bindings(tree)
+    import_blocks, definition_blocks = [], []
+
+    for node in new_tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            fresh = []
+            for alias in node.names:
+                bound, source = _binding(node, alias)
+                if imports.get(bound) == source:
+                    continue
+                if bound in imports or bound in definitions:
+                    result["conflicts"].append(f"import {bound!r} would shadow an existing name")
+                    continue
+                imports[bound] = source
+                fresh.append(alias)
+            if fresh:
+                statement = ast.Import(names=fresh) if isinstance(node, ast.Import) else \
+                    ast.ImportFrom(module=node.module, names=fresh, level=node.level)
+                import_blocks.append(ast.unparse(statement))
+        elif isinstance(node, _DEFINITIONS + _ASSIGNMENTS):
+            names = [node.name] if isinstance(node, _DEFINITIONS) else _assigned_names(node)
+            dump = ast.dump(node)
+            if all(definitions.get(name) == dump for name in names):
+                result["skipped"].extend(names)
+                continue
+            clashes = [name for name in names if name in definitions or name in imports]
+            if clashes:
+                result["conflicts"].append(f"{', '.join(clashes)} already defined differently; existing kept")
+                continue
+            for name in names:
+                definitions[name] = dump
+            definition_blocks.append(_segment(new_lines, node))
+            result["added"].extend(names)
+        elif isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant):
+            continue  # stray docstring or comment string
+        else:
+            result["conflicts"].append(f"unsupported top-level statement at line {node.lineno}: "
+                                       f"{ast.unparse(node).splitlines()[0]}")
+
+    if not import_blocks and not definition_blocks:
+        return result
+
+    lines = existing_code.rstrip("\n").splitlines()
+    guard = _main_guard_line(tree)
+    body, tail = (lines[:guard - 1], lines[guard - 1:]) if guard else (lines, [])
+    if import_blocks:
+        at = _import_insert_line(tree)
+        body[at:at] = import_blocks
+    merged = "\n".join(body).rstrip("\n")
+    for block in definition_blocks:
+        merged += "\n\n\n" + block
+    if tail:
+        merged += "\n\n\n" + "\n".join(tail)
+    merged += "\n"
+
+    try:
+        ast.parse(merged)
+    except SyntaxError as e:
+        result["error"] = f"Merged module does not parse: {e}"
+        return result
+    result["code"] = merged
+    return result
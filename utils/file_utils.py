@@ -1,12 +1,25 @@
 # utils/file_utils.py
 from pathlib import Path
+import json
 import logging
+import os
+import threading
+
+from utils.tracing import span
+
+try:
+    import fcntl
+except ImportError:  # Windows: writes stay atomic, concurrent writers are not serialized
+    fcntl = None
 
 logger = logging.getLogger(__name__)
 
+# Bundled resources (prompts/, reference_examples/) are found here, whatever the working directory
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
 def load_prompt(file_name: str) -> str:
     """
-    Loads a prompt from the prompts directory.
+    Loads a prompt from the project's prompts directory.
 
     Args:
         file_name (str): The name of the prompt file.
@@ -14,7 +27,7 @@ def load_prompt(file_name: str) -> str:
     Returns:
         str: The content of the prompt file.
     """
-    prompt_path = Path("prompts") / file_name
+    prompt_path = PROJECT_ROOT / "prompts" / file_name
     try:
         with open(prompt_path, "r", encoding="utf-8") as f:
             return f.read()
@@ -24,8 +37,54 @@ def load_prompt(file_name: str) -> str:
 
 def read_text_safe(path: str) -> str:
     """Safely reads a text file, returning an empty string if it doesn't exist."""
-    try:
-        with open(path, "r", encoding="utf-8") as fh:
-            return fh.read()
-    except (FileNotFoundError, TypeError):
-        return ""
\ No newline at end of file
+    with span("files.read", path=str(path)) as read_span:
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                content = fh.read()
+        except (FileNotFoundError, TypeError):
+            content = ""
+        read_span.set(chars=len(content))
+    return content
+
+def update_json_file(path: str, update) -> dict:
+    """
+    Applies `update` to the JSON object stored at `path` and writes the result back atomically.
+
+    Several processes (bulk TDD, batch and job workers) share the same cache files, so the
+    update is applied to what is on disk now, under an exclusive lock on `<path>.lock`, and
+    written through a temp file that replaces `path`: no writer drops another's entries and
+    no reader sees a half-written file.
+
+    Args:
+        path (str): The JSON file; missing or unreadable content counts as {}.
+        update: Function that changes the loaded dict in place.
+
+    Returns:
+        dict: The data as written. Raises OSError if it cannot be written.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path + ".lock", "a") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                data = json.load(fh)
+        except FileNotFoundError:
+            data = {}
+        except ValueError as e:
+            logger.warning(f"{path} is not valid JSON ({e}); starting it over")
+            data = {}
+        if not isinstance(data, dict):
+            data = {}
+        update(data)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(data, fh)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+    return data
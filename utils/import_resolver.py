@@ -0,0 +1,203 @@
+# utils/import_resolver.py
+"""
+Static import resolution for the generated app.
+
+`check_imports` follows the import graph of app.py through the project's own
+packages (modules/ and anything else next to app.py) using only the cached
+symbol index. Nothing is imported or executed. Every import form is handled:
+
+    from modules.calc import divide as validate_divide   # checks `divide`
+    from modules.calc import *                           # module must exist
+    import modules.calc / import modules.calc as calc    # checks calc.<attr> uses
+    from .helpers import clamp                           # relative, inside modules/
+
+Names a module re-exports through its own imports or star imports count as
+available. Third-party imports are only checked for being installed
+(importlib.util.find_spec on the top-level package, which does not import it).
+All mismatches across all files are returned in one pass, so fix_app sees the
+complete list on its first lap.
+
+Issues use the same shape as utils.app_rules: {"rule", "file", "line", "message"}.
+"""
+import ast
+import importlib.util
+import logging
+import os
+import sys
+
+from utils import symbol_index
+
+logger = logging.getLogger(__name__)
+
+
+def _module_file(dotted: str, root: str) -> str | None:
+    """Path of the local module or package `dotted` under `root`, or None."""
+    base = os.path.join(root, *dotted.split("."))
+    for candidate in (base + ".py", os.path.join(base, "__init__.py")):
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def _is_local(dotted: str, root: str) -> bool:
+    top = dotted.split(".")[0]
+    return os.path.isfile(os.path.join(root, top + ".py")) or os.path.isdir(os.path.join(root, top))
+
+
+def _package_of(path: str, root: str) -> str:
+    """Dotted package containing the file at `path` ("" for files directly under root)."""
+    relative = os.path.relpath(os.path.dirname(os.path.abspath(path)), root)
+    return "" if relative == "." else relative.replace(os.sep, ".")
+
+
+def _absolute(module: str | None, level: int, path: str, root: str) -> str:
+    """Resolves a (possibly relative) ImportFrom module to a dotted name."""
+    if not level:
+        return module or ""
+    parts = _package_of(path, root).split(".") if _package_of(path, root) else []
+    parts = parts[:len(parts) - (level - 1)] if level > 1 else parts
+    return ".".join(p for p in [*parts, module or ""] if p)
+
+
+class _Resolver:
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self._exports = {}
+
+    def exports(self, dotted: str, _seen=None) -> set | None:
+        """Names importable from local module `dotted` (None if it does not exist)."""
+        if dotted in self._exports:
+            return self._exports[dotted]
+        path = _module_file(dotted, self.root)
+        if path is None:
+            return None
+        seen = (_seen or set()) | {dotted}
+        index = symbol_index.index_module(path)
+        names = set(index["names"])
+        # Star imports re-export the other module's names (cycles are cut)
+        for entry in index["imports"]:
+            if entry["kind"] == "from" and any(name == "*" for name, _ in entry["names"]):
+                source = _absolute(entry["module"], entry["level"], path, self.root)
+                if source not in seen and _is_local(source, self.root):
+                    names |= self.exports(source, seen) or set()
+        # A package also exposes its submodules
+        if os.path.basename(path) == "__init__.py":
+            directory = os.path.dirname(path)
+            names |= {os.path.splitext(f)[0] for f in os.listdir(directory)
+                      if f.endswith(".py") and f != "__init__.py"}
+            names |= {d for d in os.listdir(directory) if os.path.isfile(os.path.join(directory, d, "__init__.py"))}
+        self._exports[dotted] = names
+        return names
+
+
+def _issue(path: str, root: str, line, message: str) -> dict:
+    return {"rule": "imports", "file": os.path.relpath(path, root), "line": line, "message": message}
+
+
+def _installed(top: str) -> bool:
+    if top in sys.builtin_module_names or top in getattr(sys, "stdlib_module_names", ()):
+        return True
+    try:
+        return importlib.util.find_spec(top) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def _check_file(path: str, resolver: _Resolver, issues: list, pending: list):
+    """Checks the imports of one file and queues the local modules it imports."""
+    root = resolver.root
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            tree = ast.parse(fh.read(), filename=path)
+    except (OSError, SyntaxError, ValueError) as e:
+        issues.append(_issue(path, root, getattr(e, "lineno", None), f"Cannot parse {os.path.relpath(path, root)}: {e}"))
+        return
+
+    module_aliases = {}  # local name -> dotted module, for `import modules.x as y` attribute checks
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if not _is_local(alias.name, root):
+                    if not _installed(alias.name.split(".")[0]):
+                        issues.append(_issue(path, root, node.lineno, f"Import error: module '{alias.name}' is not installed"))
+                    continue
+                if _module_file(alias.name, root) is None:
+                    issues.append(_issue(path, root, node.lineno, f"Import error: module {alias.name} doesn't exist"))
+                    continue
+                pending.append(_module_file(alias.name, root))
+                # `import a.b as m` binds m to a.b; `import a.b` binds a to the package a
+                if alias.asname:
+                    module_aliases[alias.asname] = alias.name
+                else:
+                    module_aliases[alias.name.split(".")[0]] = alias.name.split(".")[0]
+        elif isinstance(node, ast.ImportFrom):
+            dotted = _absolute(node.module, node.level, path, root)
+            if not node.level and not _is_local(dotted, root):
+                if dotted and not _installed(dotted.split(".")[0]):
+                    issues.append(_issue(path, root, node.lineno, f"Import error: module '{dotted}' is not installed"))
+                continue
+            available = resolver.exports(dotted)
+            if available is None:
+                issues.append(_issue(path, root, node.lineno, f"Import error: {dotted} doesn't exist"))
+                continue
+            pending.append(_module_file(dotted, root))
+            for alias in node.names:
+                if alias.name == "*":
+                    continue
+                if alias.name not in available:
+                    issues.append(_issue(path, root, node.lineno,
+                                         f"Import error: {alias.name} not found in {dotted}. Available: {sorted(available)}"))
+                elif _module_file(f"{dotted}.{alias.name}", root):
+                    pending.append(_module_file(f"{dotted}.{alias.name}", root))
+
+    # Attribute uses through module imports: calc.missing(...) or modules.calc.missing(...)
+    if module_aliases:
+        for node in ast.walk(tree):
+            if not isinstance(node, ast.Attribute) or not isinstance(node.ctx, ast.Load):
+                continue
+            dotted_expr = _dotted_name(node.value)
+            if dotted_expr is None:
+                continue
+            head = dotted_expr.split(".")[0]
+            if head not in module_aliases:
+                continue
+            module = module_aliases[head] + dotted_expr[len(head):]
+            available = resolver.exports(module)
+            if available is not None and node.attr not in available:
+                issues.append(_issue(path, root, node.lineno,
+                                     f"Attribute error: {module} has no attribute {node.attr}. Available: {sorted(available)}"))
+
+
+def _dotted_name(node) -> str | None:
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    return ".".join([node.id, *reversed(parts)])
+
+
+def check_imports(app_path: str, root: str | None = None) -> list:
+    """
+    Resolves every import reachable from `app_path` and reports the ones that do not resolve.
+
+    Args:
+        app_path (str): Entry file (app.py).
+        root (str, optional): Project root that local packages live under. Defaults to app.py's directory.
+
+    Returns:
+        list: Issues sorted by file and line; empty when every import resolves.
+    """
+    root = os.path.abspath(root or os.path.dirname(os.path.abspath(app_path)))
+    resolver = _Resolver(root)
+    issues, pending, seen = [], [os.path.abspath(app_path)], set()
+    while pending:
+        path = pending.pop()
+        if not path or path in seen:
+            continue
+        seen.add(path)
+        _check_file(path, resolver, issues, pending)
+    # The same bad import can be reached twice (e.g. via a package and its module)
+    unique = {(i["file"], i["line"], i["message"]): i for i in issues}
+    return sorted(unique.values(), key=lambda i: (i["file"] != os.path.relpath(app_path, root), i["file"], i["line"] or 0))
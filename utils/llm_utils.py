@@ -0,0 +1,201 @@
+# utils/llm_utils.py
+"""
+Chat completion helpers with adaptive output budgets.
+
+Every node used to send a fixed max_tokens regardless of how much output it
+actually needed. `chat_completion` sizes the budget per call from the spec
+(function and edge-case counts), from the size of the file being rewritten,
+and from the completion lengths previously recorded for the same node.
+Responses cut off with finish_reason == "length" are continued in place
+instead of being regenerated from scratch.
+"""
+from config.settings import Settings
+from utils.file_utils import update_json_file
+from utils.tracing import span
+import logging
+import json
+import math
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Rough characters-per-token ratio for Python source and English prose.
+CHARS_PER_TOKEN = 4
+# Multiplier applied on top of every estimate so typical responses fit in one call.
+SAFETY_MARGIN = 1.3
+MIN_OUTPUT_TOKENS = 256
+# Completions kept per node in the history file.
+HISTORY_SIZE = 50
+# History entries needed before they override the static profile.
+MIN_HISTORY = 3
+
+CONTINUE_PROMPT = (
+    "Your previous response was cut off. Continue EXACTLY where it stopped. "
+    "Do not repeat any earlier text and do not add commentary or markdown fences."
+)
+
+# Static per-node cost model used until history is available:
+# (fixed overhead, tokens per spec function, tokens per edge case)
+NODE_PROFILES = {
+    "spec_agent": (300, 150, 40),
+    "generate_tests": (250, 220, 60),
+    "generate_code": (200, 180, 30),
+    "code_merger": (200, 180, 30),
+    "generate_main_app": (800, 150, 20),
+}
+
+_history_lock = threading.Lock()
+_history = None
+
+
+def _history_path() -> str:
+    return Settings.TOKEN_HISTORY_PATH
+
+
+def _load_history() -> dict:
+    global _history
+    if _history is None:
+        try:
+            with open(_history_path(), "r", encoding="utf-8") as fh:
+                _history = json.load(fh)
+        except FileNotFoundError:
+            _history = {}
+        except json.JSONDecodeError as e:
+            logger.warning(f"Ignoring unreadable token history {_history_path()}: {e}")
+            _history = {}
+    return _history
+
+
+def record_completion(node: str, completion_tokens: int, units: float | None = None):
+    """Stores the completion length of a finished call for future sizing."""
+    global _history
+    if not completion_tokens:
+        return
+
+    def add(history):
+        entries = history.setdefault(node, [])
+        entries.append({"tokens": int(completion_tokens), "units": units})
+        del entries[:-HISTORY_SIZE]
+
+    with _history_lock:
+        try:
+            # Merged into the file as it is now: other processes record into the same history
+            _history = update_json_file(_history_path(), add)
+        except OSError as e:
+            logger.warning(f"Could not persist token history: {e}")
+            add(_load_history())
+
+
+def spec_units(spec: str | None) -> tuple[int, int]:
+    """Returns (function count, edge case count) for a JSON spec, or (0, 0)."""
+    if not spec:
+        return 0, 0
+    try:
+        spec_json = json.loads(spec)
+    except (json.JSONDecodeError, TypeError):
+        return 0, 0
+    if not isinstance(spec_json, dict):
+        return 0, 0
+    functions = spec_json.get("functions") or spec_json.get("api") or []
+    edge_cases = list(spec_json.get("edge_cases") or [])
+    for func in functions if isinstance(functions, list) else []:
+        if isinstance(func, dict):
+            edge_cases.extend(func.get("edge_cases") or [])
+    return len(functions) if isinstance(functions, list) else 0, len(edge_cases)
+
+
+def _percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct * len(ordered)) - 1))
+    return ordered[index]
+
+
+def estimate_max_tokens(node: str, spec: str | None = None, source: str | None = None, default: int = 1000) -> int:
+    """
+    Predicts the output budget for a call made by `node`.
+
+    Args:
+        node (str): Graph node name; history and profiles are keyed by it.
+        spec (str, optional): JSON spec the output is generated from.
+        source (str, optional): Text the model is expected to re-emit (e.g. a file being fixed).
+        default (int): Budget used when nothing else is known.
+
+    Returns:
+        int: max_tokens, clamped to [MIN_OUTPUT_TOKENS, Settings.LLM_MAX_OUTPUT_TOKENS].
+    """
+    functions, edge_cases = spec_units(spec)
+    units = functions + 0.25 * edge_cases if functions else None
+    with _history_lock:
+        entries = list(_load_history().get(node, []))
+
+    estimate = None
+    scaled = [e["tokens"] / e["units"] for e in entries if e.get("units")]
+    if units and len(scaled) >= MIN_HISTORY:
+        estimate = _percentile(scaled, 0.9) * units
+    elif units and node in NODE_PROFILES:
+        overhead, per_function, per_edge_case = NODE_PROFILES[node]
+        estimate = overhead + per_function * functions + per_edge_case * edge_cases
+    elif source is not None:
+        estimate = len(source) / CHARS_PER_TOKEN + 200
+    elif len(entries) >= MIN_HISTORY:
+        estimate = _percentile([e["tokens"] for e in entries], 0.9)
+
+    if estimate is None:
+        budget = default
+    else:
+        budget = int(estimate * SAFETY_MARGIN)
+    return max(MIN_OUTPUT_TOKENS, min(budget, Settings.LLM_MAX_OUTPUT_TOKENS))
+
+
+def chat_completion(client, node: str, messages: list, max_tokens: int | None = None,
+                    spec: str | None = None, source: str | None = None,
+                    default_max_tokens: int = 1000, **kwargs) -> str:
+    """
+    Calls client.chat.completions.create with an adaptive max_tokens.
+
+    Truncated responses (finish_reason == "length") are continued up to
+    Settings.LLM_MAX_CONTINUATIONS times and stitched together.
+
+    Args:
+        client: An OpenAI client.
+        node (str): Name of the calling node, used for sizing and history.
+        messages (list): Chat messages.
+        max_tokens (int, optional): Explicit budget; skips estimation when given.
+        spec (str, optional): Spec used to size the budget.
+        source (str, optional): Text the response is expected to re-emit.
+        default_max_tokens (int): Budget used when there is nothing to size from.
+        **kwargs: Passed through to the API (model, temperature, top_p, ...).
+
+    Returns:
+        str: The full response text (empty string if the model returned none).
+    """
+    budget = max_tokens or estimate_max_tokens(node, spec=spec, source=source, default=default_max_tokens)
+    conversation = list(messages)
+    parts = []
+    completion_tokens = 0
+
+    with span("llm", node=node, model=kwargs.get("model"), max_tokens=budget,
+              prompt_chars=sum(len(m.get("content") or "") for m in messages)) as llm_span:
+        for attempt in range(Settings.LLM_MAX_CONTINUATIONS + 1):
+            resp = client.chat.completions.create(messages=conversation, max_tokens=budget, **kwargs)
+            choice = resp.choices[0]
+            content = choice.message.content or ""
+            parts.append(content)
+            usage = getattr(resp, "usage", None)
+            completion_tokens += getattr(usage, "completion_tokens", 0) or 0
+
+            if choice.finish_reason != "length":
+                break
+            logger.info(f"{node}: response hit max_tokens={budget}, continuing ({attempt + 1}/{Settings.LLM_MAX_CONTINUATIONS})")
+            conversation = conversation + [
+                {"role": "assistant", "content": content},
+                {"role": "user", "content": CONTINUE_PROMPT},
+            ]
+        else:
+            logger.warning(f"{node}: response still truncated after {Settings.LLM_MAX_CONTINUATIONS} continuations")
+        llm_span.set(completion_tokens=completion_tokens, calls=len(parts), response_chars=sum(len(p) for p in parts))
+
+    functions, edge_cases = spec_units(spec)
+    record_completion(node, completion_tokens, functions + 0.25 * edge_cases if functions else None)
+    return "".join(parts)
@@ -0,0 +1,262 @@
+# utils/patching.py
+"""
+Applying model-written patches instead of whole-file rewrites.
+
+The fixers ask for edits in one of two forms (see prompts/patch_protocol.txt):
+
+    --- EDIT FILE: modules/calc.py ---
+    <<<<<<< SEARCH
+    def divide(a, b):
+        return a / b
+    =======
+    def divide(a, b):
+        if b == 0:
+            raise ValueError("Cannot divide by zero")
+        return a / b
+    >>>>>>> REPLACE
+    --- END EDIT ---
+
+or a unified diff (`--- a/path`, `+++ b/path`, `@@ -l,n +l,n @@` hunks). Both
+become a list of search/replace edits per file. Each search block is located
+exactly first, then ignoring trailing whitespace, then ignoring indentation
+(the replacement is re-indented to match), then by fuzzy line similarity; a
+block that matches in several places is resolved by the hunk's line number
+or rejected as ambiguous. Python results must still parse.
+
+`apply_patch` reports which edits failed, so callers can fall back to asking
+for the full file only when a patch does not apply. The model's output then
+scales with the size of the change rather than the size of the file.
+"""
+import ast
+import difflib
+import logging
+import os
+import re
+
+logger = logging.getLogger(__name__)
+
+# Minimum similarity for a fuzzy match of a search block against the file
+FUZZY_THRESHOLD = 0.85
+
+_EDIT_FILE_RE = re.compile(r"^--- EDIT FILE: (.+?) ---[ \t]*\n(.*?)^--- END EDIT[^\n]*$", re.M | re.S)
+_SEARCH_REPLACE_RE = re.compile(
+    r"^<{5,9} SEARCH[ \t]*\n(.*?)^={5,9}[ \t]*\n(.*?)^>{5,9} REPLACE[ \t]*$", re.M | re.S)
+_HUNK_RE = re.compile(r"^@@ -(\d+)(?:,\d+)? \+\d+(?:,\d+)? @@")
+
+
+def _lines(text: str) -> list:
+    return text.split("\n")[:-1] if text.endswith("\n") else text.split("\n")
+
+
+def _diff_path(header: str) -> str:
+    path = header[4:].split("\t")[0].strip()
+    return path[2:] if path.startswith(("a/", "b/")) else path
+
+
+def _parse_unified_diff(text: str, default_path: str | None) -> dict:
+    """{path: [edit]} from unified diff hunks; context and '-' lines form the search block."""
+    edits, path, hunk = {}, default_path, None
+
+    def close():
+        if hunk and path:
+            edits.setdefault(path, []).append({
+                "search": "\n".join(hunk["search"]), "replace": "\n".join(hunk["replace"]), "line": hunk["line"]})
+
+    for line in text.split("\n"):
+        if line.startswith("+++ "):
+            close()
+            hunk, path = None, _diff_path(line)
+        elif line.startswith("--- ") and not line.startswith("--- EDIT"):
+            close()
+            hunk = None
+        elif _HUNK_RE.match(line):
+            close()
+            hunk = {"search": [], "replace": [], "line": int(_HUNK_RE.match(line).group(1))}
+        elif hunk is not None:
+            if line.startswith("```") or line.startswith("\\"):
+                continue
+            tag, body = (line[:1], line[1:]) if line[:1] in (" ", "-", "+") else (" ", line)
+            if tag != "+":
+                hunk["search"].append(body)
+            if tag != "-":
+                hunk["replace"].append(body)
+    close()
+    # A trailing blank context line is usually the separator before the next hunk or fence
+    for file_edits in edits.values():
+        for edit in file_edits:
+            while edit["search"].endswith("\n") and edit["replace"].endswith("\n"):
+                edit["search"], edit["replace"] = edit["search"][:-1], edit["replace"][:-1]
+    return edits
+
+
+def parse_patch(text: str, default_path: str | None = None) -> dict:
+    """
+    Extracts edits from a model response.
+
+    Args:
+        text (str): The response: EDIT FILE blocks of SEARCH/REPLACE hunks, or a unified diff.
+        default_path (str, optional): File that bare SEARCH/REPLACE blocks or diff hunks apply to.
+
+    Returns:
+        dict: {path: [{"search": str, "replace": str, "line": int | None}]}; empty if none were found.
+    """
+    # CRLF output would otherwise match none of the block markers
+    text = (text or "").replace("\r\n", "\n")
+    edits = {}
+    for path, body in _EDIT_FILE_RE.findall(text):
+        for search, replace in _SEARCH_REPLACE_RE.findall(body):
+            edits.setdefault(path.strip(), []).append(
+                {"search": search.rstrip("\n"), "replace": replace.rstrip("\n"), "line": None})
+    if edits:
+        return edits
+    if default_path:
+        blocks = _SEARCH_REPLACE_RE.findall(text)
+        if blocks:
+            return {default_path: [{"search": s.rstrip("\n"), "replace": r.rstrip("\n"), "line": None}
+                                   for s, r in blocks]}
+    if re.search(r"^@@ -\d+", text, re.M):
+        return _parse_unified_diff(text, default_path)
+    return {}
+
+
+def _indent(line: str) -> str:
+    return line[:len(line) - len(line.lstrip())]
+
+
+def _reindent(lines: list, old: str, new: str) -> list:
+    """Moves `lines` from indentation `old` to `new` (as measured on the first non-blank line)."""
+    result = []
+    for line in lines:
+        if not line.strip():
+            result.append(line)
+        elif line.startswith(old):
+            result.append(new + line[len(old):])
+        else:
+            result.append(new + line.lstrip())
+    return result
+
+
+def _candidates(lines: list, search: list, normalize) -> list:
+    wanted = [normalize(line) for line in search]
+    size = len(search)
+    return [i for i in range(len(lines) - size + 1)
+            if normalize(lines[i]) == wanted[0] and [normalize(line) for line in lines[i:i + size]] == wanted]
+
+
+def _pick(candidates: list, hint: int | None):
+    if len(candidates) == 1:
+        return candidates[0]
+    if candidates and hint is not None:
+        return min(candidates, key=lambda i: abs(i + 1 - hint))
+    return None
+
+
+def _locate(lines: list, search: list, hint: int | None) -> tuple:
+    """(start index, match kind) of `search` in `lines`, or (None, reason)."""
+    for kind, normalize in (("exact", lambda s: s), ("whitespace", str.rstrip), ("indentation", str.strip)):
+        candidates = _candidates(lines, search, normalize)
+        start = _pick(candidates, hint)
+        if start is not None:
+            return start, kind
+        if candidates:
+            return None, f"search block matches {len(candidates)} places"
+
+    size = len(search)
+    target = "\n".join(line.strip() for line in search)
+    scored = []
+    for i in range(len(lines) - size + 1):
+        window = "\n".join(line.strip() for line in lines[i:i + size])
+        matcher = difflib.SequenceMatcher(None, target, window, autojunk=False)
+        if matcher.real_quick_ratio() >= FUZZY_THRESHOLD and matcher.quick_ratio() >= FUZZY_THRESHOLD:
+            ratio = matcher.ratio()
+            if ratio >= FUZZY_THRESHOLD:
+                scored.append((ratio, i))
+    if not scored:
+        return None, "search block not found"
+    best = max(ratio for ratio, _ in scored)
+    start = _pick([i for ratio, i in scored if ratio == best], hint)
+    if start is None:
+        return None, "search block is ambiguous"
+    return start, "fuzzy"
+
+
+def apply_edits(source: str, edits: list) -> dict:
+    """
+    Applies search/replace edits to `source` in order.
+
+    Returns:
+        dict: {"code": the edited source, "applied": count, "failed": [reasons]}
+    """
+    lines = _lines(source)
+    trailing_newline = source.endswith("\n") or not source
+    applied, failed = 0, []
+    for number, edit in enumerate(edits, 1):
+        # An empty block is no lines at all: an empty replace deletes the search block without a blank line
+        search = _lines(edit["search"]) if edit["search"] else []
+        replace = _lines(edit["replace"]) if edit["replace"] else []
+        if not [line for line in search if line.strip()]:
+            # Pure insertion: at the hunk's line if known, else at the end of the file
+            at = min(max(edit["line"] - 1, 0), len(lines)) if edit.get("line") else len(lines)
+            lines[at:at] = replace
+            applied += 1
+            continue
+        start, kind = _locate(lines, search, edit.get("line"))
+        if start is None:
+            failed.append(f"edit {number}: {kind}: {search[0].strip()[:60]!r}")
+            continue
+        if kind in ("indentation", "fuzzy"):
+            first = next(i for i, line in enumerate(search) if line.strip())
+            replace = _reindent(replace, _indent(search[first]), _indent(lines[start + first]))
+        lines[start:start + len(search)] = replace
+        applied += 1
+        if kind != "exact":
+            logger.debug(f"Patch edit {number} matched by {kind}")
+    code = "\n".join(lines) + ("\n" if trailing_newline and lines else "")
+    return {"code": code, "applied": applied, "failed": failed}
+
+
+def _resolve(path: str, files: dict) -> str | None:
+    wanted = os.path.normpath(path.strip().strip("`"))
+    for known in files:
+        if os.path.normpath(known) == wanted:
+            return known
+    matches = [known for known in files if os.path.basename(known) == os.path.basename(wanted)]
+    return matches[0] if len(matches) == 1 else None
+
+
+def apply_patch(text: str, files: dict, default_path: str | None = None) -> dict:
+    """
+    Applies a patch response to in-memory files.
+
+    Args:
+        text (str): Model response (see parse_patch).
+        files (dict): {path: current source} of the files the patch may touch.
+        default_path (str, optional): File for edits given without a file header.
+
+    Returns:
+        dict: {"files": {path: new source} for changed files, "failed": [reasons],
+               "error": None, or why the patch as a whole cannot be used}
+               The patch is usable only when "error" is None and "failed" is empty.
+    """
+    result = {"files": {}, "failed": [], "error": None}
+    parsed = parse_patch(text, default_path)
+    if not parsed:
+        result["error"] = "no edits found in the response"
+        return result
+    for path, edits in parsed.items():
+        known = _resolve(path, files)
+        if known is None:
+            result["failed"].append(f"{path}: not one of the files being fixed")
+            continue
+        outcome = apply_edits(result["files"].get(known, files[known]), edits)
+        result["failed"].extend(f"{known}: {reason}" for reason in outcome["failed"])
+        if known.endswith(".py"):
+            try:
+                ast.parse(outcome["code"])
+            except SyntaxError as e:
+                result["failed"].append(f"{known}: patched file does not parse: {e.msg} (line {e.lineno})")
+                continue
+        result["files"][known] = outcome["code"]
+    if result["failed"]:
+        result["error"] = "; ".join(result["failed"])
+    return result
@@ -0,0 +1,154 @@
+# utils/symbol_index.py
+"""
+Parsed symbol tables for Python modules.
+
+Nodes that need to know what a generated module defines used to re-read the
+file and scan it with `^def (\\w+)\\(`, which misses async functions, class
+methods and anything indented. `index_module` parses a file once with `ast`
+and caches the result, keyed by path and invalidated by mtime/size and then
+by content hash, so unchanged files are never re-parsed. A file modified in
+the last MTIME_TRUST_SECONDS is always re-hashed: a quick same-size rewrite
+can keep its mtime on filesystems with coarse timestamps.
+
+The index is a plain dict:
+    functions: top-level functions [{name, signature, docstring, is_async, lineno, end_lineno}]
+    classes:   [{name, bases, docstring, lineno, end_lineno, methods: [function dicts]}]
+    imports:   every import statement, nested ones included
+               [{kind: "import", module, alias}] or [{kind: "from", module, level, names: [(name, alias)]}]
+    names:     every name bound at module level (functions, classes, assignments, imports)
+    error:     the SyntaxError message when the file does not parse, else None
+"""
+import ast
+import hashlib
+import os
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# {abs path: (mtime_ns, size, sha256, index)}
+_cache = {}
+_cache_lock = threading.Lock()
+# Files modified more recently than this are confirmed by content hash even when mtime and size match
+MTIME_TRUST_SECONDS = 2
+
+
+def _function_info(node) -> dict:
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    signature = f"{prefix} {node.name}({ast.unparse(node.args)})"
+    if node.returns is not None:
+        signature += f" -> {ast.unparse(node.returns)}"
+    return {
+        "name": node.name,
+        "signature": signature,
+        "docstring": ast.get_docstring(node),
+        "is_async": isinstance(node, ast.AsyncFunctionDef),
+        "lineno": node.lineno,
+        "end_lineno": node.end_lineno,
+    }
+
+
+def _bound_names(node) -> list:
+    """Names a module-level statement binds (assignment targets, imports, defs)."""
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+        return [node.name]
+    if isinstance(node, (ast.Import, ast.ImportFrom)):
+        return [(a.asname or a.name).split(".")[0] for a in node.names if a.name != "*"]
+    targets = []
+    if isinstance(node, ast.Assign):
+        targets = node.targets
+    elif isinstance(node, (ast.AnnAssign, ast.AugAssign)):
+        targets = [node.target]
+    names = []
+    for target in targets:
+        names.extend(n.id for n in ast.walk(target) if isinstance(n, ast.Name))
+    return names
+
+
+def index_source(source: str, path: str = "<string>") -> dict:
+    """Builds the symbol index for Python source text (uncached)."""
+    index = {"path": path, "functions": [], "classes": [], "imports": [], "names": [], "error": None}
+    try:
+        tree = ast.parse(source, filename=path)
+    except (SyntaxError, ValueError) as e:
+        index["error"] = str(e)
+        return index
+
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            index["functions"].append(_function_info(node))
+        elif isinstance(node, ast.ClassDef):
+            index["classes"].append({
+                "name": node.name,
+                "bases": [ast.unparse(b) for b in node.bases],
+                "docstring": ast.get_docstring(node),
+                "lineno": node.lineno,
+                "end_lineno": node.end_lineno,
+                "methods": [_function_info(n) for n in node.body
+                            if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))],
+            })
+        for name in _bound_names(node):
+            if name not in index["names"]:
+                index["names"].append(name)
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            index["imports"].extend({"kind": "import", "module": a.name, "alias": a.asname} for a in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            index["imports"].append({"kind": "from", "module": node.module, "level": node.level,
+                                     "names": [(a.name, a.asname) for a in node.names]})
+    return index
+
+
+def index_module(path: str) -> dict:
+    """
+    Returns the symbol index for the file at `path`, parsing it only when it changed.
+
+    A file whose mtime/size changed, or that was modified in the last MTIME_TRUST_SECONDS,
+    is re-hashed; the old index is kept if the content is identical. Missing or unreadable
+    files yield an empty index with "error" set.
+    """
+    abs_path = os.path.abspath(path)
+    try:
+        stat = os.stat(abs_path)
+    except OSError as e:
+        return {"path": path, "functions": [], "classes": [], "imports": [], "names": [], "error": str(e)}
+
+    with _cache_lock:
+        cached = _cache.get(abs_path)
+    settled = time.time_ns() - stat.st_mtime_ns > MTIME_TRUST_SECONDS * 1_000_000_000
+    if cached and settled and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[3]
+
+    try:
+        with open(abs_path, "rb") as fh:
+            raw = fh.read()
+    except OSError as e:
+        return {"path": path, "functions": [], "classes": [], "imports": [], "names": [], "error": str(e)}
+    digest = hashlib.sha256(raw).hexdigest()
+    if cached and cached[2] == digest:
+        index = cached[3]
+    else:
+        index = index_source(raw.decode("utf-8", errors="replace"), path)
+        if index["error"]:
+            logger.debug(f"Symbol index: {path} does not parse: {index['error']}")
+    with _cache_lock:
+        _cache[abs_path] = (stat.st_mtime_ns, stat.st_size, digest, index)
+    return index
+
+
+def function_names(path: str) -> list:
+    """Names of the top-level functions (sync and async) defined in the file at `path`."""
+    return [f["name"] for f in index_module(path)["functions"]]
+
+
+def public_names(path: str) -> list:
+    """Names importable from the module at `path`: functions, classes, constants and re-exports."""
+    return index_module(path)["names"]
+
+
+def clear_cache():
+    """Drops every cached index."""
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,220 @@
+# utils/tracing.py
+"""
+Timing spans for graph nodes and external calls, exported to local files.
+
+With Settings.TRACE enabled, every graph node (via `GraphTracer`, a LangGraph
+callback) and every external call (LLM, Jira, pytest, file writes) is recorded
+as a span with its duration, sizes and outcome. Spans nest through a context
+variable, so an LLM call made inside fix_analyzer is a child of that node.
+
+`export_trace` writes two files under Settings.TRACE_DIR:
+    <name>.otlp.json   OTLP/JSON (resourceSpans), loadable by OpenTelemetry tooling
+    <name>.trace.json  Chrome trace events, for chrome://tracing, Perfetto or speedscope
+
+When tracing is off, `span()` returns a shared no-op object after one flag
+check, so instrumented code pays next to nothing.
+
+    with span("llm", node=node, model=model) as s:
+        ...
+        s.set(completion_tokens=123)
+"""
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+from config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar("current_span", default=None)
+_finished = []
+_finished_lock = threading.Lock()
+_trace_id = uuid.uuid4().hex
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class Span:
+    """A timed operation; attributes describe sizes and outcomes."""
+
+    def __init__(self, name: str, attributes: dict, parent=None):
+        self.name = name
+        self.attributes = dict(attributes)
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.thread_id = threading.get_ident()
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+        self._token = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def finish(self, error: BaseException | None = None):
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        with _finished_lock:
+            _finished.append(self)
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._token)
+        self.finish(exc)
+        return False
+
+
+def span(name: str, **attributes):
+    """Context manager timing `name`; a no-op unless Settings.TRACE is on."""
+    if not Settings.TRACE:
+        return _NOOP
+    return Span(name, attributes, _current.get())
+
+
+def start_trace():
+    """Drops spans from a previous run and starts a new trace id."""
+    global _trace_id
+    with _finished_lock:
+        _finished.clear()
+    _trace_id = uuid.uuid4().hex
+
+
+def finished_spans() -> list:
+    with _finished_lock:
+        return list(_finished)
+
+
+class GraphTracer:
+    """
+    LangGraph callback handler opening a span per node run (pass it in config["callbacks"]).
+
+    Only node runs are recorded; routing functions and channel writes are skipped.
+    """
+
+    def __init__(self):
+        from langchain_core.callbacks import BaseCallbackHandler
+
+        tracer = self
+
+        class _Handler(BaseCallbackHandler):
+            def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+                tracer._start(run_id, kwargs.get("name"), metadata or {})
+
+            def on_chain_end(self, outputs, *, run_id, **kwargs):
+                tracer._end(run_id, None, outputs)
+
+            def on_chain_error(self, error, *, run_id, **kwargs):
+                tracer._end(run_id, error, None)
+
+        self.handler = _Handler()
+        self._open = {}
+
+    def _start(self, run_id, name, metadata):
+        if not name or name != metadata.get("langgraph_node"):
+            return
+        parent = _current.get()
+        node_span = Span(f"node:{name}", {"node": name, "step": metadata.get("langgraph_step")}, parent)
+        self._open[run_id] = (node_span, parent)
+        _current.set(node_span)
+
+    def _end(self, run_id, error, outputs):
+        entry = self._open.pop(run_id, None)
+        if entry is None:
+            return
+        node_span, parent = entry
+        if isinstance(outputs, dict):
+            node_span.set(updated_keys=",".join(sorted(outputs)))
+        _current.set(parent)
+        node_span.finish(error)
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp(spans: list, service: str) -> dict:
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service}}]},
+        "scopeSpans": [{
+            "scope": {"name": "jira-coder"},
+            "spans": [{
+                "traceId": _trace_id,
+                "spanId": s.span_id,
+                **({"parentSpanId": s.parent_id} if s.parent_id else {}),
+                "name": s.name,
+                "kind": 1,
+                "startTimeUnixNano": str(s.start_ns),
+                "endTimeUnixNano": str(s.end_ns),
+                "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items() if v is not None],
+                "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+            } for s in spans],
+        }],
+    }]}
+
+
+def _chrome(spans: list) -> dict:
+    pid = os.getpid()
+    return {"traceEvents": [{
+        "name": s.name,
+        "cat": s.name.split(":", 1)[0].split(".", 1)[0],
+        "ph": "X",
+        "ts": s.start_ns / 1000,
+        "dur": (s.end_ns - s.start_ns) / 1000,
+        "pid": pid,
+        "tid": s.thread_id,
+        "args": {**s.attributes, **({"error": s.error} if s.error else {})},
+    } for s in sorted(spans, key=lambda s: s.start_ns)], "displayTimeUnit": "ms"}
+
+
+def export_trace(name: str, service: str = "jira-coder") -> dict:
+    """
+    Writes the finished spans as OTLP JSON and as a Chrome trace.
+
+    Returns:
+        dict: {"otlp": path, "chrome": path, "spans": count}, or {} when tracing is off or nothing was recorded.
+    """
+    spans = finished_spans()
+    if not Settings.TRACE or not spans:
+        return {}
+    os.makedirs(Settings.TRACE_DIR, exist_ok=True)
+    paths = {"otlp": os.path.join(Settings.TRACE_DIR, f"{name}.otlp.json"),
+             "chrome": os.path.join(Settings.TRACE_DIR, f"{name}.trace.json")}
+    with open(paths["otlp"], "w", encoding="utf-8") as fh:
+        json.dump(_otlp(spans, service), fh)
+    with open(paths["chrome"], "w", encoding="utf-8") as fh:
+        json.dump(_chrome(spans), fh)
+
+    totals = {}
+    for s in spans:
+        if s.parent_id is None or s.name.startswith("node:"):
+            totals[s.name] = totals.get(s.name, 0) + (s.end_ns - s.start_ns) / 1e9
+    for span_name, seconds in sorted(totals.items(), key=lambda item: -item[1])[:10]:
+        logger.info(f"Trace: {span_name} {seconds:.2f}s")
+    logger.info(f"Trace written: {paths['otlp']}, {paths['chrome']}")
+    return {**paths, "spans": len(spans)}